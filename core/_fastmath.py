@@ -0,0 +1,25 @@
+# core/_fastmath.py
+"""
+Funciones numéricas del seguimiento multi-objeto compiladas con Numba.
+Si Numba no está instalado se usan implementaciones equivalentes en NumPy.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def mean_confidence(arr, n):
+        """Confianza media de las primeras n filas (columna 4) del historial"""
+        s = 0.0
+        for i in range(n):
+            s += arr[i, 4]
+        return s / n
+else:
+    def mean_confidence(arr, n):
+        """Confianza media de las primeras n filas (columna 4) del historial"""
+        return float(arr[:n, 4].mean())
@@ -0,0 +1,48 @@
+# core/_ptz_kernels.py
+"""
+Núcleos numéricos del seguimiento PTZ calibrado y del filtrado de detecciones
+compilados con Numba. Si Numba no está instalado se usan implementaciones
+equivalentes en Python/NumPy.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _calibrated_move(obj_x, obj_y, cx, cy, dzx, dzy, kx, ky):
+    """Velocidades (pan, tilt) hacia el centro corregido (cx, cy) con deadzone en píxeles"""
+    dx = obj_x - cx
+    dy = obj_y - cy
+    dx *= abs(dx) >= dzx
+    dy *= abs(dy) >= dzy
+    return (min(0.5, max(-0.5, dx * kx)), min(0.5, max(-0.5, dy * ky)))
+
+
+if NUMBA_AVAILABLE:
+    calibrated_move = njit(cache=True, fastmath=True)(_calibrated_move)
+
+    @njit(cache=True)
+    def filter_boxes(boxes, min_conf):
+        """Filas de boxes (N, 6) [x1, y1, x2, y2, conf, cls] con caja no degenerada y conf >= min_conf"""
+        out = np.empty_like(boxes)
+        m = 0
+        for i in range(boxes.shape[0]):
+            if boxes[i, 2] > boxes[i, 0] and boxes[i, 3] > boxes[i, 1] and boxes[i, 4] >= min_conf:
+                for j in range(6):
+                    out[m, j] = boxes[i, j]
+                m += 1
+        return out[:m]
+else:
+    calibrated_move = _calibrated_move
+
+    def filter_boxes(boxes, min_conf):
+        """Filas de boxes (N, 6) [x1, y1, x2, y2, conf, cls] con caja no degenerada y conf >= min_conf"""
+        mask = ((boxes[:, 2] > boxes[:, 0])
+                & (boxes[:, 3] > boxes[:, 1])
+                & (boxes[:, 4] >= min_conf))
+        return boxes[mask]
@@ -9,17 +9,39 @@ Características:
 - Configuración flexible para diferentes escenarios
 """
 
+import copy
 import time
 import threading
+from collections import deque
 from enum import Enum
 from typing import Optional, Dict, List, Tuple, Callable, Any
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, MISSING
 from datetime import datetime
 import math
 import logging
+import numpy as np
+
+from core._fastmath import mean_confidence
+
+logger = logging.getLogger(__name__)
+
+# Deduplicación de comandos ContinuousMove
+PTZ_COMMAND_EPSILON = 0.005       # Diferencia mínima de velocidad para reenviar
+PTZ_COMMAND_REFRESH_AGE = 1.0    # Reenviar una velocidad repetida pasado este tiempo (< timeout PTZ de la cámara)
+PTZ_COMMAND_FLUSH_INTERVAL = 0.05  # Ventana de agrupación de comandos PTZ
+
+CLEANUP_INTERVAL = 0.5  # Segundos entre barridos de objetos perdidos
+
+HISTORY_CAPACITY = 1000  # Entradas en los buffers circulares de PTZ y zoom
+
+# Historial de posiciones por objeto: buffer circular con columnas
+# (cx, cy, width, height, confidence, timestamp)
+POSITION_HISTORY = 20
+RECENT_POSITIONS = 5  # Posiciones usadas para estimar la velocidad
+_RECENT_OFFSETS = np.arange(RECENT_POSITIONS)
 
 # ===== CORRECCIÓN: Definir ObjectPosition y TrackingState localmente =====
-@dataclass
+@dataclass(slots=True)
 class ObjectPosition:
     """Representa la posición de un objeto detectado en el frame"""
     cx: float          # Centro X normalizado (0-1)
@@ -31,6 +53,10 @@ class ObjectPosition:
     frame_w: int = 1920    # Ancho del frame en píxeles
     frame_h: int = 1080    # Alto del frame en píxeles
     object_class: str = "unknown"
+    area_norm: float = field(init=False, repr=False)  # width*height (ratio del frame)
+    
+    def __post_init__(self):
+        self.area_norm = self.width * self.height
     
     def to_pixels(self) -> tuple:
         """Convertir coordenadas normalizadas a píxeles"""
@@ -46,7 +72,7 @@ class ObjectPosition:
     
     def distance_to_center(self) -> float:
         """Calcular distancia al centro del frame (0-1)"""
-        return math.sqrt((self.cx - 0.5)**2 + (self.cy - 0.5)**2)
+        return math.hypot(self.cx - 0.5, self.cy - 0.5)
 
 class TrackingState(Enum):
     """Estados del sistema de seguimiento PTZ"""
@@ -99,7 +125,7 @@ class TrackingMode(Enum):
     MULTI_OBJECT_PRIORITY = "priority_based"
     AUTO_SWITCH = "auto_switch"
 
-@dataclass
+@dataclass(slots=True)
 class MultiObjectConfig:
     """Configuración completa para seguimiento multi-objeto"""
     
@@ -148,26 +174,29 @@ class MultiObjectConfig:
     
     def validate(self) -> bool:
         """Validar que la configuración sea correcta"""
-        try:
-            assert 0.0 <= self.primary_follow_time <= 60.0
-            assert 0.0 <= self.secondary_follow_time <= 60.0
-            assert self.min_switch_interval > 0
-            assert self.alternating_enabled or self.secondary_follow_time > 0
-            assert self.min_zoom_level <= self.max_zoom_level
-            assert 0 < self.max_objects_to_track <= 10
-            return True
-        except AssertionError:
-            return False
+        return (
+            0.0 <= self.primary_follow_time <= 60.0 and
+            0.0 <= self.secondary_follow_time <= 60.0 and
+            self.min_switch_interval > 0 and
+            (self.alternating_enabled or self.secondary_follow_time > 0) and
+            self.min_zoom_level <= self.max_zoom_level and
+            0 < self.max_objects_to_track <= 10
+        )
 
-@dataclass
+@dataclass(slots=True)
 class TrackedObject:
     """Representa un objeto siendo rastreado con historial completo"""
     id: int
-    positions: List[ObjectPosition] = field(default_factory=list)
     last_seen: float = 0.0
-    confidence_history: List[float] = field(default_factory=list)
     priority_score: float = 0.0
     
+    # Historial de posiciones (buffer circular, ver POSITION_HISTORY)
+    _pos: np.ndarray = field(init=False, repr=False,
+                             default_factory=lambda: np.zeros((POSITION_HISTORY, 6)))
+    _pos_n: int = field(init=False, repr=False, default=0)   # Posiciones válidas
+    _pos_i: int = field(init=False, repr=False, default=0)   # Próxima fila a escribir
+    _last_position: Optional[ObjectPosition] = field(init=False, repr=False, default=None)
+    
     # Análisis de movimiento
     is_moving: bool = False
     movement_speed: float = 0.0
@@ -194,84 +223,99 @@ class TrackedObject:
     
     def __post_init__(self):
         if self.first_seen == 0.0:
-            self.first_seen = time.time()
+            self.first_seen = time.monotonic()
+    
+    def reset(self, obj_id: int):
+        """Reinicializar el objeto para reutilizarlo desde el pool"""
+        for f in fields(self):
+            if f.default is not MISSING:
+                setattr(self, f.name, f.default)
+        self.id = obj_id
+        self.first_seen = time.monotonic()
+    
+    @property
+    def history_length(self) -> int:
+        """Número de posiciones almacenadas en el historial"""
+        return self._pos_n
     
-    def add_position(self, position: ObjectPosition):
-        """Agregar nueva posición y actualizar análisis"""
-        current_time = time.time()
+    def add_position(self, position: ObjectPosition, now: Optional[float] = None):
+        """Agregar nueva posición y actualizar análisis.
+
+        ``now`` es el instante monotónico del frame; se obtiene si no se indica.
+        """
+        current_time = time.monotonic() if now is None else now
         
-        # Agregar posición
-        self.positions.append(position)
-        self.confidence_history.append(position.confidence)
+        # Agregar posición al buffer circular (el historial queda limitado)
+        self._pos[self._pos_i] = (position.cx, position.cy, position.width,
+                                  position.height, position.confidence, position.timestamp)
+        self._pos_i = (self._pos_i + 1) % POSITION_HISTORY
+        if self._pos_n < POSITION_HISTORY:
+            self._pos_n += 1
+        self._last_position = position
         self.last_seen = current_time
         self.frames_tracked += 1
         
-        # Mantener historial limitado
-        max_history = 20
-        if len(self.positions) > max_history:
-            self.positions = self.positions[-max_history:]
-            self.confidence_history = self.confidence_history[-max_history:]
-        
         # Actualizar análisis
         self._update_movement_analysis()
         self._update_size_analysis()
-        self._update_tracking_stats()
+        self._update_tracking_stats(current_time)
     
     def _update_movement_analysis(self):
         """Actualizar análisis de movimiento del objeto"""
-        if len(self.positions) < 2:
+        _hypot = math.hypot
+        _atan2 = math.atan2
+        n_positions = self._pos_n
+        
+        if n_positions < 2:
             self.is_moving = False
             self.movement_speed = 0.0
             return
         
-        # Calcular velocidades recientes
-        recent_positions = self.positions[-5:] if len(self.positions) >= 5 else self.positions
+        # Últimas posiciones en orden cronológico
+        n_recent = min(n_positions, RECENT_POSITIONS)
+        idx = (self._pos_i - n_recent + _RECENT_OFFSETS[:n_recent]) % POSITION_HISTORY
+        recent = self._pos[idx]
         
-        if len(recent_positions) < 2:
-            return
-        
-        # Calcular velocidad promedio
-        velocities_x = []
-        velocities_y = []
-        
-        for i in range(1, len(recent_positions)):
-            dt = recent_positions[i].timestamp - recent_positions[i-1].timestamp
-            if dt > 0:
-                vx = (recent_positions[i].cx - recent_positions[i-1].cx) / dt
-                vy = (recent_positions[i].cy - recent_positions[i-1].cy) / dt
-                velocities_x.append(vx)
-                velocities_y.append(vy)
+        # Calcular velocidad promedio sobre los intervalos válidos
+        dt = np.diff(recent[:, 5])
+        valid = dt > 0
         
-        if velocities_x and velocities_y:
-            self.velocity_x = sum(velocities_x) / len(velocities_x)
-            self.velocity_y = sum(velocities_y) / len(velocities_y)
-            self.movement_speed = math.sqrt(self.velocity_x**2 + self.velocity_y**2)
-            self.movement_direction = math.atan2(self.velocity_y, self.velocity_x)
+        if valid.any():
+            dt = dt[valid]
+            self.velocity_x = float((np.diff(recent[:, 0])[valid] / dt).mean())
+            self.velocity_y = float((np.diff(recent[:, 1])[valid] / dt).mean())
+            self.movement_speed = _hypot(self.velocity_x, self.velocity_y)
+            self.movement_direction = _atan2(self.velocity_y, self.velocity_x)
             
             # Considerar que se mueve si velocidad > umbral
             self.is_moving = self.movement_speed > 0.01  # 1% del frame por segundo
     
     def _update_size_analysis(self):
         """Actualizar análisis de tamaño del objeto"""
-        if not self.positions:
+        n = self._pos_n
+        if not n:
             return
         
+        # El orden no importa para promedios: basta con las filas válidas
+        view = self._pos[:n]
+        widths = view[:, 2]
+        heights = view[:, 3]
+        
         # Calcular tamaño promedio
-        sizes = [pos.width * pos.height for pos in self.positions]
-        self.average_size = sum(sizes) / len(sizes)
+        sizes = widths * heights
+        self.average_size = float(sizes.mean())
         
         # Calcular estabilidad del tamaño (varianza)
-        if len(sizes) > 1:
-            variance = sum((s - self.average_size)**2 for s in sizes) / len(sizes)
+        if n > 1:
+            variance = float(sizes.var())
             self.size_stability = 1.0 / (1.0 + variance)  # 1 = muy estable, 0 = muy variable
         
         # Calcular ratio de forma promedio
-        ratios = [pos.width / pos.height if pos.height > 0 else 1.0 for pos in self.positions]
-        self.shape_ratio = sum(ratios) / len(ratios)
+        ratios = np.divide(widths, heights, out=np.ones(n), where=heights > 0)
+        self.shape_ratio = float(ratios.mean())
     
-    def _update_tracking_stats(self):
+    def _update_tracking_stats(self, current_time: float):
         """Actualizar estadísticas de seguimiento"""
-        current_time = time.time()
         self.time_being_tracked = current_time - self.first_seen
         
         if self.is_primary_target:
@@ -279,13 +323,14 @@ class TrackedObject:
     
     def get_average_confidence(self) -> float:
         """Obtener confianza promedio"""
-        if not self.confidence_history:
+        n = self._pos_n
+        if not n:
             return 0.0
-        return sum(self.confidence_history) / len(self.confidence_history)
+        return mean_confidence(self._pos, n)
     
     def get_current_position(self) -> Optional[ObjectPosition]:
         """Obtener posición más reciente"""
-        return self.positions[-1] if self.positions else None
+        return self._last_position
     
     def get_object_size_ratio(self) -> float:
         """Obtener ratio de tamaño del objeto respecto al frame"""
@@ -293,8 +338,7 @@ class TrackedObject:
         if not pos:
             return 0.0
         
-        object_area = pos.width * pos.height
-        return object_area  # Ya es un ratio del frame total
+        return pos.area_norm  # Ya es un ratio del frame total
     
     def get_predicted_position(self, time_ahead: float = 0.1) -> Optional[ObjectPosition]:
         """Predecir posición futura basada en velocidad actual"""
@@ -344,17 +388,35 @@ class MultiObjectPTZTracker:
         self.state = TrackingState.IDLE
         self.tracking_active = False
         self.tracking_thread = None
+        self.command_thread = None
         
         # Conexión PTZ
         self.camera = None
         self.ptz_service = None
         self.profile_token = None
+        self._cm_req = None  # Petición ContinuousMove reutilizable
+        # Métodos de movimiento resueltos una vez por conexión
+        self._do_continuous: Optional[Callable] = None
+        self._do_absolute: Optional[Callable] = None
+        self._ptz_methods_resolved = False
+        self._last_sent_pan = 0.0
+        self._last_sent_tilt = 0.0
+        self._last_sent_ts = 0.0
+        self._pending_cmd: Optional[Tuple[float, float]] = None  # Último comando sin enviar
+        self._cmd_lock = threading.Lock()
         
         # Estado multi-objeto
         self.tracked_objects: Dict[int, TrackedObject] = {}
+        self._target_order: deque = deque()  # Orden de rotación entre objetivos
+        self._obj_pool: List[TrackedObject] = []  # Objetos perdidos reutilizables
         self.next_object_id = 1
+        self._last_cleanup_ts = 0.0
         self.current_target_id: Optional[int] = None
         self.secondary_target_id: Optional[int] = None
+        self._priority_dirty = True  # Se activa cuando cambian los objetos rastreados
+        # Pesos de prioridad como vector, reconstruido solo si cambia la configuración
+        self._weights_key: Optional[tuple] = None
+        self._weights_vec: Optional[np.ndarray] = None
         
         # Control de alternancia
         self.last_switch_time = 0.0
@@ -365,7 +427,8 @@ class MultiObjectPTZTracker:
         # Control de zoom
         self.current_zoom_level = 0.5
         self.target_zoom_level = 0.5
-        self.zoom_history = []
+        self._zoom_hist = np.zeros(HISTORY_CAPACITY, dtype=np.float32)
+        self._zoom_hist_count = 0  # Total de cambios registrados
         self.zoom_change_count = 0
 
         # Posición actual conocida
@@ -373,15 +436,16 @@ class MultiObjectPTZTracker:
         self.current_tilt_position = 0.0
         self.current_zoom_position = 0.0
         
-        # Historial de movimiento PTZ
-        self.ptz_movement_history = []
+        # Historial de movimiento PTZ (buffer circular de pan/tilt)
+        self._ptz_hist = np.zeros((HISTORY_CAPACITY, 2), dtype=np.float32)
+        self._ptz_hist_count = 0  # Total de movimientos registrados
         self.current_pan_speed = 0.0
         self.current_tilt_speed = 0.0
         self.target_pan_speed = 0.0
         self.target_tilt_speed = 0.0
         
         # Estadísticas del sistema
-        self.session_start_time = time.time()
+        self.session_start_time = time.monotonic()
         self.total_detections_processed = 0
         self.successful_tracks = 0
         self.failed_tracks = 0
@@ -394,39 +458,43 @@ class MultiObjectPTZTracker:
         self.on_state_change: Optional[Callable] = None
         self.on_tracking_update: Optional[Callable] = None
         
-        print(f"✅ MultiObjectPTZTracker creado para {ip}:{port}")
+        logger.info("✅ MultiObjectPTZTracker creado para %s:%s", ip, port)
     
     def start_tracking(self) -> bool:
         """Iniciar el seguimiento multi-objeto"""
         if self.tracking_active:
-            print("⚠️ El seguimiento ya está activo")
+            logger.warning("⚠️ El seguimiento ya está activo")
             return False
         
         try:
-            print(f"🚀 Iniciando seguimiento PTZ para {self.ip}:{self.port}")
+            logger.info("🚀 Iniciando seguimiento PTZ para %s:%s", self.ip, self.port)
             
             # Verificar conexión PTZ básica
             if not self._test_ptz_connection():
-                print("❌ No se pudo conectar a la cámara PTZ")
+                logger.error("❌ No se pudo conectar a la cámara PTZ")
                 return False
             
             # Inicializar variables de seguimiento
             self.tracking_active = True
             self.state = TrackingState.TRACKING
             self.tracked_objects = {}
+            self._target_order.clear()
             self.next_object_id = 1
             self.current_target_id = None
-            self.session_start_time = time.time()
+            self.session_start_time = time.monotonic()
             
-            # Iniciar hilo de seguimiento
+            # Iniciar hilo de envío de comandos y de seguimiento
+            self._pending_cmd = None
+            self.command_thread = threading.Thread(target=self._command_flush_loop, daemon=True)
+            self.command_thread.start()
             self.tracking_thread = threading.Thread(target=self._tracking_loop, daemon=True)
             self.tracking_thread.start()
             
-            print("✅ Seguimiento multi-objeto iniciado exitosamente")
+            logger.info("✅ Seguimiento multi-objeto iniciado exitosamente")
             return True
             
         except Exception as e:
-            print(f"❌ Error iniciando seguimiento: {e}")
+            logger.error("❌ Error iniciando seguimiento: %s", e)
             self.tracking_active = False
             self.state = TrackingState.ERROR
             return False
@@ -436,7 +504,7 @@ class MultiObjectPTZTracker:
         if not self.tracking_active:
             return
         
-        print("⏹️ Deteniendo seguimiento PTZ...")
+        logger.info("⏹️ Deteniendo seguimiento PTZ...")
         
         # Señalar parada
         self.tracking_active = False
@@ -445,6 +513,8 @@ class MultiObjectPTZTracker:
         # Esperar que termine el hilo
         if hasattr(self, 'tracking_thread') and self.tracking_thread and self.tracking_thread.is_alive():
             self.tracking_thread.join(timeout=2.0)
+        if self.command_thread and self.command_thread.is_alive():
+            self.command_thread.join(timeout=2.0)
         
         # Detener movimiento PTZ
         self._stop_ptz_movement()
@@ -452,8 +522,9 @@ class MultiObjectPTZTracker:
         # Limpiar estado
         self.current_target_id = None
         self.tracked_objects.clear()
+        self._target_order.clear()
         
-        print("✅ Seguimiento detenido")
+        logger.info("✅ Seguimiento detenido")
 
     def update_detections(self, detections: list) -> bool:
         """Actualizar con nuevas detecciones"""
@@ -482,19 +553,19 @@ class MultiObjectPTZTracker:
                 )
                 
                 # Filtrar por tamaño
-                size_ratio = pos.width * pos.height
+                size_ratio = pos.area_norm
                 if (size_ratio >= self.multi_config.min_object_size and 
                     size_ratio <= self.multi_config.max_object_size):
                     new_positions.append(pos)
             
             # Procesar nuevas posiciones
-            self._update_tracked_objects(new_positions)
+            self._update_tracked_objects(new_positions, time.monotonic())
             self.total_detections_processed += len(detections)
             
             return True
             
         except Exception as e:
-            print(f"❌ Error actualizando detecciones: {e}")
+            logger.error("❌ Error actualizando detecciones: %s", e)
             return False
 
     def _test_ptz_connection(self) -> bool:
@@ -503,7 +574,7 @@ class MultiObjectPTZTracker:
             from onvif import ONVIFCamera
             import socket
 
-            print(f"🔗 Probando conexión PTZ a {self.ip}:{self.port}")
+            logger.info("🔗 Probando conexión PTZ a %s:%s", self.ip, self.port)
 
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(5)
@@ -511,7 +582,7 @@ class MultiObjectPTZTracker:
             sock.close()
 
             if result != 0:
-                print(f"❌ No se puede conectar a {self.ip}:{self.port}")
+                logger.error("❌ No se puede conectar a %s:%s", self.ip, self.port)
                 return False
 
             self.camera = ONVIFCamera(
@@ -523,16 +594,18 @@ class MultiObjectPTZTracker:
             )
 
             self.ptz_service = self.camera.create_ptz_service()
+            self._cm_req = None
+            self._ptz_methods_resolved = False
 
             media_service = self.camera.create_media_service()
             profiles = media_service.GetProfiles()
 
             if not profiles:
-                print("❌ No se encontraron perfiles de cámara")
+                logger.error("❌ No se encontraron perfiles de cámara")
                 return False
 
             self.profile_token = profiles[0].token
-            print(f"✅ Conexión PTZ exitosa (perfil: {self.profile_token})")
+            logger.info("✅ Conexión PTZ exitosa (perfil: %s)", self.profile_token)
 
             # Obtener posición inicial si es posible
             self._query_current_position()
@@ -540,19 +613,25 @@ class MultiObjectPTZTracker:
             return True
 
         except Exception as e:
-            print(f"❌ Error en conexión PTZ: {e}")
+            logger.error("❌ Error en conexión PTZ: %s", e)
             return False
 
     def _tracking_loop(self):
         """Bucle principal de seguimiento"""
-        print("🔄 Iniciando bucle de seguimiento...")
+        logger.info("🔄 Iniciando bucle de seguimiento...")
         
         while self.tracking_active:
             try:
-                current_time = time.time()
+                # Un único instante monotónico por iteración para todos los helpers
+                current_time = time.monotonic()
                 
                 # Verificar si hay objetos para seguir
                 if self.tracked_objects:
+                    # Recalcular prioridades solo si llegaron detecciones o
+                    # cambió el conjunto de objetos desde el último cálculo
+                    if self._priority_dirty:
+                        self._refresh_priorities()
+                    
                     # Seleccionar objetivo si no hay uno
                     if not self.current_target_id or self.current_target_id not in self.tracked_objects:
                         self._select_new_target()
@@ -572,19 +651,23 @@ class MultiObjectPTZTracker:
                 time.sleep(0.1)  # 10 FPS de control
                 
             except Exception as e:
-                print(f"❌ Error en bucle de seguimiento: {e}")
+                logger.error("❌ Error en bucle de seguimiento: %s", e)
                 time.sleep(0.5)
         
-        print("🛑 Bucle de seguimiento terminado")
+        logger.info("🛑 Bucle de seguimiento terminado")
 
-    def _update_tracked_objects(self, new_positions: List[ObjectPosition]):
+    def _update_tracked_objects(self, new_positions: List[ObjectPosition], now: float):
         """Actualizar objetos being tracked"""
-        current_time = time.time()
+        _hypot = math.hypot
         
         # Asociar nuevas posiciones con objetos existentes
         unmatched_positions = new_positions.copy()
         
-        for obj_id, tracked_obj in list(self.tracked_objects.items()):
+        if new_positions:
+            self._mark_dirty()
+        
+        # Copia: el hilo de seguimiento puede retirar objetos perdidos a la vez
+        for tracked_obj in list(self.tracked_objects.values()):
             best_match = None
             best_distance = float('inf')
             
@@ -594,7 +677,7 @@ class MultiObjectPTZTracker:
             
             # Buscar la posición más cercana
             for pos in unmatched_positions:
-                distance = ((pos.cx - current_pos.cx)**2 + (pos.cy - current_pos.cy)**2)**0.5
+                distance = _hypot(pos.cx - current_pos.cx, pos.cy - current_pos.cy)
                 
                 if distance < best_distance and distance < 0.1:  # Máximo 10% del frame
                     best_distance = distance
@@ -602,61 +685,99 @@ class MultiObjectPTZTracker:
             
             # Actualizar objeto si hay coincidencia
             if best_match:
-                tracked_obj.add_position(best_match)
+                tracked_obj.add_position(best_match, now)
                 unmatched_positions.remove(best_match)
         
         # Crear nuevos objetos para posiciones no asociadas
         for pos in unmatched_positions:
             if len(self.tracked_objects) < self.multi_config.max_objects_to_track:
-                new_obj = TrackedObject(id=self.next_object_id)
-                new_obj.add_position(pos)
+                new_obj = self._acquire_tracked_object(self.next_object_id)
+                new_obj.add_position(pos, now)
                 self.tracked_objects[self.next_object_id] = new_obj
-                print(f"🆕 Nuevo objeto rastreado: {self.next_object_id}")
+                self._target_order.append(self.next_object_id)
+                logger.debug("🆕 Nuevo objeto rastreado: %s", self.next_object_id)
                 self.next_object_id += 1
 
+    def _mark_dirty(self):
+        """Indicar que las prioridades deben recalcularse"""
+        self._priority_dirty = True
+
+    def _refresh_priorities(self):
+        """Recalcular prioridades y limpiar la marca (antes, para no perder
+        una detección que llegue durante el cálculo)"""
+        self._priority_dirty = False
+        self._update_object_priorities()
+
+    def _acquire_tracked_object(self, obj_id: int) -> TrackedObject:
+        """Obtener un TrackedObject del pool o crear uno nuevo"""
+        if self._obj_pool:
+            obj = self._obj_pool.pop()
+            obj.reset(obj_id)
+            return obj
+        return TrackedObject(id=obj_id)
+
+    def _release_tracked_object(self, obj: TrackedObject):
+        """Devolver un objeto perdido al pool (acotado)"""
+        if len(self._obj_pool) < self.multi_config.max_objects_to_track * 2:
+            self._obj_pool.append(obj)
+
     def _select_new_target(self):
         """Seleccionar nuevo objetivo principal"""
         if not self.tracked_objects:
             self.current_target_id = None
             return
         
-        # Calcular prioridades
-        self._update_object_priorities()
+        # Prioridades al día salvo cambios desde el último tick
+        if self._priority_dirty:
+            self._refresh_priorities()
         
         # Obtener objeto con mayor prioridad
-        best_obj_id = max(self.tracked_objects.keys(), 
-                         key=lambda oid: self.tracked_objects[oid].priority_score)
+        best_obj_id, best_obj = max(list(self.tracked_objects.items()),
+                                    key=lambda item: item[1].priority_score)
         
         if best_obj_id != self.current_target_id:
             old_target = self.current_target_id
             self.current_target_id = best_obj_id
             
-            # Marcar como objetivo principal
-            for obj_id, obj in self.tracked_objects.items():
-                obj.is_primary_target = (obj_id == self.current_target_id)
+            # Marcar como objetivo principal (solo cambian dos objetos)
+            old_obj = self.tracked_objects.get(old_target)
+            if old_obj is not None:
+                old_obj.is_primary_target = False
+            best_obj.is_primary_target = True
             
-            print(f"🎯 Nuevo objetivo seleccionado: {self.current_target_id} (anterior: {old_target})")
+            logger.debug("🎯 Nuevo objetivo seleccionado: %s (anterior: %s)", self.current_target_id, old_target)
+
+    def _priority_weights(self) -> np.ndarray:
+        """Pesos (confianza, movimiento, tamaño, proximidad) como vector"""
+        cfg = self.multi_config
+        key = (cfg.confidence_weight, cfg.movement_weight,
+               cfg.size_weight, cfg.proximity_weight)
+        if key != self._weights_key:
+            self._weights_key = key
+            self._weights_vec = np.array(key)
+        return self._weights_vec
 
     def _update_object_priorities(self):
         """Actualizar prioridades de todos los objetos"""
-        for obj in self.tracked_objects.values():
-            # Componentes de prioridad
+        objects = list(self.tracked_objects.values())
+        if not objects:
+            return
+        
+        # Componentes de prioridad: una fila por objeto
+        rows = []
+        for obj in objects:
             confidence_score = obj.get_average_confidence()
             movement_score = min(obj.movement_speed * 10, 1.0) if obj.is_moving else 0.0
             
             current_pos = obj.get_current_position()
-            size_score = min(current_pos.width * current_pos.height * 4, 1.0) if current_pos else 0.0
+            size_score = min(current_pos.area_norm * 4, 1.0) if current_pos else 0.0
             proximity_score = 1.0 - current_pos.distance_to_center() if current_pos else 0.0
-            
-            # Calcular prioridad total
-            priority = (
-                confidence_score * self.multi_config.confidence_weight +
-                movement_score * self.multi_config.movement_weight +
-                size_score * self.multi_config.size_weight +
-                proximity_score * self.multi_config.proximity_weight
-            )
-            
-            obj.priority_score = priority
+            rows.append((confidence_score, movement_score, size_score, proximity_score))
+        
+        # Prioridad total de todos los objetos en un solo producto
+        scores = np.array(rows) @ self._priority_weights()
+        for obj, score in zip(objects, scores.tolist()):
+            obj.priority_score = score
 
     def _execute_tracking(self):
         """Ejecutar seguimiento del objetivo actual"""
@@ -679,7 +800,7 @@ class MultiObjectPTZTracker:
             self.successful_tracks += 1
             
         except Exception as e:
-            print(f"❌ Error ejecutando seguimiento: {e}")
+            logger.error("❌ Error ejecutando seguimiento: %s", e)
             self.failed_tracks += 1
 
     def _query_current_position(self):
@@ -724,98 +845,186 @@ class MultiObjectPTZTracker:
         
         return pan_speed, tilt_speed
 
+    def _get_continuous_move_request(self, pan_speed: float, tilt_speed: float):
+        """Obtener la petición ContinuousMove cacheada con las velocidades dadas"""
+        req = self._cm_req
+        if req is None:
+            req = self.ptz_service.create_type('ContinuousMove')
+            req.ProfileToken = self.profile_token
+            req.Velocity = {
+                'PanTilt': {'x': 0.0, 'y': 0.0},
+                'Zoom': {'x': 0.0}
+            }
+            self._cm_req = req
+        pan_tilt = req.Velocity['PanTilt']
+        pan_tilt['x'] = pan_speed
+        pan_tilt['y'] = tilt_speed
+        return req
+
+    def _continuous_move_service(self, pan_speed: float, tilt_speed: float):
+        """ContinuousMove a través del servicio PTZ ONVIF"""
+        self.ptz_service.ContinuousMove(
+            self._get_continuous_move_request(pan_speed, tilt_speed))
+
+    def _absolute_move_service(self, pan: float, tilt: float, zoom: float):
+        """AbsoluteMove a través del servicio PTZ ONVIF"""
+        req = self.ptz_service.create_type('AbsoluteMove')
+        req.ProfileToken = self.profile_token
+        req.Position = {
+            'PanTilt': {'x': pan, 'y': tilt},
+            'Zoom': {'x': zoom}
+        }
+        self.ptz_service.AbsoluteMove(req)
+
+    def _resolve_ptz_methods(self):
+        """Resolver una sola vez qué métodos de movimiento están disponibles"""
+        service, camera = self.ptz_service, self.camera
+        if service and hasattr(service, 'ContinuousMove'):
+            self._do_continuous = self._continuous_move_service
+        elif camera and hasattr(camera, 'continuous_move'):
+            self._do_continuous = camera.continuous_move
+        else:
+            self._do_continuous = None
+        if service and hasattr(service, 'AbsoluteMove'):
+            self._do_absolute = self._absolute_move_service
+        elif camera and hasattr(camera, 'absolute_move'):
+            self._do_absolute = camera.absolute_move
+        else:
+            self._do_absolute = None
+        self._ptz_methods_resolved = True
+
+    def _record_ptz_movement(self, pan_speed: float, tilt_speed: float):
+        """Registrar un comando PTZ en el buffer circular"""
+        self._ptz_hist[self._ptz_hist_count % HISTORY_CAPACITY] = (pan_speed, tilt_speed)
+        self._ptz_hist_count += 1
+
+    def _record_zoom_change(self, new_zoom: float):
+        """Registrar un cambio de zoom en el buffer circular"""
+        self._zoom_hist[self._zoom_hist_count % HISTORY_CAPACITY] = new_zoom
+        self._zoom_hist_count += 1
+        self.zoom_change_count += 1
+        self.current_zoom_level = new_zoom
+
+    def _is_redundant_command(self, pan_speed: float, tilt_speed: float, now: float) -> bool:
+        """Determinar si el comando repite la velocidad vigente
+        
+        Basta con el epsilon; la antigüedad solo fuerza un reenvío periódico
+        para que el timeout PTZ de la cámara no detenga el movimiento.
+        """
+        # La primera parada tras un movimiento siempre debe llegar a la cámara
+        if (pan_speed == 0.0 and tilt_speed == 0.0 and
+                (self._last_sent_pan != 0.0 or self._last_sent_tilt != 0.0)):
+            return False
+        return (abs(pan_speed - self._last_sent_pan) < PTZ_COMMAND_EPSILON and
+                abs(tilt_speed - self._last_sent_tilt) < PTZ_COMMAND_EPSILON and
+                (now - self._last_sent_ts) < PTZ_COMMAND_REFRESH_AGE)
+
     def _send_ptz_command(self, pan_speed: float, tilt_speed: float):
+        """Encolar comando PTZ; el hilo de envío transmite solo el más reciente."""
+        if not self.tracking_active:
+            self._dispatch_ptz_command(pan_speed, tilt_speed)
+            return
+        with self._cmd_lock:
+            pending = self._pending_cmd
+            if pending is not None and self.multi_config.use_absolute_move:
+                # En modo absoluto los incrementos se acumulan para no perder recorrido
+                pan_speed += pending[0]
+                tilt_speed += pending[1]
+            self._pending_cmd = (pan_speed, tilt_speed)
+
+    def _command_flush_loop(self):
+        """Enviar periódicamente el último comando PTZ pendiente"""
+        while self.tracking_active:
+            time.sleep(PTZ_COMMAND_FLUSH_INTERVAL)
+            with self._cmd_lock:
+                cmd = self._pending_cmd
+                self._pending_cmd = None
+            if cmd is not None:
+                self._dispatch_ptz_command(*cmd)
+
+    def _dispatch_ptz_command(self, pan_speed: float, tilt_speed: float):
         """Enviar comando PTZ a la cámara."""
         try:
+            if not self._ptz_methods_resolved:
+                self._resolve_ptz_methods()
+            
             if self.multi_config.use_absolute_move:
                 new_pan = max(-1.0, min(1.0, self.current_pan_position + pan_speed))
                 new_tilt = max(-1.0, min(1.0, self.current_tilt_position + tilt_speed))
-                if self.ptz_service and hasattr(self.ptz_service, 'AbsoluteMove'):
-                    req = self.ptz_service.create_type('AbsoluteMove')
-                    req.ProfileToken = self.profile_token
-                    req.Position = {
-                        'PanTilt': {'x': new_pan, 'y': new_tilt},
-                        'Zoom': {'x': self.current_zoom_position}
-                    }
-                    self.ptz_service.AbsoluteMove(req)
-                elif self.camera and hasattr(self.camera, 'absolute_move'):
-                    self.camera.absolute_move(new_pan, new_tilt, self.current_zoom_position)
-                else:
+                if self._do_absolute:
+                    self._do_absolute(new_pan, new_tilt, self.current_zoom_position)
+                elif self._do_continuous:
                     # Fallback a movimiento continuo
-                    if self.ptz_service and hasattr(self.ptz_service, 'ContinuousMove'):
-                        req = self.ptz_service.create_type('ContinuousMove')
-                        req.ProfileToken = self.profile_token
-                        req.Velocity = {
-                            'PanTilt': {'x': pan_speed, 'y': tilt_speed},
-                            'Zoom': {'x': 0.0}
-                        }
-                        self.ptz_service.ContinuousMove(req)
-                    elif self.camera and hasattr(self.camera, 'continuous_move'):
-                        self.camera.continuous_move(pan_speed, tilt_speed)
+                    self._do_continuous(pan_speed, tilt_speed)
                 self.current_pan_position = new_pan
                 self.current_tilt_position = new_tilt
             else:
-                if self.ptz_service and hasattr(self.ptz_service, 'ContinuousMove'):
-                    req = self.ptz_service.create_type('ContinuousMove')
-                    req.ProfileToken = self.profile_token
-                    req.Velocity = {
-                        'PanTilt': {'x': pan_speed, 'y': tilt_speed},
-                        'Zoom': {'x': 0.0}
-                    }
-                    self.ptz_service.ContinuousMove(req)
-                elif self.camera and hasattr(self.camera, 'continuous_move'):
-                    self.camera.continuous_move(pan_speed, tilt_speed)
-
-            if abs(pan_speed) > 0.01 or abs(tilt_speed) > 0.01:
-                print(f"📡 PTZ comando: Pan={pan_speed:.2f}, Tilt={tilt_speed:.2f}")
+                now = time.monotonic()
+                if self._is_redundant_command(pan_speed, tilt_speed, now):
+                    return
+                if self._do_continuous:
+                    self._do_continuous(pan_speed, tilt_speed)
+                self._last_sent_pan = pan_speed
+                self._last_sent_tilt = tilt_speed
+                self._last_sent_ts = now
+
+            self._record_ptz_movement(pan_speed, tilt_speed)
+
+            if (logger.isEnabledFor(logging.DEBUG) and
+                    (abs(pan_speed) > 0.01 or abs(tilt_speed) > 0.01)):
+                logger.debug("📡 PTZ comando: Pan=%.2f, Tilt=%.2f", pan_speed, tilt_speed)
 
         except Exception as e:
-            print(f"❌ Error enviando comando PTZ: {e}")
+            logger.error("❌ Error enviando comando PTZ: %s", e)
 
     def _stop_ptz_movement(self):
         """Detener movimiento PTZ"""
         try:
-            # Enviar comando de parada
-            self._send_ptz_command(0.0, 0.0)
+            # Descartar comandos pendientes y enviar parada inmediata
+            with self._cmd_lock:
+                self._pending_cmd = None
+            self._dispatch_ptz_command(0.0, 0.0)
             self.current_pan_speed = 0.0
             self.current_tilt_speed = 0.0
             if self.multi_config.use_absolute_move:
                 self._query_current_position()
-            print("⏹️ Movimiento PTZ detenido")
+            logger.debug("⏹️ Movimiento PTZ detenido")
         except Exception as e:
-            print(f"❌ Error deteniendo PTZ: {e}")
+            logger.error("❌ Error deteniendo PTZ: %s", e)
 
     def _check_target_switching(self, current_time: float):
         """Verificar si necesita cambiar de objetivo"""
-        # Implementación básica de alternancia
-        if len(self.tracked_objects) > 1:
-            # Cambiar cada 5 segundos si hay múltiples objetos
-            if not hasattr(self, 'last_switch_time'):
-                self.last_switch_time = current_time
-            
-            if (current_time - self.last_switch_time) > self.multi_config.primary_follow_time:
-                self._switch_to_next_target()
-                self.last_switch_time = current_time
+        # Implementación básica de alternancia: nada que alternar con 0 o 1 objetos
+        if len(self.tracked_objects) <= 1:
+            return
+        
+        # Cambiar cada primary_follow_time segundos si hay múltiples objetos
+        # (last_switch_time se inicializa en __init__)
+        if (current_time - self.last_switch_time) > self.multi_config.primary_follow_time:
+            self._switch_to_next_target()
+            self.last_switch_time = current_time
 
     def _switch_to_next_target(self):
         """Cambiar al siguiente objetivo"""
         if len(self.tracked_objects) <= 1:
             return
         
-        obj_ids = list(self.tracked_objects.keys())
+        order = self._target_order
         try:
-            current_index = obj_ids.index(self.current_target_id)
-            next_index = (current_index + 1) % len(obj_ids)
-            next_target = obj_ids[next_index]
+            # El objetivo actual suele estar ya al frente de la rotación
+            if order[0] != self.current_target_id:
+                order.rotate(-order.index(self.current_target_id))
+            order.rotate(-1)
+            next_target = order[0]
             
             old_target = self.current_target_id
             self.current_target_id = next_target
             
-            # Actualizar flags
-            for obj_id, obj in self.tracked_objects.items():
-                obj.is_primary_target = (obj_id == self.current_target_id)
+            # Actualizar flags solo de los objetos afectados
+            self.tracked_objects[old_target].is_primary_target = False
+            self.tracked_objects[next_target].is_primary_target = True
             
-            print(f"🔄 Cambiando objetivo: {old_target} → {self.current_target_id}")
+            logger.debug("🔄 Cambiando objetivo: %s → %s", old_target, self.current_target_id)
             
         except ValueError:
             # Si el objetivo actual no está en la lista, seleccionar nuevo
@@ -823,15 +1032,29 @@ class MultiObjectPTZTracker:
 
     def _cleanup_lost_objects(self, current_time: float):
         """Limpiar objetos perdidos"""
-        lost_objects = []
+        if not self.tracked_objects:
+            return
         
-        for obj_id, tracked_obj in list(self.tracked_objects.items()):
-            if tracked_obj.is_lost(current_time, self.multi_config.object_lifetime):
-                lost_objects.append(obj_id)
+        # Barrido periódico: entre barridos no se recorre el diccionario
+        if current_time - self._last_cleanup_ts < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup_ts = current_time
+        
+        # Umbral temporal equivalente a TrackedObject.is_lost, sin llamada por
+        # objeto; se recorre una copia porque update_detections añade objetos
+        # desde otro hilo
+        lost_before = current_time - self.multi_config.object_lifetime
+        lost_objects = [obj_id for obj_id, tracked_obj in list(self.tracked_objects.items())
+                        if tracked_obj.last_seen < lost_before]
         
         for obj_id in lost_objects:
-            print(f"🗑️ Objeto perdido: {obj_id}")
-            del self.tracked_objects[obj_id]
+            lost_obj = self.tracked_objects.pop(obj_id, None)
+            if lost_obj is None:
+                continue
+            logger.debug("🗑️ Objeto perdido: %s", obj_id)
+            self._release_tracked_object(lost_obj)
+            self._target_order.remove(obj_id)
+            self._mark_dirty()
             
             # Si se perdió el objetivo actual, cambiar
             if obj_id == self.current_target_id:
@@ -843,25 +1066,31 @@ class MultiObjectPTZTracker:
         try:
             self.stop_tracking()
             self.tracked_objects.clear()
-            print("🧹 Tracker PTZ limpiado")
+            self._target_order.clear()
+            logger.info("🧹 Tracker PTZ limpiado")
         except Exception as e:
-            print(f"❌ Error limpiando tracker: {e}")
+            logger.error("❌ Error limpiando tracker: %s", e)
     
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado completo del tracker"""
-        current_time = time.time()
+        current_time = time.time()  # Marca de tiempo de pared para el reporte
+        session_duration = time.monotonic() - self.session_start_time
         
         # Información de objetos rastreados
         objects_info = {}
-        for obj_id, obj in self.tracked_objects.items():
+        for obj_id, obj in list(self.tracked_objects.items()):
             current_pos = obj.get_current_position()
+            if current_pos:
+                position = {
+                    'cx': current_pos.cx,
+                    'cy': current_pos.cy,
+                    'width': current_pos.width,
+                    'height': current_pos.height
+                }
+            else:
+                position = {'cx': None, 'cy': None, 'width': None, 'height': None}
             objects_info[obj_id] = {
-                'position': {
-                    'cx': current_pos.cx if current_pos else None,
-                    'cy': current_pos.cy if current_pos else None,
-                    'width': current_pos.width if current_pos else None,
-                    'height': current_pos.height if current_pos else None
-                },
+                'position': position,
                 'confidence': obj.get_average_confidence(),
                 'priority': obj.priority_score,
                 'is_moving': obj.is_moving,
@@ -894,7 +1123,7 @@ class MultiObjectPTZTracker:
                 'tilt_speed': self.current_tilt_speed
             },
             'statistics': {
-                'session_duration': current_time - self.session_start_time,
+                'session_duration': session_duration,
                 'total_detections': self.total_detections_processed,
                 'successful_tracks': self.successful_tracks,
                 'failed_tracks': self.failed_tracks,
@@ -913,26 +1142,28 @@ class MultiObjectPTZTracker:
     
     def get_tracking_statistics(self) -> Dict[str, Any]:
         """Obtener estadísticas detalladas de seguimiento"""
-        current_time = time.time()
+        session_duration = time.monotonic() - self.session_start_time
         
         # Calcular estadísticas de movimiento PTZ
         ptz_stats = {
-            'total_movements': len(self.ptz_movement_history),
+            'total_movements': self._ptz_hist_count,
             'average_pan_speed': 0.0,
             'average_tilt_speed': 0.0,
             'max_pan_speed': 0.0,
             'max_tilt_speed': 0.0
         }
         
-        if self.ptz_movement_history:
-            pan_speeds = [move.get('pan_speed', 0) for move in self.ptz_movement_history]
-            tilt_speeds = [move.get('tilt_speed', 0) for move in self.ptz_movement_history]
+        n_moves = min(self._ptz_hist_count, HISTORY_CAPACITY)
+        if n_moves:
+            view = self._ptz_hist[:n_moves]
+            mean_pan, mean_tilt = view.mean(axis=0)
+            max_pan, max_tilt = np.abs(view).max(axis=0)
             
             ptz_stats.update({
-                'average_pan_speed': sum(pan_speeds) / len(pan_speeds),
-                'average_tilt_speed': sum(tilt_speeds) / len(tilt_speeds),
-                'max_pan_speed': max(abs(s) for s in pan_speeds) if pan_speeds else 0,
-                'max_tilt_speed': max(abs(s) for s in tilt_speeds) if tilt_speeds else 0
+                'average_pan_speed': float(mean_pan),
+                'average_tilt_speed': float(mean_tilt),
+                'max_pan_speed': float(max_pan),
+                'max_tilt_speed': float(max_tilt)
             })
         
         # Calcular estadísticas de zoom
@@ -943,37 +1174,39 @@ class MultiObjectPTZTracker:
             'max_used': self.multi_config.max_zoom_level
         }
         
-        if self.zoom_history:
-            zoom_levels = [change.get('new_zoom', 0.5) for change in self.zoom_history]
+        n_zoom = min(self._zoom_hist_count, HISTORY_CAPACITY)
+        if n_zoom:
+            zoom_levels = self._zoom_hist[:n_zoom]
             zoom_stats.update({
-                'min_used': min(zoom_levels),
-                'max_used': max(zoom_levels),
-                'average_level': sum(zoom_levels) / len(zoom_levels)
+                'min_used': float(zoom_levels.min()),
+                'max_used': float(zoom_levels.max()),
+                'average_level': float(zoom_levels.mean())
             })
         
-        # Estadísticas de objetos
+        # Estadísticas de objetos (una sola pasada)
+        objects = list(self.tracked_objects.values())
+        n_objects = len(objects)
+        sum_confidence = 0.0
+        sum_size = 0.0
+        moving_count = 0
+        for obj in objects:
+            sum_confidence += obj.get_average_confidence()
+            sum_size += obj.get_object_size_ratio()
+            moving_count += obj.is_moving
+        
         object_stats = {
-            'total_tracked': len(self.tracked_objects),
-            'with_movement': sum(1 for obj in self.tracked_objects.values() if obj.is_moving),
-            'average_confidence': 0.0,
-            'average_size': 0.0
+            'total_tracked': n_objects,
+            'with_movement': moving_count,
+            'average_confidence': sum_confidence / n_objects if n_objects else 0.0,
+            'average_size': sum_size / n_objects if n_objects else 0.0
         }
         
-        if self.tracked_objects:
-            confidences = [obj.get_average_confidence() for obj in self.tracked_objects.values()]
-            sizes = [obj.get_object_size_ratio() for obj in self.tracked_objects.values()]
-            
-            object_stats.update({
-                'average_confidence': sum(confidences) / len(confidences),
-                'average_size': sum(sizes) / len(sizes)
-            })
-        
         return {
-            'session_duration': current_time - self.session_start_time,
+            'session_duration': session_duration,
             'performance': {
-                'detections_per_second': self.total_detections_processed / max(current_time - self.session_start_time, 1),
+                'detections_per_second': self.total_detections_processed / max(session_duration, 1),
                 'success_rate': self.successful_tracks / max(self.successful_tracks + self.failed_tracks, 1),
-                'switches_per_minute': self.switch_count / max((current_time - self.session_start_time) / 60, 1)
+                'switches_per_minute': self.switch_count / max(session_duration / 60, 1)
             },
             'ptz_movement': ptz_stats,
             'zoom_control': zoom_stats,
@@ -982,99 +1215,78 @@ class MultiObjectPTZTracker:
 
 # ===== FUNCIONES DE UTILIDAD =====
 
-def create_multi_object_tracker(ip: str, port: int, username: str, password: str,
-                               config_name: str = "maritime_standard") -> MultiObjectPTZTracker:
-    """Crear tracker multi-objeto con configuración predefinida.
+# Configuraciones predefinidas (instanciadas una sola vez al importar).
+# Cada entrada puede incluir ``use_absolute_move`` para determinar si el
+# tracker utilizará movimientos absolutos en lugar de continuos.
+_PRESETS: Dict[str, MultiObjectConfig] = {
+    'maritime_standard': MultiObjectConfig(
+        alternating_enabled=True,
+        primary_follow_time=5.0,
+        secondary_follow_time=3.0,
+        auto_zoom_enabled=True,
+        target_object_ratio=0.25,
+        confidence_weight=0.4,
+        movement_weight=0.3,
+        size_weight=0.2,
+        proximity_weight=0.1,
+    ),
 
-    Cada entrada del diccionario de presets puede incluir el parámetro
-    ``use_absolute_move`` para determinar si el tracker utilizará movimientos
-    absolutos en lugar de continuos.
-    """
+    'maritime_fast': MultiObjectConfig(
+        alternating_enabled=True,
+        primary_follow_time=3.0,
+        secondary_follow_time=2.0,
+        auto_zoom_enabled=True,
+        target_object_ratio=0.3,
+        confidence_weight=0.3,
+        movement_weight=0.5,
+        size_weight=0.1,
+        proximity_weight=0.1,
+        max_objects_to_track=4,
+        zoom_speed=0.5,
+    ),
 
-    # Configuraciones predefinidas
-    presets = {
-        'maritime_standard': {
-            'alternating_enabled': True,
-            'primary_follow_time': 5.0,
-            'secondary_follow_time': 3.0,
-            'auto_zoom_enabled': True,
-            'target_object_ratio': 0.25,
-            'confidence_weight': 0.4,
-            'movement_weight': 0.3,
-            'size_weight': 0.2,
-            'proximity_weight': 0.1,
-        },
-
-        'maritime_fast': {
-            'alternating_enabled': True,
-            'primary_follow_time': 3.0,
-            'secondary_follow_time': 2.0,
-            'auto_zoom_enabled': True,
-            'target_object_ratio': 0.3,
-            'confidence_weight': 0.3,
-            'movement_weight': 0.5,
-            'size_weight': 0.1,
-            'proximity_weight': 0.1,
-            'max_objects_to_track': 4,
-            'zoom_speed': 0.5,
-        },
+    'surveillance_precise': MultiObjectConfig(
+        alternating_enabled=True,
+        primary_follow_time=8.0,
+        secondary_follow_time=4.0,
+        auto_zoom_enabled=True,
+        target_object_ratio=0.4,
+        confidence_weight=0.6,
+        movement_weight=0.2,
+        size_weight=0.1,
+        proximity_weight=0.1,
+        min_confidence_threshold=0.7,
+        max_objects_to_track=2,
+        zoom_speed=0.2,
+        use_absolute_move=True,
+    ),
 
-        'surveillance_precise': {
-            'alternating_enabled': True,
-            'primary_follow_time': 8.0,
-            'secondary_follow_time': 4.0,
-            'auto_zoom_enabled': True,
-            'target_object_ratio': 0.4,
-            'confidence_weight': 0.6,
-            'movement_weight': 0.2,
-            'size_weight': 0.1,
-            'proximity_weight': 0.1,
-            'min_confidence_threshold': 0.7,
-            'max_objects_to_track': 2,
-            'zoom_speed': 0.2,
-            'use_absolute_move': True,
-        },
+    'single_object': MultiObjectConfig(
+        alternating_enabled=False,
+        auto_zoom_enabled=True,
+        target_object_ratio=0.35,
+        confidence_weight=0.5,
+        movement_weight=0.3,
+        size_weight=0.2,
+        max_objects_to_track=1,
+        use_absolute_move=True,
+    ),
+}
 
-        'single_object': {
-            'alternating_enabled': False,
-            'auto_zoom_enabled': True,
-            'target_object_ratio': 0.35,
-            'confidence_weight': 0.5,
-            'movement_weight': 0.3,
-            'size_weight': 0.2,
-            'max_objects_to_track': 1,
-            'use_absolute_move': True,
-        }
-    }
+def create_multi_object_tracker(ip: str, port: int, username: str, password: str,
+                               config_name: str = "maritime_standard") -> MultiObjectPTZTracker:
+    """Crear tracker multi-objeto con configuración predefinida.
 
-    cfg_dict = presets.get(config_name, presets['maritime_standard'])
-    config = MultiObjectConfig(**cfg_dict)
-    return MultiObjectPTZTracker(ip, port, username, password, multi_config=config)
+    Las configuraciones provienen de ``_PRESETS``; se entrega una copia para
+    que el tracker no modifique la plantilla compartida.
+    """
+    config = _PRESETS.get(config_name, _PRESETS['maritime_standard'])
+    return MultiObjectPTZTracker(ip, port, username, password, multi_config=copy.copy(config))
 
 def get_preset_config(config_name: str) -> Optional[MultiObjectConfig]:
     """Obtener configuración predefinida"""
-    configs = {
-        'maritime_standard': MultiObjectConfig(),
-        'maritime_fast': MultiObjectConfig(
-            primary_follow_time=3.0,
-            secondary_follow_time=2.0,
-            movement_weight=0.5,
-            zoom_speed=0.5
-        ),
-        'surveillance_precise': MultiObjectConfig(
-            primary_follow_time=8.0,
-            secondary_follow_time=4.0,
-            confidence_weight=0.6,
-            min_confidence_threshold=0.7,
-            max_objects_to_track=2
-        ),
-        'single_object': MultiObjectConfig(
-            alternating_enabled=False,
-            max_objects_to_track=1
-        )
-    }
-    
-    return configs.get(config_name)
+    config = _PRESETS.get(config_name)
+    return copy.copy(config) if config is not None else None
 
 # Constante para compatibilidad
 PRESET_CONFIGS = ['maritime_standard', 'maritime_fast', 'surveillance_precise', 'single_object']
@@ -1133,16 +1345,21 @@ def _generate_recommendations(stats: Dict, score: float) -> List[str]:
     """Generar recomendaciones para mejorar el rendimiento"""
     recommendations = []
     
-    if stats['performance']['success_rate'] < 0.8:
+    perf = stats['performance']
+    zoom = stats['zoom_control']
+    objs = stats['objects']
+    minutes = max(stats['session_duration'] / 60, 1)
+    
+    if perf['success_rate'] < 0.8:
         recommendations.append("Considere ajustar los umbrales de confianza o mejorar la iluminación")
     
-    if stats['performance']['detections_per_second'] < 5:
+    if perf['detections_per_second'] < 5:
         recommendations.append("Optimice el procesamiento de detecciones o reduzca la resolución")
     
-    if stats['zoom_control']['total_changes'] / max(stats['session_duration'] / 60, 1) > 3:
+    if zoom['total_changes'] / minutes > 3:
         recommendations.append("Reduzca la velocidad de zoom o aumente los umbrales de cambio")
     
-    if stats['objects']['average_confidence'] < 0.6:
+    if objs['average_confidence'] < 0.6:
         recommendations.append("Mejore las condiciones de detección o ajuste el modelo")
     
     if len(recommendations) == 0:
@@ -1169,7 +1386,7 @@ def test_multi_object_tracker():
     # Test de TrackedObject
     obj = TrackedObject(id=1)
     obj.add_position(pos)
-    assert len(obj.positions) == 1, "Error agregando posición"
+    assert obj.history_length == 1, "Error agregando posición"
     print("✅ TrackedObject funcionando")
     
     # Test de MultiObjectPTZTracker
@@ -1,12 +1,51 @@
+import logging
+import queue
+import threading
+
 from flask import Flask, request
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
+# Las alarmas se procesan fuera del hilo de la petición
+_alarm_q = queue.Queue(maxsize=10_000)
+
+
+def _consume_alarms():
+    while True:
+        data = _alarm_q.get()
+        logger.debug("📥 Evento recibido: %s", data)
+
+
+threading.Thread(target=_consume_alarms, name="alarm-consumer", daemon=True).start()
+
+
 @app.route('/alarms', methods=['POST'])
 def receive_alarm():
-    data = request.get_json()
-    print("📥 Evento recibido:", data)
+    if orjson is not None:
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return '', 400
+    else:
+        data = request.get_json()
+    try:
+        _alarm_q.put_nowait(data)
+    except queue.Full:
+        logger.warning("⚠️ Cola de alarmas llena, evento descartado")
     return '', 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    try:
+        from waitress import serve
+    except ImportError:
+        # Servidor de desarrollo de Flask si waitress no está instalado
+        app.run(host='0.0.0.0', port=5000)
+    else:
+        serve(app, host='0.0.0.0', port=5000, threads=8)
@@ -4,22 +4,89 @@ Sistema de calibración PTZ para corregir problemas de seguimiento
 Permite calibrar el centro de imagen y direcciones de movimiento
 """
 
+from __future__ import annotations
+
 import time
 import json
 import os
+import atexit
+import functools
+import tempfile
+import threading
 import numpy as np
-from typing import Dict, Tuple, Optional, List
-from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, ClassVar, Dict, List, Tuple, Optional
+from dataclasses import dataclass, replace
 from datetime import datetime
 
+from core._ptz_kernels import calibrated_move
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
-    from core.ptz_control import PTZCameraONVIF
+    from core.ptz_control import PTZCameraONVIF, evict_ptz_camera, get_ptz_camera
     PTZ_AVAILABLE = True
 except ImportError:
     PTZ_AVAILABLE = False
     print("⚠️ Sistema PTZ no disponible para calibración")
 
-@dataclass
+# Ventana de agrupación de guardados pendientes (segundos)
+SAVE_COALESCE_DELAY = 0.2
+
+# Pasos de la prueba de direcciones: (clave, mensaje, pan, tilt, resultado)
+DIRECTION_TEST_STEPS = (
+    ("pan_right", "→ Probando movimiento PAN derecha", 1, 0, "Movió hacia la derecha"),
+    ("pan_left", "← Probando movimiento PAN izquierda", -1, 0, "Movió hacia la izquierda"),
+    ("tilt_up", "↑ Probando movimiento TILT arriba", 0, 1, "Movió hacia arriba"),
+    ("tilt_down", "↓ Probando movimiento TILT abajo", 0, -1, "Movió hacia abajo"),
+)
+
+# Ejecutor para pruebas de movimiento fuera del hilo llamador
+_test_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptz-direction-test")
+
+def normalize_ip(camera_ip: str) -> str:
+    """IP normalizada usada como clave de calibración y para el nombre de archivo"""
+    return camera_ip.strip()
+
+@functools.lru_cache(maxsize=None)
+def calibration_filename(camera_ip: str) -> str:
+    """Nombre de archivo por defecto de la calibración de una cámara"""
+    return f"calibration_{normalize_ip(camera_ip).replace('.', '_')}.json"
+
+def _dump_json(obj, path: str):
+    """Serializar un dataclass a JSON de forma atómica
+    
+    Se escribe en un temporal del mismo directorio y se sustituye con
+    os.replace: un lector nunca ve el archivo truncado o a medio escribir.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(obj.to_dict(), indent=4).encode()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".calibration_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _load_json(path: str) -> dict:
+    """Leer un archivo JSON completo"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+@dataclass(slots=True)
 class CalibrationData:
     """Datos de calibración para una cámara PTZ"""
     camera_ip: str
@@ -33,14 +100,33 @@ class CalibrationData:
     deadzone_y: float = 0.03
     calibration_date: str = ""
     
+    # Calibraciones cargadas por archivo: filename -> (mtime, instancia).
+    # La instancia cacheada es privada: se entregan siempre copias
+    _cache: ClassVar[Dict[str, Tuple[float, CalibrationData]]] = {}
+    
+    def to_dict(self) -> dict:
+        """Campos de la calibración como diccionario plano (sin copia profunda)"""
+        return {
+            'camera_ip': self.camera_ip,
+            'center_offset_x': self.center_offset_x,
+            'center_offset_y': self.center_offset_y,
+            'pan_direction': self.pan_direction,
+            'tilt_direction': self.tilt_direction,
+            'pan_sensitivity': self.pan_sensitivity,
+            'tilt_sensitivity': self.tilt_sensitivity,
+            'deadzone_x': self.deadzone_x,
+            'deadzone_y': self.deadzone_y,
+            'calibration_date': self.calibration_date,
+        }
+    
     def save_to_file(self, filename: str = None):
         """Guardar calibración a archivo"""
         if not filename:
-            filename = f"calibration_{self.camera_ip.replace('.', '_')}.json"
+            filename = calibration_filename(self.camera_ip)
         
         try:
-            with open(filename, 'w') as f:
-                json.dump(asdict(self), f, indent=4)
+            _dump_json(self, filename)
+            CalibrationData._cache[filename] = (os.stat(filename).st_mtime, replace(self))
             return True
         except Exception as e:
             print(f"❌ Error guardando calibración: {e}")
@@ -48,20 +134,102 @@ class CalibrationData:
     
     @classmethod
     def load_from_file(cls, camera_ip: str, filename: str = None):
-        """Cargar calibración desde archivo"""
+        """Cargar calibración desde archivo (cada llamada devuelve una instancia propia)"""
         if not filename:
-            filename = f"calibration_{camera_ip.replace('.', '_')}.json"
+            filename = calibration_filename(camera_ip)
         
-        if not os.path.exists(filename):
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError:
             return cls(camera_ip=camera_ip)
         
+        # Reutilizar la instancia si el archivo no cambió desde la última lectura
+        cached = cls._cache.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return replace(cached[1])
+        
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            return cls(**data)
+            calibration = cls(**_load_json(filename))
+            cls._cache[filename] = (mtime, replace(calibration))
+            return calibration
         except Exception as e:
             print(f"⚠️ Error cargando calibración: {e}")
             return cls(camera_ip=camera_ip)
+    
+    def mark_dirty(self) -> Future:
+        """Programar un guardado diferido en el hilo de escritura
+        
+        Returns:
+            Future que se resuelve con True cuando la calibración está en
+            disco (o no había cambios) y con False si la escritura falló
+        """
+        return _schedule_save(self)
+
+# Guardado diferido: un único hilo escritor agrupa los cambios por cámara.
+# Lo pendiente vive en _pending (último estado por cámara y los Future de
+# quienes lo pidieron) hasta que se escribe, siempre bajo _save_lock:
+# flush() ve también lo que el hilo escritor aún está agrupando y espera a
+# una escritura en curso
+_pending: Dict[str, Tuple[CalibrationData, List[Future]]] = {}
+_pending_lock = threading.Lock()
+_pending_event = threading.Event()
+_save_lock = threading.Lock()
+_saved_hashes: Dict[str, int] = {}
+_save_thread: Optional[threading.Thread] = None
+
+def _take_pending() -> Dict[str, Tuple[CalibrationData, List[Future]]]:
+    """Retirar las calibraciones pendientes (llamar con _save_lock)"""
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _pending_event.clear()
+    return pending
+
+def _write_pending(pending: Dict[str, Tuple[CalibrationData, List[Future]]]) -> bool:
+    """Escribir las calibraciones pendientes cuyo contenido cambió (llamar con _save_lock)"""
+    ok = True
+    for ip, (calibration, futures) in pending.items():
+        digest = hash(tuple(calibration.to_dict().values()))
+        saved = _saved_hashes.get(ip) == digest or calibration.save_to_file()
+        if saved:
+            _saved_hashes[ip] = digest
+        else:
+            ok = False
+        for future in futures:
+            future.set_result(saved)
+    return ok
+
+def _save_worker():
+    while True:
+        _pending_event.wait()
+        time.sleep(SAVE_COALESCE_DELAY)
+        with _save_lock:
+            _write_pending(_take_pending())
+
+def _schedule_save(calibration: CalibrationData) -> Future:
+    global _save_thread
+    future = Future()
+    with _pending_lock:
+        entry = _pending.get(calibration.camera_ip)
+        futures = entry[1] if entry else []
+        futures.append(future)
+        _pending[calibration.camera_ip] = (calibration, futures)
+        _pending_event.set()
+        if _save_thread is None:
+            _save_thread = threading.Thread(target=_save_worker, name="calibration-writer", daemon=True)
+            _save_thread.start()
+    return future
+
+def flush() -> bool:
+    """Escribir de inmediato todas las calibraciones pendientes
+    
+    Incluye las que el hilo escritor tiene en espera y, si está escribiendo,
+    espera a que termine. Devuelve False si alguna escritura falló.
+    """
+    with _save_lock:
+        return _write_pending(_take_pending())
+
+atexit.register(flush)
 
 class PTZCalibrationSystem:
     """Sistema de calibración PTZ para corregir seguimiento"""
@@ -69,8 +237,58 @@ class PTZCalibrationSystem:
     def __init__(self):
         self.calibrations: Dict[str, CalibrationData] = {}
         self.current_camera: Optional[PTZCameraONVIF] = None
-        self.current_calibration: Optional[CalibrationData] = None
-        self.calibration_points: List[Tuple[float, float]] = []
+        # Versión de la calibración activa; cambia con cada modificación
+        self._calib_version = 0
+        self._current_calibration: Optional[CalibrationData] = None
+        # Puntos de calibración normalizados (x, y); crece al llenarse
+        self._points_buf = np.empty((256, 2), dtype=np.float32)
+        self._n_points = 0
+        # Constantes derivadas de la calibración activa para un tamaño de frame
+        self._derived_calib: Optional[CalibrationData] = None
+        self._derived_frame: Optional[Tuple[int, int]] = None
+        self._kx = self._ky = 0.0
+        self._cx = self._cy = 0.0
+        self._dzx_px = self._dzy_px = 0.0
+    
+    @property
+    def current_calibration(self) -> Optional[CalibrationData]:
+        return self._current_calibration
+    
+    @current_calibration.setter
+    def current_calibration(self, calibration: Optional[CalibrationData]):
+        self._current_calibration = calibration
+        self.invalidate_derived()
+    
+    @property
+    def calibration_version(self) -> int:
+        """Contador que cambia cada vez que se modifica la calibración activa"""
+        return self._calib_version
+    
+    @property
+    def calibration_points(self) -> np.ndarray:
+        """Vista (N, 2) de los puntos de calibración agregados"""
+        return self._points_buf[:self._n_points]
+    
+    def clear_calibration_points(self):
+        """Descartar los puntos de calibración acumulados"""
+        self._n_points = 0
+    
+    def invalidate_derived(self):
+        """Forzar recálculo de constantes tras modificar la calibración"""
+        self._derived_calib = None
+        self._calib_version += 1
+    
+    def _refresh_derived(self, frame_w: int, frame_h: int):
+        """Precalcular ganancias, centro corregido y zona muerta en píxeles"""
+        calib = self._current_calibration
+        self._kx = calib.pan_sensitivity * calib.pan_direction
+        self._ky = -calib.tilt_sensitivity * calib.tilt_direction
+        self._cx = frame_w * (0.5 + calib.center_offset_x)
+        self._cy = frame_h * (0.5 + calib.center_offset_y)
+        self._dzx_px = frame_w * calib.deadzone_x
+        self._dzy_px = frame_h * calib.deadzone_y
+        self._derived_calib = calib
+        self._derived_frame = (frame_w, frame_h)
         
     def start_calibration(self, ip: str, port: int, username: str, password: str) -> bool:
         """Iniciar proceso de calibración para una cámara"""
@@ -82,11 +300,14 @@ class PTZCalibrationSystem:
             print(f"🔧 Iniciando calibración para cámara {ip}")
             
             # Conectar a la cámara
-            self.current_camera = PTZCameraONVIF(ip, port, username, password)
+            self.current_camera = get_ptz_camera(ip, port, username, password)
+            
+            # Escribir cambios pendientes antes de leer del disco
+            flush()
             
             # Cargar calibración existente o crear nueva
             self.current_calibration = CalibrationData.load_from_file(ip)
-            self.calibrations[ip] = self.current_calibration
+            self.calibrations[normalize_ip(ip)] = self.current_calibration
             
             print("✅ Calibración iniciada correctamente")
             return True
@@ -95,51 +316,34 @@ class PTZCalibrationSystem:
             print(f"❌ Error iniciando calibración: {e}")
             return False
     
-    def test_movement_directions(self) -> Dict[str, str]:
-        """Probar direcciones de movimiento para detectar inversiones"""
+    def test_movement_directions(self, on_result: Optional[Callable[[str, str], None]] = None
+                                 ) -> Dict[str, str]:
+        """Probar direcciones de movimiento para detectar inversiones
+        
+        on_result(clave, resultado) se invoca al terminar cada dirección.
+        """
         if not self.current_camera:
             return {"error": "No hay cámara conectada"}
         
         results = {}
         test_speed = 0.3
         test_duration = 1.0
+        settle_time = 0.5
         
         try:
             print("🧪 Probando direcciones de movimiento...")
             
-            # Probar PAN derecha
-            print("→ Probando movimiento PAN derecha")
-            self.current_camera.continuous_move(test_speed, 0, 0)
-            time.sleep(test_duration)
-            self.current_camera.stop()
-            results["pan_right"] = "Movió hacia la derecha" 
-            
-            time.sleep(0.5)
-            
-            # Probar PAN izquierda
-            print("← Probando movimiento PAN izquierda")
-            self.current_camera.continuous_move(-test_speed, 0, 0)
-            time.sleep(test_duration)
-            self.current_camera.stop()
-            results["pan_left"] = "Movió hacia la izquierda"
-            
-            time.sleep(0.5)
-            
-            # Probar TILT arriba
-            print("↑ Probando movimiento TILT arriba")
-            self.current_camera.continuous_move(0, test_speed, 0)
-            time.sleep(test_duration)
-            self.current_camera.stop()
-            results["tilt_up"] = "Movió hacia arriba"
-            
-            time.sleep(0.5)
-            
-            # Probar TILT abajo
-            print("↓ Probando movimiento TILT abajo")
-            self.current_camera.continuous_move(0, -test_speed, 0)
-            time.sleep(test_duration)
-            self.current_camera.stop()
-            results["tilt_down"] = "Movió hacia abajo"
+            for i, (key, message, pan, tilt, result) in enumerate(DIRECTION_TEST_STEPS):
+                if i:
+                    # Dejar que la cámara se estabilice entre pruebas
+                    time.sleep(settle_time)
+                print(message)
+                self.current_camera.continuous_move(pan * test_speed, tilt * test_speed, 0)
+                time.sleep(test_duration)
+                self.current_camera.stop()
+                results[key] = result
+                if on_result is not None:
+                    on_result(key, result)
             
             print("✅ Prueba de direcciones completada")
             return results
@@ -148,11 +352,21 @@ class PTZCalibrationSystem:
             print(f"❌ Error probando direcciones: {e}")
             return {"error": str(e)}
     
+    def test_movement_directions_async(self, on_result: Optional[Callable[[str, str], None]] = None
+                                       ) -> Future:
+        """Lanzar la prueba de direcciones sin bloquear; devuelve un Future con los resultados"""
+        return _test_executor.submit(self.test_movement_directions, on_result)
+    
     def calibrate_center_point(self, detected_box_center: Tuple[float, float], 
-                             frame_size: Tuple[int, int]) -> bool:
-        """Calibrar punto central basado en detección"""
+                             frame_size: Tuple[int, int]) -> Optional[Future]:
+        """Calibrar punto central basado en detección
+        
+        Returns:
+            Future del guardado (ver CalibrationData.mark_dirty), o None si
+            no hay calibración activa
+        """
         if not self.current_calibration:
-            return False
+            return None
         
         frame_w, frame_h = frame_size
         detected_x, detected_y = detected_box_center
@@ -171,9 +385,10 @@ class PTZCalibrationSystem:
         self.current_calibration.calibration_date = datetime.now().isoformat()
         
         print(f"🎯 Centro calibrado - Offset: X={offset_x:.4f}, Y={offset_y:.4f}")
+        self.invalidate_derived()
         
         # Guardar calibración
-        return self.current_calibration.save_to_file()
+        return self._save_current()
     
     def add_calibration_point(self, box_center: Tuple[float, float], 
                             frame_size: Tuple[int, int]):
@@ -185,21 +400,28 @@ class PTZCalibrationSystem:
         norm_x = center_x / frame_w
         norm_y = center_y / frame_h
         
-        self.calibration_points.append((norm_x, norm_y))
-        print(f"📍 Punto agregado: ({norm_x:.3f}, {norm_y:.3f}) - Total: {len(self.calibration_points)}")
+        if self._n_points == len(self._points_buf):
+            self._points_buf = np.resize(self._points_buf, (2 * len(self._points_buf), 2))
+        self._points_buf[self._n_points] = (norm_x, norm_y)
+        self._n_points += 1
+        print(f"📍 Punto agregado: ({norm_x:.3f}, {norm_y:.3f}) - Total: {self._n_points}")
     
-    def finalize_calibration(self, frame_size: Tuple[int, int]) -> bool:
-        """Finalizar calibración usando promedio de puntos"""
-        if not self.calibration_points or not self.current_calibration:
-            return False
+    def finalize_calibration(self, frame_size: Tuple[int, int]) -> Optional[Future]:
+        """Finalizar calibración usando promedio de puntos
+        
+        Returns:
+            Future del guardado, o None sin puntos o sin calibración activa
+        """
+        n_points = self._n_points
+        if not n_points or not self.current_calibration:
+            return None
         
         # Calcular centro promedio
-        avg_x = sum(p[0] for p in self.calibration_points) / len(self.calibration_points)
-        avg_y = sum(p[1] for p in self.calibration_points) / len(self.calibration_points)
+        avg_x, avg_y = self._points_buf[:n_points].mean(axis=0)
         
         # Centro teórico (0.5, 0.5)
-        offset_x = avg_x - 0.5
-        offset_y = avg_y - 0.5
+        offset_x = float(avg_x) - 0.5
+        offset_y = float(avg_y) - 0.5
         
         # Actualizar calibración
         self.current_calibration.center_offset_x = offset_x
@@ -207,21 +429,22 @@ class PTZCalibrationSystem:
         self.current_calibration.calibration_date = datetime.now().isoformat()
         
         print(f"🎯 Calibración finalizada:")
-        print(f"   Promedio de {len(self.calibration_points)} puntos")
+        print(f"   Promedio de {n_points} puntos")
         print(f"   Centro corregido: X={0.5 + offset_x:.3f}, Y={0.5 + offset_y:.3f}")
         print(f"   Offset: X={offset_x:.4f}, Y={offset_y:.4f}")
         
         # Limpiar puntos
-        self.calibration_points.clear()
+        self.clear_calibration_points()
+        self.invalidate_derived()
         
         # Guardar calibración
-        return self.current_calibration.save_to_file()
+        return self._save_current()
     
     def set_direction_inversion(self, pan_inverted: bool = False, 
-                              tilt_inverted: bool = False):
-        """Configurar inversión de direcciones"""
+                              tilt_inverted: bool = False) -> Optional[Future]:
+        """Configurar inversión de direcciones (Future del guardado, o None sin calibración)"""
         if not self.current_calibration:
-            return False
+            return None
         
         self.current_calibration.pan_direction = -1 if pan_inverted else 1
         self.current_calibration.tilt_direction = -1 if tilt_inverted else 1
@@ -229,14 +452,15 @@ class PTZCalibrationSystem:
         print(f"🔄 Direcciones configuradas:")
         print(f"   PAN: {'Invertido' if pan_inverted else 'Normal'}")
         print(f"   TILT: {'Invertido' if tilt_inverted else 'Normal'}")
+        self.invalidate_derived()
         
-        return self.current_calibration.save_to_file()
+        return self._save_current()
     
     def adjust_sensitivity(self, pan_sensitivity: float = None, 
-                         tilt_sensitivity: float = None):
-        """Ajustar sensibilidad de movimiento"""
+                         tilt_sensitivity: float = None) -> Optional[Future]:
+        """Ajustar sensibilidad de movimiento (Future del guardado, o None sin calibración)"""
         if not self.current_calibration:
-            return False
+            return None
         
         if pan_sensitivity is not None:
             self.current_calibration.pan_sensitivity = pan_sensitivity
@@ -247,44 +471,80 @@ class PTZCalibrationSystem:
         print(f"🎛️ Sensibilidad ajustada:")
         print(f"   PAN: {self.current_calibration.pan_sensitivity}")
         print(f"   TILT: {self.current_calibration.tilt_sensitivity}")
+        self.invalidate_derived()
         
-        return self.current_calibration.save_to_file()
+        return self._save_current()
+    
+    def _save_current(self) -> Future:
+        """Programar el guardado de la calibración activa sin bloquear al llamador
+        
+        La escritura la hace el hilo escritor; flush() la fuerza al iniciar
+        otra calibración, al cerrar el diálogo y al salir del proceso.
+        """
+        return self.current_calibration.mark_dirty()
     
     def get_calibrated_movement(self, object_center: Tuple[float, float], 
                               frame_size: Tuple[int, int]) -> Tuple[float, float]:
         """Calcular movimiento calibrado para centrar objeto"""
-        if not self.current_calibration:
+        calib = self._current_calibration
+        if not calib:
             return (0.0, 0.0)
         
-        frame_w, frame_h = frame_size
-        obj_x, obj_y = object_center
-        
-        # Centro corregido del frame
-        corrected_center_x = frame_w * (0.5 + self.current_calibration.center_offset_x)
-        corrected_center_y = frame_h * (0.5 + self.current_calibration.center_offset_y)
-        
-        # Calcular diferencia
-        dx = obj_x - corrected_center_x
-        dy = obj_y - corrected_center_y
-        
-        # Aplicar deadzone
-        if abs(dx) < frame_w * self.current_calibration.deadzone_x:
-            dx = 0
-        if abs(dy) < frame_h * self.current_calibration.deadzone_y:
-            dy = 0
+        # Recalcular constantes sólo si cambió la calibración o el frame
+        if calib is not self._derived_calib or frame_size != self._derived_frame:
+            self._refresh_derived(*frame_size)
         
-        # Calcular velocidades con direcciones y sensibilidad calibradas
-        pan_speed = float(np.clip(
-            dx * self.current_calibration.pan_sensitivity * self.current_calibration.pan_direction,
-            -0.5, 0.5
-        ))
-        
-        tilt_speed = float(np.clip(
-            -dy * self.current_calibration.tilt_sensitivity * self.current_calibration.tilt_direction,
-            -0.5, 0.5
-        ))
-        
-        return (pan_speed, tilt_speed)
+        # Deadzone y velocidades calibradas (ver core._ptz_kernels)
+        obj_x, obj_y = object_center
+        pan_speed, tilt_speed = calibrated_move(
+            float(obj_x), float(obj_y), self._cx, self._cy,
+            self._dzx_px, self._dzy_px, self._kx, self._ky
+        )
+        return (float(pan_speed), float(tilt_speed))
+    
+    def get_calibrated_movement_batch(self, object_centers: np.ndarray,
+                                      frame_size: Tuple[int, int]) -> np.ndarray:
+        """Movimiento calibrado para N centros (N, 2); devuelve velocidades (N, 2) float32"""
+        calib = self._current_calibration
+        centers = np.asarray(object_centers, dtype=np.float32).reshape(-1, 2)
+        if not calib:
+            return np.zeros_like(centers)
+        
+        if calib is not self._derived_calib or frame_size != self._derived_frame:
+            self._refresh_derived(*frame_size)
+        
+        d = centers - np.array([self._cx, self._cy], dtype=np.float32)
+        d *= np.abs(d) >= np.array([self._dzx_px, self._dzy_px], dtype=np.float32)
+        d *= np.array([self._kx, self._ky], dtype=np.float32)
+        np.clip(d, -0.5, 0.5, out=d)
+        return d
+    
+    def make_tracker(self, frame_size: Tuple[int, int]) -> Callable[[Tuple[float, float]], Tuple[float, float]]:
+        """Crear una función de movimiento especializada para la calibración y frame actuales
+        
+        Las constantes quedan capturadas en el cierre; el atributo ``version``
+        permite al llamador recrearla cuando cambie ``calibration_version``.
+        """
+        calib = self._current_calibration
+        if not calib:
+            def tracker(object_center):
+                return (0.0, 0.0)
+        else:
+            self._refresh_derived(*frame_size)
+            cx, cy = self._cx, self._cy
+            dzx, dzy = self._dzx_px, self._dzy_px
+            kx, ky = self._kx, self._ky
+            
+            def tracker(object_center):
+                dx = object_center[0] - cx
+                dy = object_center[1] - cy
+                dx *= abs(dx) >= dzx
+                dy *= abs(dy) >= dzy
+                return (float(min(0.5, max(-0.5, dx * kx))),
+                        float(min(0.5, max(-0.5, dy * ky))))
+        
+        tracker.version = self._calib_version
+        return tracker
 
 def create_calibration_system() -> PTZCalibrationSystem:
     """Crear nueva instancia del sistema de calibración"""
@@ -299,6 +559,7 @@ def track_object_calibrated(ip: str, port: int, username: str, password: str,
                           object_center: Tuple[float, float], 
                           frame_size: Tuple[int, int]) -> bool:
     """Seguimiento de objeto usando calibración"""
+    cam = None
     try:
         # Cargar calibración
         calibration = get_calibration_for_camera(ip)
@@ -307,7 +568,7 @@ def track_object_calibrated(ip: str, port: int, username: str, password: str,
             calibration = CalibrationData(camera_ip=ip)
         
         # Conectar cámara
-        cam = PTZCameraONVIF(ip, port, username, password)
+        cam = get_ptz_camera(ip, port, username, password)
         
         # Crear sistema de calibración temporal
         calib_system = PTZCalibrationSystem()
@@ -325,15 +586,15 @@ def track_object_calibrated(ip: str, port: int, username: str, password: str,
         
         print(f"🎯 Movimiento calibrado: PAN={pan_speed:.3f}, TILT={tilt_speed:.3f}")
         
-        # Ejecutar movimiento
-        cam.continuous_move(pan_speed, tilt_speed, 0)
-        time.sleep(0.3)
-        cam.stop()
+        # Ejecutar movimiento; el Stop se programa en la cámara sin bloquear
+        cam.pulse_move(pan_speed, tilt_speed, 0, duration=0.3)
         
         return True
         
     except Exception as e:
         print(f"❌ Error en seguimiento calibrado: {e}")
+        # La próxima llamada repite el handshake en lugar de reutilizar la conexión fallida
+        evict_ptz_camera(cam)
         return False
 
 if __name__ == "__main__":
@@ -349,4 +610,6 @@ if __name__ == "__main__":
     print("2. Probar direcciones")
     print("3. Calibrar centro con detecciones")
     print("4. Ajustar sensibilidad")
-    print("5. Guardar configuración")
\ No newline at end of file
+    print("5. Guardar configuración")
+    
+    flush()
\ No newline at end of file
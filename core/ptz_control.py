@@ -1,13 +1,9 @@
 import time
-import numpy as np
+import threading
+from collections import OrderedDict
 from onvif import ONVIFCamera
 from typing import Optional
 
-# Movimiento actual
-current_pan_speed = 0.0
-current_tilt_speed = 0.0
-current_zoom_speed = 0.0
-
 # Sensibilidad ajustable
 PAN_SENSITIVITY = 0.005
 TILT_SENSITIVITY = 0.005
@@ -15,7 +11,22 @@ MAX_PT_SPEED = 0.5
 DEADZONE_X = 0.03
 DEADZONE_Y = 0.03
 
-deteccion_confirmada_streak = 0
+# Diferencia mínima de velocidad para reenviar un ContinuousMove
+VELOCITY_EPSILON = 0.01
+
+# Antigüedad máxima (s) de un ContinuousMove antes de reenviarlo aunque la
+# velocidad no cambie: debe quedar por debajo del timeout PTZ de la cámara,
+# que detiene el movimiento continuo por su cuenta
+VELOCITY_REFRESH_AGE = 1.0
+
+# Detecciones consecutivas necesarias antes de mover la cámara
+CONFIRMATION_FRAMES = 3
+
+# Conexiones PTZ compartidas que se mantienen abiertas (las menos usadas salen primero)
+PTZ_CAMERA_CACHE_SIZE = 32
+
+# Duración por defecto de un movimiento por pulso antes del Stop automático
+PULSE_DURATION = 0.3
 
 
 class PTZCameraONVIF:
@@ -27,47 +38,161 @@ class PTZCameraONVIF:
         self.ptz = self.cam.create_ptz_service()
         self.profile_token = self.media.GetProfiles()[0].token
 
+        # Peticiones ONVIF reutilizables: se modifican en sitio en cada comando
+        self._req_lock = threading.Lock()
+        self._cm_req = self.ptz.create_type('ContinuousMove')
+        self._cm_req.ProfileToken = self.profile_token
+        self._cm_req.Velocity = {'PanTilt': {'x': 0.0, 'y': 0.0}, 'Zoom': {'x': 0.0}}
+        self._am_req = self.ptz.create_type('AbsoluteMove')
+        self._am_req.ProfileToken = self.profile_token
+        self._am_req.Position = {'PanTilt': {'x': 0.0, 'y': 0.0}, 'Zoom': {'x': 0.0}}
+        self._am_speed = {'PanTilt': {'x': 0.0, 'y': 0.0}, 'Zoom': {'x': 0.0}}
+        self._gp_req = self.ptz.create_type('GotoPreset')
+        self._gp_req.ProfileToken = self.profile_token
+        self._stop_req = {'ProfileToken': self.profile_token}
+        # Última velocidad enviada (pan, tilt, zoom); None = desconocida
+        self._last_vel = (None, None, None)
+        self._last_vel_ts = 0.0
+        # Stop diferido de pulse_move; la generación invalida timers ya disparados
+        self._stop_timer: Optional[threading.Timer] = None
+        self._stop_generation = 0
+
+        # Estado del seguimiento continuo de esta cámara
+        self._pan_speed = 0.0
+        self._tilt_speed = 0.0
+        self._confirm_streak = 0
 
     def goto_preset(self, preset_token: str):
         """Mover la cámara a un preset específico."""
-        req = self.ptz.create_type('GotoPreset')
-        req.ProfileToken = self.profile_token
-        req.PresetToken = str(preset_token)
-        self.ptz.GotoPreset(req)
+        with self._req_lock:
+            self._gp_req.PresetToken = str(preset_token)
+            self.ptz.GotoPreset(self._gp_req)
+            self._last_vel = (None, None, None)
 
 
     def continuous_move(self, pan_speed: float, tilt_speed: float, zoom_speed: float = 0.0):
-        req = self.ptz.create_type('ContinuousMove')
-        req.ProfileToken = self.profile_token
-        req.Velocity = {
-            'PanTilt': {'x': pan_speed, 'y': tilt_speed},
-            'Zoom': {'x': zoom_speed}
-        }
-        self.ptz.ContinuousMove(req)
+        with self._req_lock:
+            # Un comando nuevo reemplaza cualquier Stop programado
+            self._cancel_stop_timer()
+            # La cámara ya ejecuta esta velocidad: no repetir el comando
+            # salvo que el anterior esté cerca de vencer su timeout
+            last_pan, last_tilt, last_zoom = self._last_vel
+            now = time.monotonic()
+            if (last_pan is not None
+                    and now - self._last_vel_ts < VELOCITY_REFRESH_AGE
+                    and abs(pan_speed - last_pan) < VELOCITY_EPSILON
+                    and abs(tilt_speed - last_tilt) < VELOCITY_EPSILON
+                    and abs(zoom_speed - last_zoom) < VELOCITY_EPSILON):
+                return
+            velocity = self._cm_req.Velocity
+            velocity['PanTilt']['x'] = pan_speed
+            velocity['PanTilt']['y'] = tilt_speed
+            velocity['Zoom']['x'] = zoom_speed
+            self.ptz.ContinuousMove(self._cm_req)
+            self._last_vel = (pan_speed, tilt_speed, zoom_speed)
+            self._last_vel_ts = now
 
     def absolute_move(self, pan: float, tilt: float, zoom: float, speed: Optional[float] = None):
         """Mover la cámara a una posición absoluta."""
-        req = self.ptz.create_type('AbsoluteMove')
-        req.ProfileToken = self.profile_token
-        req.Position = {
-            'PanTilt': {'x': max(-1.0, min(1.0, pan)), 'y': max(-1.0, min(1.0, tilt))},
-            'Zoom': {'x': max(0.0, min(1.0, zoom))}
-        }
-        if speed is not None:
-            req.Speed = {
-                'PanTilt': {'x': speed, 'y': speed},
-                'Zoom': {'x': speed}
-            }
-        self.ptz.AbsoluteMove(req)
+        with self._req_lock:
+            req = self._am_req
+            position = req.Position
+            position['PanTilt']['x'] = max(-1.0, min(1.0, pan))
+            position['PanTilt']['y'] = max(-1.0, min(1.0, tilt))
+            position['Zoom']['x'] = max(0.0, min(1.0, zoom))
+            if speed is not None:
+                req_speed = self._am_speed
+                req_speed['PanTilt']['x'] = speed
+                req_speed['PanTilt']['y'] = speed
+                req_speed['Zoom']['x'] = speed
+                req.Speed = req_speed
+            else:
+                req.Speed = None
+            self.ptz.AbsoluteMove(req)
+            self._last_vel = (None, None, None)
+
+    def pulse_move(self, pan_speed: float, tilt_speed: float, zoom_speed: float = 0.0,
+                   duration: float = PULSE_DURATION):
+        """Mover durante `duration` segundos y detener sin bloquear al llamador."""
+        self.continuous_move(pan_speed, tilt_speed, zoom_speed)
+        with self._req_lock:
+            timer = threading.Timer(duration, self._timed_stop, args=(self._stop_generation,))
+            timer.daemon = True
+            self._stop_timer = timer
+            timer.start()
+
+    def _cancel_stop_timer(self):
+        """Cancelar el Stop programado (requiere _req_lock)."""
+        self._stop_generation += 1
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+            self._stop_timer = None
+
+    def _timed_stop(self, generation: int):
+        # Comprobación y Stop bajo el mismo lock: un movimiento posterior no
+        # puede colarse entre ambos y ser detenido por este pulso
+        try:
+            with self._req_lock:
+                if generation != self._stop_generation:
+                    return
+                self._stop_timer = None
+                self._send_stop()
+        except Exception as e:
+            print(f"❌ Error en Stop programado: {e}")
 
     def stop(self):
-        self.ptz.Stop({'ProfileToken': self.profile_token})
-
-
-def track_object_continuous(ip, puerto, usuario, contrasena, cx, cy, frame_w, frame_h):
+        with self._req_lock:
+            self._cancel_stop_timer()
+            self._send_stop()
+
+    def _send_stop(self):
+        """Enviar Stop y registrar la velocidad nula (requiere _req_lock)."""
+        self.ptz.Stop(self._stop_req)
+        self._last_vel = (0.0, 0.0, 0.0)
+        self._last_vel_ts = time.monotonic()
+
+
+# Conexiones por (ip, puerto, usuario, contraseña). Una conexión que falla se
+# retira con evict_ptz_camera para que la siguiente llamada repita el handshake
+_camera_cache: "OrderedDict[tuple, PTZCameraONVIF]" = OrderedDict()
+_camera_cache_lock = threading.Lock()
+
+
+def get_ptz_camera(ip: str, puerto, usuario: str, contrasena: str) -> PTZCameraONVIF:
+    """Obtener una conexión PTZ compartida, evitando repetir el handshake ONVIF."""
+    key = (ip, int(puerto), usuario, contrasena)
+    with _camera_cache_lock:
+        cam = _camera_cache.get(key)
+        if cam is not None:
+            _camera_cache.move_to_end(key)
+            return cam
+
+    # El handshake se hace fuera del lock para no bloquear a otras cámaras
+    cam = PTZCameraONVIF(*key)
+    with _camera_cache_lock:
+        cam = _camera_cache.setdefault(key, cam)
+        _camera_cache.move_to_end(key)
+        while len(_camera_cache) > PTZ_CAMERA_CACHE_SIZE:
+            _camera_cache.popitem(last=False)
+    return cam
+
+
+def evict_ptz_camera(cam: Optional[PTZCameraONVIF]):
+    """Retirar de la caché una conexión que ha fallado (sin efecto si ya no está)."""
+    if cam is None:
+        return
+    with _camera_cache_lock:
+        for key, cached in list(_camera_cache.items()):
+            if cached is cam:
+                del _camera_cache[key]
+
+
+def track_object_continuous(ip, puerto, usuario, contrasena, cx, cy, frame_w, frame_h,
+                            cam: Optional[PTZCameraONVIF] = None):
     """Realiza seguimiento continuo utilizando ONVIF."""
     try:
-        cam = PTZCameraONVIF(ip, puerto, usuario, contrasena)
+        if cam is None:
+            cam = get_ptz_camera(ip, puerto, usuario, contrasena)
 
         center_x = frame_w / 2
         center_y = frame_h / 2
@@ -82,35 +207,33 @@ def track_object_continuous(ip, puerto, usuario, contrasena, cx, cy, frame_w, fr
             dy = 0
 
         # Convertir a velocidades proporcionales
-        pan_speed = float(np.clip(dx * PAN_SENSITIVITY, -MAX_PT_SPEED, MAX_PT_SPEED))
-        tilt_speed = float(np.clip(-dy * TILT_SENSITIVITY, -MAX_PT_SPEED, MAX_PT_SPEED))
-
-        global current_pan_speed, current_tilt_speed
-        global deteccion_confirmada_streak
+        pan_speed = float(max(-MAX_PT_SPEED, min(MAX_PT_SPEED, dx * PAN_SENSITIVITY)))
+        tilt_speed = float(max(-MAX_PT_SPEED, min(MAX_PT_SPEED, -dy * TILT_SENSITIVITY)))
 
         if pan_speed == 0 and tilt_speed == 0:
-            deteccion_confirmada_streak = 0
+            cam._confirm_streak = 0
             print("📍 Objetivo centrado. Enviando Stop.")
             try:
                 cam.stop()
             except Exception:
                 pass
-            current_pan_speed = 0.0
-            current_tilt_speed = 0.0
+            cam._pan_speed = 0.0
+            cam._tilt_speed = 0.0
             return
 
-        deteccion_confirmada_streak += 1
-        if deteccion_confirmada_streak < 3:
-            print(f"⏳ Esperando confirmación de embarcación ({deteccion_confirmada_streak}/3)...")
+        cam._confirm_streak += 1
+        if cam._confirm_streak < CONFIRMATION_FRAMES:
+            print(f"⏳ Esperando confirmación de embarcación ({cam._confirm_streak}/{CONFIRMATION_FRAMES})...")
             return
 
         # Enviar comando ContinuousMove vía ONVIF
         try:
             cam.continuous_move(pan_speed, tilt_speed)
         except Exception:
-            pass
-        current_pan_speed = pan_speed
-        current_tilt_speed = tilt_speed
+            # Conexión probablemente caída: la próxima llamada reconecta
+            evict_ptz_camera(cam)
+        cam._pan_speed = pan_speed
+        cam._tilt_speed = tilt_speed
         print(f"🎯 PTZ seguimiento continuo: pan_speed={pan_speed:.3f}, tilt_speed={tilt_speed:.3f}")
 
     except Exception as e:
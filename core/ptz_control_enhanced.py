@@ -1,16 +1,163 @@
 # core/ptz_control_enhanced.py
 import time
+import atexit
+import asyncio
+import functools
+import itertools
+import queue
+import tempfile
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
 import json
 import os
+import logging
 from datetime import datetime
 from onvif import ONVIFCamera
+from core._ptz_kernels import filter_boxes
 from typing import Optional, Dict, Any, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from zeep.cache import SqliteCache
+    from zeep.transports import Transport
+    KEEPALIVE_AVAILABLE = True
+except ImportError:
+    KEEPALIVE_AVAILABLE = False
+
+try:
+    from PyQt6.QtCore import QCoreApplication, QObject, Qt, pyqtSignal, pyqtSlot
+    QT_AVAILABLE = True
+except ImportError:
+    QT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Llamadas SOAP más seguidas que este intervalo reciben una pequeña pausa,
+# evitando errores de transporte en cámaras que cierran el socket tarde
+RAPID_CALL_INTERVAL = 0.1
+RAPID_CALL_GUARD = 0.01
+
+# Vigencia de la lista de presets en caché (segundos)
+PRESETS_CACHE_TTL = 60.0
+
+# Peticiones PTZ que se crean una sola vez por instancia (con ProfileToken fijado)
+REQUEST_TEMPLATES = ('GotoPreset', 'RelativeMove', 'Stop', 'GetStatus',
+                     'GetPresets', 'SetPreset', 'RemovePreset')
+
+# Campos de PTZStatus copiados en get_status: (clave del resultado, atributo zeep)
+STATUS_FIELDS = (('position', 'Position'), ('move_status', 'MoveStatus'),
+                 ('error', 'Error'), ('utc_time', 'UtcTime'))
+
+# Ventana en la que se reutiliza un estado/posición ya leído de la cámara
+STATUS_BATCH_WINDOW = 0.02
+
+# Diferencia mínima para reenviar una velocidad de joystick (set_velocity)
+VELOCITY_EPSILON = 0.01
+
+# Rango de velocidad continua (espacio genérico ONVIF) si la cámara no informa el suyo
+DEFAULT_VELOCITY_RANGE = (-1.0, 1.0)
+
+# Formato de detecciones del PTZDetectionBridge: ndarray float32 (N, 6) con
+# columnas [x1, y1, x2, y2, conf, cls]; con False se envían listas de dicts
+VECTOR_DETECTIONS = True
+
+# Detecciones pendientes del PTZDetectionBridge; si se llena se descarta la más antigua
+DETECTION_QUEUE_SIZE = 256
+
+# Caché en disco de los documentos WSDL/XSD, compartida por todas las cámaras
+WSDL_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'onvif_wsdl.db')
+WSDL_CACHE_TIMEOUT = 86400
+
+if KEEPALIVE_AVAILABLE:
+    @functools.lru_cache(maxsize=1)
+    def _get_wsdl_cache() -> SqliteCache:
+        """Única SqliteCache del proceso para los transportes ONVIF"""
+        return SqliteCache(path=WSDL_CACHE_PATH, timeout=WSDL_CACHE_TIMEOUT)
+
+    class _KeepAliveTransport(Transport):
+        """Transporte zeep con sesión HTTP persistente por cámara"""
+        
+        def __init__(self):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['Connection'] = 'keep-alive'
+            super().__init__(session=session, cache=_get_wsdl_cache())
+            self._last_call = 0.0
+        
+        def post(self, address, message, headers):
+            if time.monotonic() - self._last_call < RAPID_CALL_INTERVAL:
+                time.sleep(RAPID_CALL_GUARD)
+            try:
+                response = super().post(address, message, headers)
+                # Consumir el cuerpo para devolver la conexión al pool
+                response.content
+                return response
+            finally:
+                self._last_call = time.monotonic()
+
+def _clamp(value: float, low: float, high: float) -> float:
+    """Limitar value a [low, high] con una sola llamada (sin min/max anidados)"""
+    return low if value < low else high if value > high else value
+
+
+def _position_vector(position: Dict[str, float]) -> np.ndarray:
+    """Convertir una posición {pan, tilt, zoom} en vector (3,)"""
+    return np.array((position.get("pan", 0), position.get("tilt", 0), position.get("zoom", 0)),
+                    dtype=np.float64)
+
+
+# Escrituras a disco fuera del camino de control PTZ
+_disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptz-disk-io")
+
+
+# Conexiones ONVIF compartidas: (ip, puerto, usuario, contraseña) -> ONVIFCamera
+_onvif_cameras: Dict[Tuple[str, int, str, str], ONVIFCamera] = {}
+_onvif_cameras_lock = threading.Lock()
+
+
+def _tune_zeep_settings(service):
+    """Ajustar el parser zeep del servicio para respuestas SOAP pequeñas"""
+    client = getattr(service, 'zeep_client', None)
+    if client is None:
+        return
+    settings = client.settings
+    settings.strict = False
+    settings.xml_huge_tree = False
+    settings.xsd_ignore_sequence_order = True
+
+
+def _get_onvif_camera(ip: str, puerto: int, usuario: str, contrasena: str,
+                      fresh: bool = False) -> ONVIFCamera:
+    """
+    Obtiene la conexión ONVIF compartida de una cámara
+    
+    Los servicios (con su WSDL ya interpretado) se reutilizan entre instancias
+    de PTZCameraEnhanced; `fresh=True` fuerza una conexión nueva.
+    """
+    key = (ip, int(puerto), usuario, contrasena)
+    with _onvif_cameras_lock:
+        cam = None if fresh else _onvif_cameras.get(key)
+        if cam is None:
+            transport = _KeepAliveTransport() if KEEPALIVE_AVAILABLE else None
+            cam = ONVIFCamera(ip, int(puerto), usuario, contrasena, transport=transport)
+            _onvif_cameras[key] = cam
+        return cam
+
+
 class PTZCameraEnhanced:
     """Clase mejorada para control PTZ con funcionalidades avanzadas"""
     
-    def __init__(self, ip: str, puerto: int, usuario: str, contrasena: str):
+    def __init__(self, ip: str, puerto: int, usuario: str, contrasena: str, connect: bool = True):
         """
         Inicializa la cámara PTZ con configuración mejorada
         
@@ -19,6 +166,7 @@ class PTZCameraEnhanced:
             puerto: Puerto de conexión
             usuario: Usuario para autenticación
             contrasena: Contraseña para autenticación
+            connect: Conectar ya; con False la conexión se difiere a connect()
         """
         self.ip = ip
         self.puerto = puerto
@@ -27,10 +175,27 @@ class PTZCameraEnhanced:
         
         # Estado interno
         self.last_position = {"pan": 0.0, "tilt": 0.0, "zoom": 0.0}
-        self.move_history = []
+        self._position_time = 0.0  # monotonic de la última lectura real
+        self._last_status: Optional[Dict[str, Any]] = None
+        self._status_time = 0.0
+        # Envío de velocidades de joystick: última velocidad gana
+        self._velocity_queue: Optional[asyncio.Queue] = None
+        self._velocity_task: Optional[asyncio.Task] = None
+        self._sent_velocity: Optional[Tuple[float, float, float]] = None
+        self.move_history = deque(maxlen=100)  # últimos 100 (timestamp_ns, acción, parámetros)
         self.connection_attempts = 0
         self.max_retries = 3
         self.connected = False
+        self.ptz = None
+        self.ptz_config = None
+        self.pan_limits = None
+        self.zoom_limits = None
+        
+        # Cachés de consultas que casi nunca cambian (se vacían al reconectar)
+        self._configuration_cache: Dict[str, Any] = {}
+        self._velocity_ranges_cache: Optional[Tuple[Tuple[float, float], ...]] = None
+        self._presets_cache: Optional[Dict[str, str]] = None
+        self._presets_cache_time = 0.0
         
         # Configuración
         self.default_speed = 0.5
@@ -38,14 +203,27 @@ class PTZCameraEnhanced:
         self.position_tolerance = 0.01
         
         # Inicializar conexión
+        if connect:
+            self._initialize_connection()
+    
+    async def connect(self) -> bool:
+        """Establece la conexión ONVIF sin bloquear el event loop (lanza excepción si falla)"""
+        await asyncio.to_thread(self._initialize_connection)
+        return True
+    
+    def connect_sync(self) -> bool:
+        """Establece la conexión ONVIF de forma bloqueante (lanza excepción si falla)"""
         self._initialize_connection()
+        return True
         
-    def _initialize_connection(self):
+    def _initialize_connection(self, fresh: bool = False):
         """Inicializa la conexión ONVIF"""
         try:
-            self.cam = ONVIFCamera(self.ip, self.puerto, self.usuario, self.contrasena)
-            self.media = self.cam.create_media_service()
-            self.ptz = self.cam.create_ptz_service()
+            self.cam = _get_onvif_camera(self.ip, self.puerto, self.usuario, self.contrasena, fresh)
+            self.media = self.cam.get_service('media')
+            self.ptz = self.cam.get_service('ptz')
+            _tune_zeep_settings(self.media)
+            _tune_zeep_settings(self.ptz)
             
             # Obtener profiles disponibles
             self.profiles = self.media.GetProfiles()
@@ -55,13 +233,22 @@ class PTZCameraEnhanced:
             # Usar el primer profile por defecto
             self.profile_token = self.profiles[0].token
             
+            # Peticiones reutilizables para los comandos de movimiento frecuentes
+            self._init_request_cache()
+            
+            # Cachés de consultas que casi nunca cambian
+            self._configuration_cache = {}
+            self._velocity_ranges_cache = None
+            self._presets_cache = None
+            self._presets_cache_time = 0.0
+            
             # Verificar capacidades PTZ
             self._check_ptz_capabilities()
             self._check_absolute_move_support()
 
             self.connection_attempts = 0
             self.connected = True
-            print(f"✅ Conexión PTZ establecida: {self.ip}:{self.puerto}")
+            logger.debug("✅ Conexión PTZ establecida: %s:%s", self.ip, self.puerto)
 
         except Exception as e:
             self.connection_attempts += 1
@@ -72,7 +259,7 @@ class PTZCameraEnhanced:
         """Verifica las capacidades PTZ de la cámara"""
         try:
             # Intentar obtener configuración PTZ
-            self.ptz_config = self.ptz.GetConfiguration({'ConfigurationToken': self.profile_token})
+            self.ptz_config = self._get_configuration_cached()
             
             # Verificar límites de movimiento
             if hasattr(self.ptz_config, 'PanTiltLimits'):
@@ -85,28 +272,69 @@ class PTZCameraEnhanced:
             else:
                 self.zoom_limits = None
                 
-            print(f"✅ Capacidades PTZ verificadas para {self.ip}")
+            logger.debug("✅ Capacidades PTZ verificadas para %s", self.ip)
             
         except Exception as e:
-            print(f"⚠️ No se pudieron verificar capacidades PTZ: {e}")
+            logger.warning("⚠️ No se pudieron verificar capacidades PTZ: %s", e)
             self.ptz_config = None
             self.pan_limits = None
             self.zoom_limits = None
 
     def _check_absolute_move_support(self) -> bool:
-        """Verificar si la cámara soporta AbsoluteMove"""
+        """Verificar si la cámara soporta AbsoluteMove (usa la configuración ya leída)"""
         try:
-            ptz_config = self.ptz.GetConfiguration({'ConfigurationToken': self.profile_token})
-            if hasattr(ptz_config, 'PanTiltLimits'):
-                print(f"✅ AbsoluteMove soportado para {self.ip}")
+            if hasattr(self.ptz_config, 'PanTiltLimits'):
+                logger.debug("✅ AbsoluteMove soportado para %s", self.ip)
                 return True
             else:
-                print(f"⚠️ AbsoluteMove limitado para {self.ip}")
+                logger.warning("⚠️ AbsoluteMove limitado para %s", self.ip)
                 return False
         except Exception as e:
-            print(f"⚠️ Error verificando AbsoluteMove para {self.ip}: {e}")
+            logger.warning("⚠️ Error verificando AbsoluteMove para %s: %s", self.ip, e)
             return False
 
+    @property
+    def ptz_configuration(self):
+        """Configuración PTZ de la cámara, consultada como mucho una vez por conexión"""
+        if self.ptz_config is None and self.ptz is not None:
+            self.ptz_config = self._get_configuration_cached()
+        return self.ptz_config
+
+    def _init_request_cache(self):
+        """Crear una vez las peticiones PTZ; los comandos las modifican en sitio"""
+        self._req_lock = threading.Lock()
+        
+        self._continuous_req = self.ptz.create_type('ContinuousMove')
+        self._continuous_req.ProfileToken = self.profile_token
+        self._continuous_req.Velocity = {'PanTilt': {'x': 0.0, 'y': 0.0}, 'Zoom': {'x': 0.0}}
+        
+        # Posición y velocidad con y sin zoom comparten los diccionarios de PanTilt
+        pan_tilt = {'x': 0.0, 'y': 0.0}
+        speed_pan_tilt = {'x': 0.0, 'y': 0.0}
+        self._absmove_position = {'PanTilt': pan_tilt}
+        self._absmove_position_zoom = {'PanTilt': pan_tilt, 'Zoom': {'x': 0.0}}
+        self._absmove_speed = {'PanTilt': speed_pan_tilt}
+        self._absmove_speed_zoom = {'PanTilt': speed_pan_tilt, 'Zoom': {'x': 0.0}}
+        self._absmove_req = self.ptz.create_type('AbsoluteMove')
+        self._absmove_req.ProfileToken = self.profile_token
+        
+        # Resto de peticiones: una por tipo, con su propio lock para no
+        # serializar p. ej. GetStatus detrás de un GotoPreset en curso
+        self._req_templates = {}
+        for name in REQUEST_TEMPLATES:
+            req = self.ptz.create_type(name)
+            req.ProfileToken = self.profile_token
+            self._req_templates[name] = req
+        self._req_locks = {name: threading.Lock() for name in REQUEST_TEMPLATES}
+
+    def _get_configuration_cached(self):
+        """GetConfiguration memorizado por profile_token"""
+        config = self._configuration_cache.get(self.profile_token)
+        if config is None:
+            config = self.ptz.GetConfiguration({'ConfigurationToken': self.profile_token})
+            self._configuration_cache[self.profile_token] = config
+        return config
+
     def goto_preset(self, preset_token: str, speed: Optional[float] = None) -> bool:
         """
         Mueve la cámara a un preset específico
@@ -119,26 +347,28 @@ class PTZCameraEnhanced:
             bool: True si el movimiento fue exitoso
         """
         try:
-            req = self.ptz.create_type('GotoPreset')
-            req.ProfileToken = self.profile_token
-            req.PresetToken = str(preset_token)
-            
-            if speed is not None:
-                req.Speed = {
-                    'PanTilt': {'x': speed, 'y': speed},
-                    'Zoom': {'x': speed}
-                }
-            
-            self.ptz.GotoPreset(req)
+            with self._req_locks['GotoPreset']:
+                req = self._req_templates['GotoPreset']
+                req.PresetToken = str(preset_token)
+                
+                if speed is not None:
+                    req.Speed = {
+                        'PanTilt': {'x': speed, 'y': speed},
+                        'Zoom': {'x': speed}
+                    }
+                else:
+                    req.Speed = None
+                
+                self.ptz.GotoPreset(req)
             
             # Registrar movimiento
             self._log_movement("goto_preset", {"preset": preset_token, "speed": speed})
             
-            print(f"✅ PTZ {self.ip} movido a preset {preset_token}")
+            logger.debug("✅ PTZ %s movido a preset %s", self.ip, preset_token)
             return True
             
         except Exception as e:
-            print(f"❌ Error moviendo a preset {preset_token}: {e}")
+            logger.error("❌ Error moviendo a preset %s: %s", preset_token, e)
             return False
 
     def continuous_move(self, pan_speed: float, tilt_speed: float, zoom_speed: float = 0.0, duration: Optional[float] = None) -> bool:
@@ -156,21 +386,19 @@ class PTZCameraEnhanced:
         """
         try:
             # Validar velocidades
-            pan_speed = max(-1.0, min(1.0, pan_speed))
-            tilt_speed = max(-1.0, min(1.0, tilt_speed))
-            zoom_speed = max(-1.0, min(1.0, zoom_speed))
-            
-            req = self.ptz.create_type('ContinuousMove')
-            req.ProfileToken = self.profile_token
-            req.Velocity = {
-                'PanTilt': {'x': pan_speed, 'y': tilt_speed},
-                'Zoom': {'x': zoom_speed}
-            }
-            
-            if duration is not None:
-                req.Timeout = f"PT{duration}S"
-            
-            self.ptz.ContinuousMove(req)
+            pan_speed = _clamp(pan_speed, -1.0, 1.0)
+            tilt_speed = _clamp(tilt_speed, -1.0, 1.0)
+            zoom_speed = _clamp(zoom_speed, -1.0, 1.0)
+            
+            with self._req_lock:
+                req = self._continuous_req
+                velocity = req.Velocity
+                velocity['PanTilt']['x'] = pan_speed
+                velocity['PanTilt']['y'] = tilt_speed
+                velocity['Zoom']['x'] = zoom_speed
+                req.Timeout = f"PT{duration}S" if duration is not None else None
+                
+                self.ptz.ContinuousMove(req)
             
             # Registrar movimiento
             self._log_movement("continuous_move", {
@@ -183,7 +411,7 @@ class PTZCameraEnhanced:
             return True
             
         except Exception as e:
-            print(f"❌ Error en movimiento continuo: {e}")
+            logger.error("❌ Error en movimiento continuo: %s", e)
             return False
 
     def absolute_move(self, pan: float, tilt: float, zoom: Optional[float] = None, speed: float = 0.5) -> bool:
@@ -200,35 +428,35 @@ class PTZCameraEnhanced:
             bool: True si el comando fue exitoso
         """
         if not self.connected or not self.ptz:
-            print(f"❌ PTZ no conectado: {self.ip}")
+            logger.error("❌ PTZ no conectado: %s", self.ip)
             return False
 
         try:
             # Validar posiciones
-            pan = max(-1.0, min(1.0, pan))
-            tilt = max(-1.0, min(1.0, tilt))
-
-            req = self.ptz.create_type('AbsoluteMove')
-            req.ProfileToken = self.profile_token
-            req.Position = {
-                'PanTilt': {'x': pan, 'y': tilt}
-            }
-
-            if zoom is not None:
-                zoom = max(0.0, min(1.0, zoom))
-                req.Position['Zoom'] = {'x': zoom}
-
-            req.Speed = {
-                'PanTilt': {
-                    'x': max(0.1, min(1.0, speed)),
-                    'y': max(0.1, min(1.0, speed))
-                }
-            }
-
-            if zoom is not None:
-                req.Speed['Zoom'] = {'x': max(0.1, min(1.0, speed))}
+            pan = _clamp(pan, -1.0, 1.0)
+            tilt = _clamp(tilt, -1.0, 1.0)
+
+            move_speed = _clamp(speed, 0.1, 1.0)
+
+            with self._req_lock:
+                req = self._absmove_req
+                if zoom is not None:
+                    zoom = _clamp(zoom, 0.0, 1.0)
+                    position = self._absmove_position_zoom
+                    req_speed = self._absmove_speed_zoom
+                    position['Zoom']['x'] = zoom
+                    req_speed['Zoom']['x'] = move_speed
+                else:
+                    position = self._absmove_position
+                    req_speed = self._absmove_speed
+                position['PanTilt']['x'] = pan
+                position['PanTilt']['y'] = tilt
+                req_speed['PanTilt']['x'] = move_speed
+                req_speed['PanTilt']['y'] = move_speed
+                req.Position = position
+                req.Speed = req_speed
 
-            self.ptz.AbsoluteMove(req)
+                self.ptz.AbsoluteMove(req)
             
             # Actualizar posición conocida
             self.last_position = {"pan": pan, "tilt": tilt, "zoom": zoom}
@@ -238,14 +466,14 @@ class PTZCameraEnhanced:
                 "pan": pan, "tilt": tilt, "zoom": zoom, "speed": speed
             })
             
-            print(f"✅ AbsoluteMove ejecutado - Pan: {pan:.3f}, Tilt: {tilt:.3f}")
-            if zoom is not None:
-                print(f"   Zoom: {zoom:.3f}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✅ AbsoluteMove ejecutado - Pan: %.3f, Tilt: %.3f, Zoom: %s",
+                             pan, tilt, "-" if zoom is None else f"{zoom:.3f}")
 
             return True
 
         except Exception as e:
-            print(f"❌ Error en AbsoluteMove para {self.ip}: {e}")
+            logger.error("❌ Error en AbsoluteMove para %s: %s", self.ip, e)
             return False
 
     def relative_move(self, pan_delta: float, tilt_delta: float, zoom_delta: float, speed: Optional[float] = None) -> bool:
@@ -262,20 +490,22 @@ class PTZCameraEnhanced:
             bool: True si el comando fue exitoso
         """
         try:
-            req = self.ptz.create_type('RelativeMove')
-            req.ProfileToken = self.profile_token
-            req.Translation = {
-                'PanTilt': {'x': pan_delta, 'y': tilt_delta},
-                'Zoom': {'x': zoom_delta}
-            }
-            
-            if speed is not None:
-                req.Speed = {
-                    'PanTilt': {'x': speed, 'y': speed},
-                    'Zoom': {'x': speed}
+            with self._req_locks['RelativeMove']:
+                req = self._req_templates['RelativeMove']
+                req.Translation = {
+                    'PanTilt': {'x': pan_delta, 'y': tilt_delta},
+                    'Zoom': {'x': zoom_delta}
                 }
-            
-            self.ptz.RelativeMove(req)
+                
+                if speed is not None:
+                    req.Speed = {
+                        'PanTilt': {'x': speed, 'y': speed},
+                        'Zoom': {'x': speed}
+                    }
+                else:
+                    req.Speed = None
+                
+                self.ptz.RelativeMove(req)
             
             # Registrar movimiento
             self._log_movement("relative_move", {
@@ -288,7 +518,7 @@ class PTZCameraEnhanced:
             return True
             
         except Exception as e:
-            print(f"❌ Error en movimiento relativo: {e}")
+            logger.error("❌ Error en movimiento relativo: %s", e)
             return False
 
     def stop(self, stop_pan_tilt: bool = True, stop_zoom: bool = True) -> bool:
@@ -303,12 +533,14 @@ class PTZCameraEnhanced:
             bool: True si el comando fue exitoso
         """
         try:
-            req = self.ptz.create_type('Stop')
-            req.ProfileToken = self.profile_token
-            req.PanTilt = stop_pan_tilt
-            req.Zoom = stop_zoom
-            
-            self.ptz.Stop(req)
+            with self._req_locks['Stop']:
+                req = self._req_templates['Stop']
+                req.PanTilt = stop_pan_tilt
+                req.Zoom = stop_zoom
+                
+                self.ptz.Stop(req)
+            if stop_pan_tilt and stop_zoom:
+                self._sent_velocity = (0.0, 0.0, 0.0)
             
             # Registrar parada
             self._log_movement("stop", {"pan_tilt": stop_pan_tilt, "zoom": stop_zoom})
@@ -316,9 +548,38 @@ class PTZCameraEnhanced:
             return True
             
         except Exception as e:
-            print(f"❌ Error deteniendo movimiento: {e}")
+            logger.error("❌ Error deteniendo movimiento: %s", e)
             return False
 
+    def set_velocity(self, pan_speed: float, tilt_speed: float, zoom_speed: float = 0.0):
+        """
+        Fija la velocidad deseada (p. ej. desde un joystick) sin bloquear
+        
+        Un único emisor por cámara envía siempre la velocidad más reciente:
+        los valores que llegan mientras hay un ContinuousMove en curso se
+        descartan salvo el último, y no se reenvían velocidades iguales.
+        """
+        _get_background_loop().call_soon_threadsafe(self._offer_velocity, (pan_speed, tilt_speed, zoom_speed))
+
+    def _offer_velocity(self, velocity: Tuple[float, float, float]):
+        """Encolar la velocidad reemplazando la pendiente (se ejecuta en el loop PTZ)"""
+        queue = self._velocity_queue
+        if queue is None:
+            queue = self._velocity_queue = asyncio.Queue(maxsize=1)
+            self._velocity_task = asyncio.get_running_loop().create_task(self._velocity_sender())
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(velocity)
+
+    async def _velocity_sender(self):
+        while True:
+            velocity = await self._velocity_queue.get()
+            sent = self._sent_velocity
+            if sent is not None and all(abs(new - old) < VELOCITY_EPSILON for new, old in zip(velocity, sent)):
+                continue
+            if await asyncio.to_thread(self.continuous_move, *velocity):
+                self._sent_velocity = velocity
+
     def get_position(self) -> Optional[Dict[str, float]]:
         """
         Obtiene la posición actual de la cámara
@@ -330,10 +591,8 @@ class PTZCameraEnhanced:
             return None
 
         try:
-            req = self.ptz.create_type('GetStatus')
-            req.ProfileToken = self.profile_token
-            
-            status = self.ptz.GetStatus(req)
+            # GetStatus solo lleva ProfileToken: la plantilla se usa tal cual
+            status = self.ptz.GetStatus(self._req_templates['GetStatus'])
             
             if hasattr(status, 'Position'):
                 position = {
@@ -344,27 +603,31 @@ class PTZCameraEnhanced:
                 
                 # Actualizar posición conocida
                 self.last_position = position.copy()
+                self._position_time = time.monotonic()
                 
                 return position
             else:
                 return None
                 
         except Exception as e:
-            print(f"❌ Error obteniendo posición: {e}")
+            logger.error("❌ Error obteniendo posición: %s", e)
             return None
 
     def get_presets(self) -> Optional[Dict[str, str]]:
         """
         Obtiene la lista de presets disponibles
         
+        La lista se mantiene en caché durante PRESETS_CACHE_TTL segundos.
+        
         Returns:
             Dict con presets {token: name} o None si hay error
         """
+        if (self._presets_cache is not None
+                and time.monotonic() - self._presets_cache_time < PRESETS_CACHE_TTL):
+            return dict(self._presets_cache)
+        
         try:
-            req = self.ptz.create_type('GetPresets')
-            req.ProfileToken = self.profile_token
-            
-            presets_response = self.ptz.GetPresets(req)
+            presets_response = self.ptz.GetPresets(self._req_templates['GetPresets'])
             
             presets = {}
             if hasattr(presets_response, 'Preset'):
@@ -373,10 +636,12 @@ class PTZCameraEnhanced:
                     name = preset.Name if hasattr(preset, 'Name') else f"Preset {token}"
                     presets[token] = name
             
-            return presets
+            self._presets_cache = presets
+            self._presets_cache_time = time.monotonic()
+            return dict(presets)
             
         except Exception as e:
-            print(f"❌ Error obteniendo presets: {e}")
+            logger.error("❌ Error obteniendo presets: %s", e)
             return None
 
     def set_preset(self, preset_token: str, preset_name: Optional[str] = None) -> bool:
@@ -391,23 +656,27 @@ class PTZCameraEnhanced:
             bool: True si fue exitoso
         """
         try:
-            req = self.ptz.create_type('SetPreset')
-            req.ProfileToken = self.profile_token
-            req.PresetToken = preset_token
-            
-            if preset_name:
-                req.PresetName = preset_name
+            with self._req_locks['SetPreset']:
+                req = self._req_templates['SetPreset']
+                req.PresetToken = preset_token
+                req.PresetName = preset_name or None
+                
+                self.ptz.SetPreset(req)
             
-            self.ptz.SetPreset(req)
+            # Actualizar la entrada en caché sin volver a consultar la lista
+            if self._presets_cache is not None:
+                self._presets_cache[preset_token] = (
+                    preset_name or self._presets_cache.get(preset_token, f"Preset {preset_token}")
+                )
             
             # Registrar creación de preset
             self._log_movement("set_preset", {"preset": preset_token, "name": preset_name})
             
-            print(f"✅ Preset {preset_token} establecido en {self.ip}")
+            logger.debug("✅ Preset %s establecido en %s", preset_token, self.ip)
             return True
             
         except Exception as e:
-            print(f"❌ Error estableciendo preset {preset_token}: {e}")
+            logger.error("❌ Error estableciendo preset %s: %s", preset_token, e)
             return False
 
     def remove_preset(self, preset_token: str) -> bool:
@@ -421,20 +690,23 @@ class PTZCameraEnhanced:
             bool: True si fue exitoso
         """
         try:
-            req = self.ptz.create_type('RemovePreset')
-            req.ProfileToken = self.profile_token
-            req.PresetToken = preset_token
+            with self._req_locks['RemovePreset']:
+                req = self._req_templates['RemovePreset']
+                req.PresetToken = preset_token
+                
+                self.ptz.RemovePreset(req)
             
-            self.ptz.RemovePreset(req)
+            if self._presets_cache is not None:
+                self._presets_cache.pop(preset_token, None)
             
             # Registrar eliminación
             self._log_movement("remove_preset", {"preset": preset_token})
             
-            print(f"✅ Preset {preset_token} eliminado de {self.ip}")
+            logger.debug("✅ Preset %s eliminado de %s", preset_token, self.ip)
             return True
             
         except Exception as e:
-            print(f"❌ Error eliminando preset {preset_token}: {e}")
+            logger.error("❌ Error eliminando preset %s: %s", preset_token, e)
             return False
 
     def get_status(self) -> Optional[Dict[str, Any]]:
@@ -445,47 +717,72 @@ class PTZCameraEnhanced:
             Dict con información de estado o None si hay error
         """
         try:
-            req = self.ptz.create_type('GetStatus')
-            req.ProfileToken = self.profile_token
+            # GetStatus solo lleva ProfileToken: la plantilla se usa tal cual
+            status = self.ptz.GetStatus(self._req_templates['GetStatus'])
             
-            status = self.ptz.GetStatus(req)
-            
-            result = {
-                "position": None,
-                "move_status": None,
-                "error": None,
-                "utc_time": None
-            }
+            # Un solo getattr por campo; los ausentes quedan en None
+            result = {key: getattr(status, attr, None) for key, attr in STATUS_FIELDS}
             
-            if hasattr(status, 'Position'):
+            position = result["position"]
+            if position is not None:
                 result["position"] = {
-                    "pan": status.Position.PanTilt.x,
-                    "tilt": status.Position.PanTilt.y,
-                    "zoom": status.Position.Zoom.x
+                    "pan": position.PanTilt.x,
+                    "tilt": position.PanTilt.y,
+                    "zoom": position.Zoom.x
                 }
             
-            if hasattr(status, 'MoveStatus'):
+            move_status = result["move_status"]
+            if move_status is not None:
                 result["move_status"] = {
-                    "pan_tilt": status.MoveStatus.PanTilt,
-                    "zoom": status.MoveStatus.Zoom
+                    "pan_tilt": move_status.PanTilt,
+                    "zoom": move_status.Zoom
                 }
             
-            if hasattr(status, 'Error'):
-                result["error"] = status.Error
-                
-            if hasattr(status, 'UtcTime'):
-                result["utc_time"] = status.UtcTime
+            now = time.monotonic()
+            self._last_status = result
+            self._status_time = now
+            if result["position"] is not None:
+                self.last_position = result["position"].copy()
+                self._position_time = now
             
             return result
             
         except Exception as e:
-            print(f"❌ Error obteniendo estado: {e}")
+            logger.error("❌ Error obteniendo estado: %s", e)
             return None
 
+    def get_cached_status(self, max_age: float = STATUS_BATCH_WINDOW) -> Optional[Dict[str, Any]]:
+        """Último estado leído si tiene menos de max_age segundos, si no None"""
+        if self._last_status is not None and time.monotonic() - self._status_time < max_age:
+            return self._last_status
+        return None
+
+    def get_cached_position(self, max_age: float = STATUS_BATCH_WINDOW) -> Optional[Dict[str, float]]:
+        """Posición reciente (menos de max_age segundos) o una lectura nueva"""
+        if time.monotonic() - self._position_time < max_age:
+            return self.last_position.copy()
+        return self.get_position()
+
+    def _supports_continuous_move(self) -> bool:
+        """La configuración PTZ declara un espacio de velocidad continua"""
+        return getattr(self.ptz_config, 'DefaultContinuousPanTiltVelocitySpace', None) is not None
+
     def move_to_position_smooth(self, target_pan: float, target_tilt: float, target_zoom: float, 
                                steps: int = 10, delay: float = 0.1) -> bool:
+        """Versión síncrona de move_to_position_smooth_async"""
+        return run_sync(self.move_to_position_smooth_async(target_pan, target_tilt, target_zoom, steps, delay))
+
+    async def move_to_position_smooth_async(self, target_pan: float, target_tilt: float, target_zoom: float,
+                                            steps: int = 10, delay: float = 0.1) -> bool:
         """
-        Movimiento suave a una posición específica mediante pasos intermedios
+        Movimiento suave a una posición específica
+        
+        Si la cámara soporta ContinuousMove, se envía una única velocidad
+        (dentro de su espacio de velocidad continua) con Timeout de
+        steps * delay segundos y, al vencer, un AbsoluteMove final que fija la
+        posición exacta. Si no, se recorre la trayectoria con AbsoluteMove en
+        pasos intermedios. En ambos casos solo termina cuando se ha enviado
+        el último comando, así que un stop() posterior no compite con él.
         
         Args:
             target_pan: Posición objetivo de pan
@@ -498,40 +795,112 @@ class PTZCameraEnhanced:
             bool: True si fue exitoso
         """
         try:
-            # Obtener posición actual
-            current_pos = self.get_position()
+            # Obtener posición actual (reutilizando una lectura reciente)
+            current_pos = await asyncio.to_thread(self.get_cached_position)
             if not current_pos:
                 # Si no podemos obtener la posición, usar la última conocida
                 current_pos = self.last_position
             
-            # Calcular pasos intermedios
-            pan_step = (target_pan - current_pos["pan"]) / steps
-            tilt_step = (target_tilt - current_pos["tilt"]) / steps
-            zoom_step = (target_zoom - current_pos["zoom"]) / steps
+            if self._supports_continuous_move():
+                duration = max(steps * delay, 0.1)
+                moving = await asyncio.to_thread(self._start_smooth_approach, current_pos, target_pan,
+                                                 target_tilt, target_zoom, duration)
+                if moving is None:
+                    return False
+                if moving:
+                    await asyncio.sleep(duration)
+                
+                # AbsoluteMove final: detiene el movimiento residual en el destino exacto
+                success = await asyncio.to_thread(self.absolute_move, target_pan, target_tilt,
+                                                  target_zoom, 0.3)
+                if success:
+                    logger.debug("✅ Movimiento suave completado a (%.2f, %.2f, %.2f)",
+                                 target_pan, target_tilt, target_zoom)
+                return success
+            
+            # Calcular pasos intermedios (excluyendo la posición de partida)
+            path = np.linspace(_position_vector(current_pos),
+                               (target_pan, target_tilt, target_zoom), steps + 1)[1:]
             
             # Ejecutar movimiento paso a paso
-            for i in range(steps):
-                intermediate_pan = current_pos["pan"] + (pan_step * (i + 1))
-                intermediate_tilt = current_pos["tilt"] + (tilt_step * (i + 1))
-                intermediate_zoom = current_pos["zoom"] + (zoom_step * (i + 1))
-                
-                success = self.absolute_move(intermediate_pan, intermediate_tilt, intermediate_zoom, 0.3)
+            for intermediate_pan, intermediate_tilt, intermediate_zoom in path.tolist():
+                success = await asyncio.to_thread(self.absolute_move, intermediate_pan,
+                                                  intermediate_tilt, intermediate_zoom, 0.3)
                 if not success:
                     return False
                     
-                time.sleep(delay)
+                await asyncio.sleep(delay)
             
-            print(f"✅ Movimiento suave completado a ({target_pan:.2f}, {target_tilt:.2f}, {target_zoom:.2f})")
+            logger.debug("✅ Movimiento suave completado a (%.2f, %.2f, %.2f)", target_pan, target_tilt, target_zoom)
             return True
             
         except Exception as e:
-            print(f"❌ Error en movimiento suave: {e}")
+            logger.error("❌ Error en movimiento suave: %s", e)
+            return False
+
+    def _velocity_ranges(self) -> Tuple[Tuple[float, float], ...]:
+        """Rangos (min, max) de velocidad continua de pan, tilt y zoom de la cámara"""
+        ranges = self._velocity_ranges_cache
+        if ranges is not None:
+            return ranges
+        
+        ranges = (DEFAULT_VELOCITY_RANGE,) * 3
+        try:
+            token = getattr(self.ptz_config, 'token', None) or self.profile_token
+            spaces = self.ptz.GetConfigurationOptions({'ConfigurationToken': token}).Spaces
+            pan_tilt = spaces.ContinuousPanTiltVelocitySpace[0]
+            zoom_spaces = spaces.ContinuousZoomVelocitySpace
+            zoom = (zoom_spaces[0].XRange.Min, zoom_spaces[0].XRange.Max) if zoom_spaces else DEFAULT_VELOCITY_RANGE
+            ranges = ((pan_tilt.XRange.Min, pan_tilt.XRange.Max),
+                      (pan_tilt.YRange.Min, pan_tilt.YRange.Max),
+                      zoom)
+        except Exception as e:
+            logger.debug("⚠️ Sin espacio de velocidad de %s, usando %s: %s", self.ip, DEFAULT_VELOCITY_RANGE, e)
+        
+        self._velocity_ranges_cache = ranges
+        return ranges
+
+    def _start_smooth_approach(self, current_pos: Dict[str, float], target_pan: float,
+                               target_tilt: float, target_zoom: float, duration: float) -> Optional[bool]:
+        """
+        ContinuousMove temporizado en la dirección del destino
+        
+        La velocidad no sale de delta / duración (las posiciones y las
+        velocidades ONVIF usan espacios distintos): el eje con mayor recorrido
+        va a default_speed del rango de la cámara y los demás en proporción.
+        
+        Returns:
+            True si la cámara se mueve, False si ya está en el destino y None
+            si el comando falló
+        """
+        deltas = (target_pan - current_pos["pan"],
+                  target_tilt - current_pos["tilt"],
+                  target_zoom - current_pos["zoom"])
+        peak = max(abs(d) for d in deltas)
+        if peak < self.position_tolerance:
             return False
+        
+        scale = self.default_speed / peak
+        pan_speed, tilt_speed, zoom_speed = (
+            d * scale * (high if d > 0 else -low)
+            for d, (low, high) in zip(deltas, self._velocity_ranges())
+        )
+        if not self.continuous_move(pan_speed, tilt_speed, zoom_speed, duration=duration):
+            return None
+        return True
 
     def patrol_between_presets(self, preset_list: list, hold_time: float = 5.0, cycles: int = 1) -> bool:
+        """Versión síncrona de patrol_between_presets_async"""
+        return run_sync(self.patrol_between_presets_async(preset_list, hold_time, cycles))
+
+    async def patrol_between_presets_async(self, preset_list: list, hold_time: float = 5.0,
+                                           cycles: int = 1) -> bool:
         """
         Patrulla entre una lista de presets
         
+        La espera en cada preset no bloquea el event loop, por lo que varias
+        cámaras pueden patrullar a la vez (ver run_on_cameras).
+        
         Args:
             preset_list: Lista de tokens de presets
             hold_time: Tiempo de espera en cada preset (segundos)
@@ -542,26 +911,26 @@ class PTZCameraEnhanced:
         """
         try:
             if len(preset_list) < 2:
-                print("❌ Se necesitan al menos 2 presets para patrullar")
+                logger.error("❌ Se necesitan al menos 2 presets para patrullar")
                 return False
             
             for cycle in range(cycles):
-                print(f"🚶 Iniciando ciclo de patrulla {cycle + 1}/{cycles}")
+                logger.info("🚶 Iniciando ciclo de patrulla %s/%s", cycle + 1, cycles)
                 
                 for preset in preset_list:
-                    success = self.goto_preset(preset)
+                    success = await asyncio.to_thread(self.goto_preset, preset)
                     if not success:
-                        print(f"❌ Error yendo a preset {preset}, deteniendo patrulla")
+                        logger.error("❌ Error yendo a preset %s, deteniendo patrulla", preset)
                         return False
                     
-                    print(f"📍 En preset {preset}, esperando {hold_time}s")
-                    time.sleep(hold_time)
+                    logger.debug("📍 En preset %s, esperando %ss", preset, hold_time)
+                    await asyncio.sleep(hold_time)
             
-            print(f"✅ Patrulla completada: {cycles} ciclos entre {len(preset_list)} presets")
+            logger.debug("✅ Patrulla completada: %s ciclos entre %s presets", cycles, len(preset_list))
             return True
             
         except Exception as e:
-            print(f"❌ Error en patrulla: {e}")
+            logger.error("❌ Error en patrulla: %s", e)
             return False
 
     def calibrate_limits(self) -> Dict[str, Any]:
@@ -572,7 +941,7 @@ class PTZCameraEnhanced:
             Dict con información de límites
         """
         try:
-            print("🔧 Iniciando calibración de límites PTZ...")
+            logger.info("🔧 Iniciando calibración de límites PTZ...")
             
             # Obtener posición inicial
             initial_pos = self.get_position()
@@ -605,37 +974,34 @@ class PTZCameraEnhanced:
             # Guardar límites
             self._save_calibration_data(limits)
             
-            print("✅ Calibración de límites completada")
+            logger.debug("✅ Calibración de límites completada")
             return limits
             
         except Exception as e:
-            print(f"❌ Error en calibración: {e}")
+            logger.error("❌ Error en calibración: %s", e)
             return {}
 
     def _log_movement(self, action: str, params: Dict[str, Any]):
-        """Registra un movimiento en el historial"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "action": action,
-            "params": params,
-            "camera_ip": self.ip
-        }
-        
-        self.move_history.append(log_entry)
-        
-        # Mantener solo los últimos 100 movimientos
-        if len(self.move_history) > 100:
-            self.move_history = self.move_history[-100:]
+        """Registra un movimiento en el historial (timestamp en ns, formateado al consultar)"""
+        self.move_history.append((time.time_ns(), action, params))
 
-    def _save_calibration_data(self, limits: Dict[str, Any]):
-        """Guarda los datos de calibración"""
+    def _save_calibration_data(self, limits: Dict[str, Any]) -> Future:
+        """Guarda los datos de calibración en segundo plano"""
+        filename = f"ptz_limits_{self.ip.replace('.', '_')}.json"
+        return _disk_executor.submit(self._write_calibration_file, filename, dict(limits))
+
+    @staticmethod
+    def _write_calibration_file(filename: str, limits: Dict[str, Any]):
         try:
-            filename = f"ptz_limits_{self.ip.replace('.', '_')}.json"
-            with open(filename, 'w') as f:
-                json.dump(limits, f, indent=4)
-            print(f"💾 Límites guardados en {filename}")
+            if orjson is not None:
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(limits, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(limits, f, indent=4)
+            logger.debug("💾 Límites guardados en %s", filename)
         except Exception as e:
-            print(f"❌ Error guardando calibración: {e}")
+            logger.error("❌ Error guardando calibración: %s", e)
 
     def get_movement_history(self, limit: int = 10) -> list:
         """
@@ -647,7 +1013,16 @@ class PTZCameraEnhanced:
         Returns:
             Lista con historial de movimientos
         """
-        return self.move_history[-limit:] if self.move_history else []
+        start = max(0, len(self.move_history) - limit)
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts_ns / 1e9).isoformat(),
+                "action": action,
+                "params": params,
+                "camera_ip": self.ip
+            }
+            for ts_ns, action, params in itertools.islice(self.move_history, start, None)
+        ]
 
     def reset_connection(self) -> bool:
         """
@@ -657,46 +1032,198 @@ class PTZCameraEnhanced:
             bool: True si la reconexión fue exitosa
         """
         try:
-            print(f"🔄 Reiniciando conexión PTZ a {self.ip}")
-            self._initialize_connection()
+            logger.info("🔄 Reiniciando conexión PTZ a %s", self.ip)
+            self._initialize_connection(fresh=True)
             return True
         except Exception as e:
-            print(f"❌ Error reiniciando conexión: {e}")
+            logger.error("❌ Error reiniciando conexión: %s", e)
             return False
 
     def test_all_functions(self) -> Dict[str, bool]:
+        """Versión síncrona de test_all_functions_async"""
+        return run_sync(self.test_all_functions_async())
+
+    async def test_all_functions_async(self) -> Dict[str, bool]:
         """
         Prueba todas las funciones PTZ disponibles
         
+        Las consultas de estado, posición y presets son independientes y se
+        lanzan a la vez; la posición leída se reutiliza para el movimiento suave.
+        
         Returns:
             Dict con resultados de las pruebas
         """
         results = {}
         
-        # Probar obtener estado
-        results["get_status"] = self.get_status() is not None
-        
-        # Probar obtener posición
-        results["get_position"] = self.get_position() is not None
+        # Probar estado, posición y presets en paralelo
+        status, current_pos, presets = await asyncio.gather(
+            asyncio.to_thread(self.get_status),
+            asyncio.to_thread(self.get_position),
+            asyncio.to_thread(self.get_presets),
+        )
+        results["get_status"] = status is not None
+        results["get_position"] = current_pos is not None
+        results["get_presets"] = presets is not None
         
-        # Probar obtener presets
-        results["get_presets"] = self.get_presets() is not None
-        
-        # Probar movimiento suave
-        current_pos = self.get_position()
+        # Probar movimiento suave (reutiliza la posición ya leída)
         if current_pos:
-            results["smooth_movement"] = self.move_to_position_smooth(
+            results["smooth_movement"] = await self.move_to_position_smooth_async(
                 current_pos["pan"], current_pos["tilt"], current_pos["zoom"], steps=2
             )
         else:
             results["smooth_movement"] = False
         
         # Probar stop
-        results["stop"] = self.stop()
+        results["stop"] = await asyncio.to_thread(self.stop)
         
         return results
 
 
+class AsyncPTZCameraEnhanced:
+    """Fachada asíncrona sobre PTZCameraEnhanced
+    
+    Cada llamada SOAP bloqueante se ejecuta en un hilo del executor por
+    defecto, de modo que varias cámaras pueden esperar respuestas a la vez
+    desde un único event loop.
+    """
+    
+    def __init__(self, camera: PTZCameraEnhanced):
+        self.camera = camera
+    
+    async def goto_preset(self, preset_token: str, speed: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.camera.goto_preset, preset_token, speed)
+    
+    async def continuous_move(self, pan_speed: float, tilt_speed: float, zoom_speed: float = 0.0,
+                              duration: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.camera.continuous_move, pan_speed, tilt_speed, zoom_speed, duration)
+    
+    async def absolute_move(self, pan: float, tilt: float, zoom: Optional[float] = None,
+                            speed: float = 0.5) -> bool:
+        return await asyncio.to_thread(self.camera.absolute_move, pan, tilt, zoom, speed)
+    
+    async def relative_move(self, pan_delta: float, tilt_delta: float, zoom_delta: float,
+                            speed: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.camera.relative_move, pan_delta, tilt_delta, zoom_delta, speed)
+    
+    async def stop(self, stop_pan_tilt: bool = True, stop_zoom: bool = True) -> bool:
+        return await asyncio.to_thread(self.camera.stop, stop_pan_tilt, stop_zoom)
+    
+    async def get_position(self) -> Optional[Dict[str, float]]:
+        return await asyncio.to_thread(self.camera.get_position)
+    
+    async def get_status(self) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.camera.get_status)
+    
+    async def get_presets(self) -> Optional[Dict[str, str]]:
+        return await asyncio.to_thread(self.camera.get_presets)
+    
+    async def set_preset(self, preset_token: str, preset_name: Optional[str] = None) -> bool:
+        return await asyncio.to_thread(self.camera.set_preset, preset_token, preset_name)
+    
+    async def remove_preset(self, preset_token: str) -> bool:
+        return await asyncio.to_thread(self.camera.remove_preset, preset_token)
+    
+    async def move_to_position_smooth(self, target_pan: float, target_tilt: float, target_zoom: float,
+                                      steps: int = 10, delay: float = 0.1) -> bool:
+        return await self.camera.move_to_position_smooth_async(target_pan, target_tilt, target_zoom, steps, delay)
+    
+    async def patrol_between_presets(self, preset_list: list, hold_time: float = 5.0, cycles: int = 1) -> bool:
+        return await self.camera.patrol_between_presets_async(preset_list, hold_time, cycles)
+    
+    async def test_all_functions(self) -> Dict[str, bool]:
+        return await self.camera.test_all_functions_async()
+
+
+async def run_on_cameras(cameras: list, method: str, *args, **kwargs) -> list:
+    """
+    Ejecuta el mismo método PTZ en varias cámaras de forma concurrente
+    
+    Args:
+        cameras: Lista de PTZCameraEnhanced
+        method: Nombre del método de AsyncPTZCameraEnhanced a invocar
+        
+    Returns:
+        Lista de resultados (o excepciones) en el orden de `cameras`
+    """
+    facades = [AsyncPTZCameraEnhanced(cam) for cam in cameras]
+    return await asyncio.gather(
+        *(getattr(facade, method)(*args, **kwargs) for facade in facades),
+        return_exceptions=True
+    )
+
+
+# Event loop compartido para invocar corrutinas desde código síncrono (p. ej. Qt)
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="ptz-async-loop", daemon=True).start()
+            _background_loop = loop
+            atexit.register(_shutdown_background_loop)
+        return _background_loop
+
+
+async def _cancel_background_tasks():
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _shutdown_background_loop():
+    """Cancelar las tareas pendientes (emisores de velocidad) y detener el loop al salir"""
+    loop = _background_loop
+    if loop is None or not loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_cancel_background_tasks(), loop).result(1.0)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """Ejecutar una corrutina PTZ desde código síncrono y esperar su resultado"""
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync no puede usarse dentro del event loop PTZ; use la versión async")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def get_all_statuses(cameras: list, max_age: float = STATUS_BATCH_WINDOW) -> list:
+    """
+    Obtiene el estado de varias cámaras en paralelo
+    
+    Las cámaras cuyo estado se leyó hace menos de `max_age` segundos reutilizan
+    esa lectura, agrupando peticiones que llegan casi al mismo tiempo.
+    
+    Returns:
+        Lista de estados (o None) en el orden de `cameras`
+    """
+    async def _status(cam):
+        cached = cam.get_cached_status(max_age)
+        if cached is not None:
+            return cached
+        return await AsyncPTZCameraEnhanced(cam).get_status()
+    
+    return await asyncio.gather(*(_status(cam) for cam in cameras))
+
+
+def get_all_statuses_sync(cameras: list, max_age: float = STATUS_BATCH_WINDOW) -> list:
+    """Versión síncrona de get_all_statuses"""
+    return run_sync(get_all_statuses(cameras, max_age))
+
+
 def create_enhanced_ptz_camera(ip: str, puerto: int, usuario: str, contrasena: str) -> Optional[PTZCameraEnhanced]:
     """
     Factory function para crear una instancia de PTZCameraEnhanced
@@ -713,10 +1240,38 @@ def create_enhanced_ptz_camera(ip: str, puerto: int, usuario: str, contrasena: s
     try:
         return PTZCameraEnhanced(ip, puerto, usuario, contrasena)
     except Exception as e:
-        print(f"❌ Error creando cámara PTZ mejorada: {e}")
+        logger.error("❌ Error creando cámara PTZ mejorada: %s", e)
         return None
 
 
+async def create_enhanced_ptz_cameras_async(cameras: list) -> list:
+    """
+    Crea y conecta varias cámaras PTZ en paralelo
+    
+    Args:
+        cameras: Lista de tuplas (ip, puerto, usuario, contrasena)
+        
+    Returns:
+        Lista con la instancia conectada o None (si falla) por cada cámara
+    """
+    instances = [PTZCameraEnhanced(*spec, connect=False) for spec in cameras]
+    outcomes = await asyncio.gather(*(cam.connect() for cam in instances), return_exceptions=True)
+    
+    connected = []
+    for cam, outcome in zip(instances, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("❌ Error creando cámara PTZ mejorada: %s", outcome)
+            connected.append(None)
+        else:
+            connected.append(cam)
+    return connected
+
+
+def create_enhanced_ptz_cameras(cameras: list) -> list:
+    """Versión síncrona de create_enhanced_ptz_cameras_async"""
+    return run_sync(create_enhanced_ptz_cameras_async(cameras))
+
+
 def initialize_ptz_system() -> Dict[str, Any]:
     """
     Inicializa el sistema PTZ y verifica dependencias
@@ -737,23 +1292,23 @@ def initialize_ptz_system() -> Dict[str, Any]:
         # Verificar disponibilidad de ONVIF
         from onvif import ONVIFCamera
         system_info["onvif_available"] = True
-        print("✅ ONVIF disponible")
+        logger.debug("✅ ONVIF disponible")
         
     except ImportError as e:
         system_info["onvif_available"] = False
         system_info["errors"].append(f"ONVIF no disponible: {e}")
-        print(f"❌ ONVIF no disponible: {e}")
+        logger.error("❌ ONVIF no disponible: %s", e)
     
     try:
         # Verificar otras dependencias
         import json
         import os
         from datetime import datetime
-        print("✅ Dependencias básicas verificadas")
+        logger.debug("✅ Dependencias básicas verificadas")
         
     except ImportError as e:
         system_info["errors"].append(f"Dependencias faltantes: {e}")
-        print(f"❌ Error en dependencias: {e}")
+        logger.error("❌ Error en dependencias: %s", e)
     
     return system_info
 
@@ -773,7 +1328,43 @@ def get_ptz_system_status() -> Dict[str, Any]:
     }
 
 
-def validate_ptz_credentials(ip: str, puerto: int, usuario: str, contrasena: str) -> Dict[str, Any]:
+def _ping_onvif(ip: str, puerto: int, usuario: str, contrasena: str) -> Dict[str, Any]:
+    """
+    Comprobación ligera de una cámara ONVIF
+    
+    Solo abre el servicio devicemgmt (su GetCapabilities ya exige credenciales)
+    y pide GetSystemDateAndTime; no consulta perfiles ni configuración PTZ.
+    """
+    result = {
+        "valid": False,
+        "error": None,
+        "response_time": None,
+        "capabilities": []
+    }
+    
+    start_time = time.time()
+    
+    try:
+        cam = _get_onvif_camera(ip, puerto, usuario, contrasena)
+        cam.devicemgmt.GetSystemDateAndTime()
+        result["valid"] = True
+        logger.debug("✅ Cámara ONVIF accesible: %s", ip)
+        
+    except Exception as e:
+        result["error"] = str(e)
+        logger.error("❌ Cámara ONVIF no accesible %s: %s", ip, e)
+    
+    result["response_time"] = time.time() - start_time
+    return result
+
+
+async def ping_onvif(ip: str, puerto: int, usuario: str, contrasena: str) -> Dict[str, Any]:
+    """Versión asíncrona de la comprobación ligera de credenciales ONVIF"""
+    return await asyncio.to_thread(_ping_onvif, ip, puerto, usuario, contrasena)
+
+
+def validate_ptz_credentials(ip: str, puerto: int, usuario: str, contrasena: str,
+                             deep: bool = True) -> Dict[str, Any]:
     """
     Valida las credenciales PTZ sin crear una conexión permanente
     
@@ -782,10 +1373,16 @@ def validate_ptz_credentials(ip: str, puerto: int, usuario: str, contrasena: str
         puerto: Puerto
         usuario: Usuario
         contrasena: Contraseña
+        deep: Por defecto abre una conexión PTZ completa y detecta capacidades
+              (presets, posición); con False solo hace una comprobación ONVIF
+              ligera, sin capacidades
         
     Returns:
         Dict con resultado de la validación
     """
+    if not deep:
+        return _ping_onvif(ip, puerto, usuario, contrasena)
+    
     result = {
         "valid": False,
         "error": None,
@@ -820,17 +1417,34 @@ def validate_ptz_credentials(ip: str, puerto: int, usuario: str, contrasena: str
         except:
             pass
             
-        print(f"✅ Credenciales válidas para {ip}")
+        logger.debug("✅ Credenciales válidas para %s", ip)
         
     except Exception as e:
         result["valid"] = False
         result["error"] = str(e)
         result["response_time"] = time.time() - start_time
-        print(f"❌ Credenciales inválidas para {ip}: {e}")
+        logger.error("❌ Credenciales inválidas para %s: %s", ip, e)
     
     return result
 
 
+async def validate_ptz_credentials_many(cameras: list, deep: bool = True) -> list:
+    """
+    Valida las credenciales de varias cámaras en paralelo
+    
+    Args:
+        cameras: Lista de tuplas (ip, puerto, usuario, contrasena)
+        deep: Igual que en validate_ptz_credentials
+        
+    Returns:
+        Lista de resultados de validate_ptz_credentials en el mismo orden
+    """
+    if not deep:
+        return await asyncio.gather(*(ping_onvif(*spec) for spec in cameras))
+    return await asyncio.gather(*(asyncio.to_thread(validate_ptz_credentials, *spec, True)
+                                  for spec in cameras))
+
+
 # Funciones de utilidad adicionales
 def format_ptz_position(position: Dict[str, float]) -> str:
     """
@@ -865,15 +1479,15 @@ def calculate_movement_distance(pos1: Dict[str, float], pos2: Dict[str, float])
     """
     if not pos1 or not pos2:
         return 0.0
-        
-    dx = pos2.get("pan", 0) - pos1.get("pan", 0)
-    dy = pos2.get("tilt", 0) - pos1.get("tilt", 0)
-    dz = pos2.get("zoom", 0) - pos1.get("zoom", 0)
     
-    return (dx*dx + dy*dy + dz*dz) ** 0.5
+    return float(np.linalg.norm(_position_vector(pos2) - _position_vector(pos1)))
+
 
+# Paso de un tour de presets; step._asdict() da el formato de dict
+TourStep = namedtuple('TourStep', 'action preset hold_time sequence total')
 
-def generate_preset_tour(presets: list, hold_time: float = 3.0) -> list:
+
+def generate_preset_tour(presets: list, hold_time: float = 3.0) -> Tuple[TourStep, ...]:
     """
     Genera una secuencia optimizada para tour de presets
     
@@ -882,23 +1496,41 @@ def generate_preset_tour(presets: list, hold_time: float = 3.0) -> list:
         hold_time: Tiempo en cada preset
         
     Returns:
-        Lista de comandos para el tour
+        Tupla inmutable de TourStep (compartida entre llamadas iguales)
     """
+    return _preset_tour(tuple(presets), hold_time)
+
+
+@functools.lru_cache(maxsize=64)
+def _preset_tour(presets: tuple, hold_time: float) -> Tuple[TourStep, ...]:
     if len(presets) < 2:
-        return []
-        
-    tour_commands = []
-    
-    for i, preset in enumerate(presets):
-        tour_commands.append({
-            "action": "goto_preset",
-            "preset": preset,
-            "hold_time": hold_time,
-            "sequence": i + 1,
-            "total": len(presets)
-        })
+        return ()
     
-    return tour_commands
+    total = len(presets)
+    return tuple(
+        TourStep("goto_preset", preset, hold_time, i + 1, total)
+        for i, preset in enumerate(presets)
+    )
+
+
+if QT_AVAILABLE:
+    class _GuiDelivery(QObject):
+        """Ejecuta la entrega de detecciones en el hilo de la GUI (conexión en cola)"""
+
+        ready = pyqtSignal()
+
+        def __init__(self, callback):
+            super().__init__()
+            self._callback = callback
+            # El slot corre en el hilo del objeto: fijarlo al de la aplicación
+            app = QCoreApplication.instance()
+            if app is not None and self.thread() is not app.thread():
+                self.moveToThread(app.thread())
+            self.ready.connect(self._on_ready, Qt.ConnectionType.QueuedConnection)
+
+        @pyqtSlot()
+        def _on_ready(self):
+            self._callback()
 
 
 class PTZDetectionBridge:
@@ -913,60 +1545,253 @@ class PTZDetectionBridge:
         self.active_cameras = {}
         self.detection_count = 0
         self.last_detection_time = {}
+        self.min_confidence = 0.0
+
+        # Diálogo y update_detections resueltos una vez; se vuelven a
+        # resolver solo si ptz_system.dialog cambia de objeto
+        self._dialog = None
+        self._update_fn = None
+
+        # Consumidores por cámara de una fuente de detecciones central
+        # (una sola pasada YOLO repartida con dispatch)
+        self.subscribers: Dict[str, Any] = {}
+
+        # Las cámaras solo encolan; un único hilo entrega al diálogo la
+        # detección más reciente de cada cámara
+        self._q = queue.Queue(maxsize=DETECTION_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+        self._consumer = threading.Thread(target=self._drain, name="ptz-bridge", daemon=True)
+
+        # update_detections toca widgets Qt: el consumidor deja los lotes en
+        # _gui_pending y la entrega se hace en el hilo de la GUI. Sin
+        # QApplication (uso sin interfaz) se entrega en el propio consumidor
+        self._gui_pending: Dict[str, Any] = {}
+        self._gui_lock = threading.Lock()
+        self._gui = None
+        if QT_AVAILABLE and QCoreApplication.instance() is not None:
+            self._gui = _GuiDelivery(self._deliver_gui_pending)
+        self._consumer.start()
 
         # Verificar que el sistema PTZ tiene los métodos necesarios
         if not hasattr(self.ptz_system, 'dialog'):
-            print("⚠️ PTZ System sin atributo 'dialog'")
+            logger.warning("⚠️ PTZ System sin atributo 'dialog'")
 
     def send_detections(self, camera_id: str, detections: list, frame_size=(1920, 1080)):
-        """Enviar detecciones al sistema PTZ - MÉTODO CORREGIDO"""
+        """
+        Encolar detecciones para el sistema PTZ sin esperar al diálogo
+        
+        La entrega a update_detections es asíncrona (en el hilo de la GUI),
+        así que el resultado ya no indica si el diálogo aceptó el lote.
+        
+        Returns:
+            True si el lote válido quedó encolado; False si se descartó
+            (sin diálogo, seguimiento inactivo o detecciones no válidas)
+        """
         try:
             # Verificar que tenemos un sistema PTZ válido
             if not self.ptz_system:
-                print("❌ Sistema PTZ no disponible")
+                logger.error("❌ Sistema PTZ no disponible")
                 return False
 
             # Verificar que el diálogo existe y está activo
-            if not hasattr(self.ptz_system, 'dialog') or not self.ptz_system.dialog:
-                print(f"⚠️ PTZ Bridge: no hay diálogo para cámara {camera_id}")
+            dialog, update_fn = self._dialog_hooks()
+            if not dialog:
+                logger.debug("⚠️ PTZ Bridge: no hay diálogo para cámara %s", camera_id)
                 return False
 
-            dialog = self.ptz_system.dialog
-
             # Verificar que el tracking está activo
-            if not hasattr(dialog, 'tracking_active') or not dialog.tracking_active:
-                print(f"⚠️ PTZ Bridge: seguimiento no activo para cámara {camera_id}")
+            if not getattr(dialog, 'tracking_active', False):
+                logger.debug("⚠️ PTZ Bridge: seguimiento no activo para cámara %s", camera_id)
                 return False
 
-            # Validar detecciones
-            if not isinstance(detections, list) or not detections:
+            if update_fn is None:
+                logger.warning("⚠️ Diálogo PTZ sin método 'update_detections'")
                 return False
 
-            valid_detections = []
-            for det in detections:
-                if isinstance(det, dict) and 'bbox' in det and len(det.get('bbox', [])) == 4:
-                    valid_detections.append(det)
+            # Validar detecciones (ndarray N x 6 o lista de dicts)
+            if isinstance(detections, np.ndarray):
+                valid_detections = self._filter_detection_array(detections)
+                if not len(valid_detections):
+                    return False
+            else:
+                if not isinstance(detections, list) or not detections:
+                    return False
+
+                valid_detections = [
+                    det for det in detections
+                    if isinstance(det, dict) and len(det.get('bbox', ())) == 4
+                ]
 
-            if not valid_detections:
-                return False
+                if not valid_detections:
+                    return False
 
-            # Intentar enviar detecciones al diálogo
-            if hasattr(dialog, 'update_detections'):
-                success = dialog.update_detections(valid_detections, frame_size)
-                if success:
-                    self.detection_count += len(valid_detections)
-                    if camera_id not in self.active_cameras:
-                        self.active_cameras[camera_id] = {'detections_sent': 0}
-                    self.active_cameras[camera_id]['detections_sent'] += len(valid_detections)
-                return success
-            else:
-                print("⚠️ Diálogo PTZ sin método 'update_detections'")
+            item = (camera_id, valid_detections, frame_size)
+            q = self._q
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                # Descartar la más antigua: solo interesa la información reciente
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait(item)
+                except queue.Full:
+                    return False
+            return True
+
+        except (AttributeError, TypeError, ValueError) as e:
+            # Carga mal formada (p. ej. ndarray con forma inesperada)
+            logger.error("❌ Error en PTZ Bridge.send_detections: %s", e)
+            return False
+        except Exception:
+            # Frontera con los hilos de cámara/UI: nada debe escapar hacia ellos
+            logger.exception("❌ Error inesperado en PTZ Bridge.send_detections para %s", camera_id)
+            return False
+
+    def _drain(self):
+        """Hilo consumidor: agrupa por cámara y entrega solo lo último de cada una"""
+        # Métodos ligados a locales: el bucle corre durante toda la sesión
+        stopped = self._stop_event.is_set
+        get = self._q.get
+        get_nowait = self._q.get_nowait
+        post = self._post_to_gui if self._gui is not None else self._deliver_batch
+
+        while not stopped():
+            try:
+                camera_id, detections, frame_size = get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            latest = {camera_id: (detections, frame_size)}
+            while True:
+                try:
+                    camera_id, detections, frame_size = get_nowait()
+                except queue.Empty:
+                    break
+                latest[camera_id] = (detections, frame_size)
+
+            post(latest)
+
+    def _post_to_gui(self, latest: Dict[str, Any]):
+        """Dejar el lote para el hilo de la GUI; solo se señala si no había uno pendiente"""
+        with self._gui_lock:
+            idle = not self._gui_pending
+            # Si la GUI va atrasada, el lote nuevo sustituye al pendiente de cada cámara
+            self._gui_pending.update(latest)
+        if idle:
+            self._gui.ready.emit()
+
+    def _deliver_gui_pending(self):
+        """Slot en el hilo de la GUI: entregar lo acumulado desde la última señal"""
+        with self._gui_lock:
+            latest, self._gui_pending = self._gui_pending, {}
+        if not self._stop_event.is_set():
+            self._deliver_batch(latest)
+
+    def _deliver_batch(self, latest: Dict[str, Any]):
+        """Entregar la detección más reciente de cada cámara"""
+        for camera_id, (detections, frame_size) in latest.items():
+            try:
+                self._deliver(camera_id, detections, frame_size)
+            except Exception:
+                # Error de programación: traza completa sin detener la entrega
+                logger.exception("❌ Error inesperado entregando detecciones de %s", camera_id)
+
+    def _deliver(self, camera_id: str, detections, frame_size):
+        """Entregar un lote de detecciones al diálogo PTZ"""
+        try:
+            dialog, update_fn = self._dialog_hooks()
+            if not dialog or update_fn is None or not getattr(dialog, 'tracking_active', False):
                 return False
 
-        except Exception as e:
-            print(f"❌ Error en PTZ Bridge.send_detections: {e}")
+            if isinstance(detections, np.ndarray):
+                detections = self._array_to_detections(detections, frame_size)
+
+            success = update_fn(detections, frame_size)
+            if success:
+                sent = len(detections)
+                self.detection_count += sent
+                stats = self.active_cameras.setdefault(camera_id, {'detections_sent': 0})
+                stats['detections_sent'] = stats.get('detections_sent', 0) + sent
+            return success
+
+        except (AttributeError, KeyError, TypeError) as e:
+            logger.error("❌ Error en PTZ Bridge.send_detections: %s", e)
             return False
 
+    def subscribe(self, camera_id: str, callback):
+        """Registrar callback(detections, frame_size) para las detecciones de una cámara"""
+        self.subscribers[camera_id] = callback
+
+    def unsubscribe(self, camera_id: str):
+        """Eliminar el consumidor de una cámara"""
+        self.subscribers.pop(camera_id, None)
+
+    def dispatch(self, camera_to_dets: Dict[str, Any], frame_size=(1920, 1080)) -> int:
+        """
+        Repartir el resultado de una pasada de inferencia central
+        
+        Cada cámara con suscriptor recibe sus detecciones en su callback; las
+        demás siguen el camino normal de send_detections.
+        
+        Args:
+            camera_to_dets: {camera_id: ndarray (N, 6) o lista de dicts}
+            frame_size: Tamaño del frame de la inferencia
+            
+        Returns:
+            Número de cámaras que aceptaron sus detecciones
+        """
+        delivered = 0
+        for camera_id, detections in camera_to_dets.items():
+            callback = self.subscribers.get(camera_id)
+            if callback is None:
+                accepted = self.send_detections(camera_id, detections, frame_size)
+            else:
+                try:
+                    accepted = callback(detections, frame_size)
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    logger.error("❌ Error en suscriptor PTZ de %s: %s", camera_id, e)
+                    accepted = False
+            if accepted:
+                delivered += 1
+        return delivered
+
+    def _dialog_hooks(self):
+        """Diálogo actual y su update_detections (None si no existe)"""
+        dialog = getattr(self.ptz_system, 'dialog', None)
+        if dialog is not self._dialog:
+            self._dialog = dialog
+            self._update_fn = getattr(dialog, 'update_detections', None)
+        return dialog, self._update_fn
+
+    def _filter_detection_array(self, det_array: np.ndarray) -> np.ndarray:
+        """Filas con caja no degenerada y confianza >= min_confidence (núcleo Numba si está disponible)"""
+        if det_array.ndim != 2 or det_array.shape[1] < 6:
+            return det_array[:0]
+        boxes = np.ascontiguousarray(det_array[:, :6], dtype=np.float32)
+        return filter_boxes(boxes, self.min_confidence)
+
+    @staticmethod
+    def _array_to_detections(valid: np.ndarray, frame_size) -> list:
+        """Convierte las filas válidas al formato de dict que espera update_detections"""
+        frame_w, frame_h = frame_size
+        return [
+            {
+                'bbox': [x1, y1, x2, y2],
+                'cx': (x1 + x2) / 2,
+                'cy': (y1 + y2) / 2,
+                'width': x2 - x1,
+                'height': y2 - y1,
+                'confidence': conf,
+                'class': int(cls),
+                'frame_w': frame_w,
+                'frame_h': frame_h
+            }
+            for x1, y1, x2, y2, conf, cls in valid[:, :6].tolist()
+        ]
+
     def register_camera(self, camera_id: str, camera_data: dict):
         """Registrar una cámara en el bridge - MÉTODO CORREGIDO"""
         try:
@@ -975,44 +1800,41 @@ class PTZDetectionBridge:
                 'detections_sent': 0,
                 'registered_at': time.time()
             }
-            print(f"📷 Cámara registrada en PTZ Bridge: {camera_id}")
+            logger.info("📷 Cámara registrada en PTZ Bridge: %s", camera_id)
             return True
         except Exception as e:
-            print(f"❌ Error registrando cámara en PTZ Bridge: {e}")
+            logger.error("❌ Error registrando cámara en PTZ Bridge: %s", e)
             return False
 
     def get_status(self, camera_id=None):
         """Obtener estado del bridge"""
-        try:
-            status = {
-                'active': True,
-                'cameras_registered': len(self.active_cameras),
-                'total_detections': self.detection_count,
-                'system_available': self.ptz_system is not None
-            }
-
-            if self.ptz_system and hasattr(self.ptz_system, 'dialog'):
-                dialog = self.ptz_system.dialog
-                if dialog and hasattr(dialog, 'tracking_active'):
-                    status['tracking_active'] = dialog.tracking_active
-                else:
-                    status['tracking_active'] = False
-            else:
-                status['tracking_active'] = False
-
-            return status
-        except Exception as e:
-            return {'active': False, 'error': str(e)}
+        dialog = getattr(self.ptz_system, 'dialog', None)
+        return {
+            'active': True,
+            'cameras_registered': len(self.active_cameras),
+            'total_detections': self.detection_count,
+            'system_available': self.ptz_system is not None,
+            'tracking_active': bool(dialog) and getattr(dialog, 'tracking_active', False)
+        }
 
     def cleanup(self):
-        """Limpiar recursos del bridge"""
+        """Limpiar recursos del bridge (llamarlo varias veces no tiene efecto)"""
+        if self._stop_event.is_set():
+            return
         try:
+            self._stop_event.set()
+            if self._consumer.is_alive() and self._consumer is not threading.current_thread():
+                self._consumer.join(timeout=1.0)
+            with self._gui_lock:
+                self._gui_pending.clear()
             self.active_cameras.clear()
+            self.subscribers.clear()
             self.detection_count = 0
             self.last_detection_time.clear()
-            print("🧹 PTZ Bridge limpiado")
+            self._dialog = self._update_fn = None
+            logger.info("🧹 PTZ Bridge limpiado")
         except Exception as e:
-            print(f"❌ Error limpiando PTZ Bridge: {e}")
+            logger.error("❌ Error limpiando PTZ Bridge: %s", e)
 
 
 class PTZSystemWrapper:
@@ -1144,6 +1966,7 @@ PTZ_DEFAULTS = {
     "max_retries": 3,
     "position_tolerance": 0.01,
     "move_duration": 0.3,
+    "warmup": True,
     "zoom_step": 0.1,
     "pan_step": 0.1,
     "tilt_step": 0.1
@@ -4,15 +4,23 @@ Bridge de integración PTZ para conectar con enhanced_ptz_multi_object_dialog.py
 Este archivo proporciona la capa de conexión entre los sistemas PTZ y la UI
 """
 
+import functools
 import threading
 import time
 import json
 import os
-import queue
-from typing import Optional, Dict, List, Any, Callable
+import socket
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from operator import itemgetter
+from typing import Optional, Dict, List, Set, Any, Callable
 from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 # === CONFIGURACIÓN DE IMPORTS CONDICIONALES ===
 # Intentar importar sistemas PTZ con fallbacks
 
@@ -23,9 +31,9 @@ try:
         create_multi_object_tracker, get_preset_config, PRESET_CONFIGS
     )
     MULTI_OBJECT_AVAILABLE = True
-    print("✅ Sistema multi-objeto PTZ disponible")
+    logger.info("✅ Sistema multi-objeto PTZ disponible")
 except ImportError as e:
-    print(f"⚠️ Sistema multi-objeto no disponible: {e}")
+    logger.warning("⚠️ Sistema multi-objeto no disponible: %s", e)
     MULTI_OBJECT_AVAILABLE = False
     
     # Crear clases stub si no están disponibles
@@ -48,22 +56,74 @@ except ImportError as e:
 
 # Sistema básico PTZ
 try:
-    from core.ptz_control import PTZCameraONVIF
+    from core.ptz_control import PTZCameraONVIF, track_object_continuous
     BASIC_PTZ_AVAILABLE = True
-    print("✅ Sistema básico PTZ disponible")
+    logger.info("✅ Sistema básico PTZ disponible")
 except ImportError as e:
-    print(f"⚠️ Sistema básico PTZ no disponible: {e}")
+    logger.warning("⚠️ Sistema básico PTZ no disponible: %s", e)
     BASIC_PTZ_AVAILABLE = False
 
 # Librería ONVIF
 try:
-    from onvif import ONVIFCamera
+    from onvif import ONVIFCamera, ONVIFError
+    from zeep.exceptions import Fault
     ONVIF_AVAILABLE = True
+    # Fallos esperables de una llamada ONVIF (red, SOAP Fault, errores envueltos por onvif)
+    ONVIF_ERRORS = (OSError, Fault, ONVIFError)
 except ImportError as e:
-    print(f"⚠️ Librería ONVIF no disponible: {e}")
+    logger.warning("⚠️ Librería ONVIF no disponible: %s", e)
     ONVIF_AVAILABLE = False
+    ONVIF_ERRORS = (OSError,)
+
+# Umbrales para reenviar comandos al tracker básico
+try:
+    from core.ptz_control_enhanced import PTZ_DEFAULTS
+except ImportError:
+    PTZ_DEFAULTS = {"position_tolerance": 0.01, "move_duration": 0.3, "warmup": True}
+
+def _create_basic_tracker(ip: str, port: int, username: str, password: str):
+    """Tracker básico ONVIF; falla si la cámara no responde o no tiene perfil"""
+    # El constructor ya consulta GetProfiles: si la cámara no responde, lanza
+    tracker = PTZCameraONVIF(ip, port, username, password)
+    if not tracker.profile_token:
+        raise ConnectionError(f"Conexión PTZ falló para {ip}")
+    return tracker
+
+def _track_bbox(camera, bbox: tuple, frame_size: tuple):
+    """Seguimiento continuo del centro de bbox con un PTZCameraONVIF ya conectado"""
+    x1, y1, x2, y2 = bbox
+    frame_w, frame_h = frame_size
+    # Con cam la conexión no se vuelve a resolver: ip y credenciales no se usan
+    track_object_continuous(None, None, None, None, (x1 + x2) / 2, (y1 + y2) / 2,
+                            frame_w, frame_h, cam=camera)
+
+# Fábricas de tracker disponibles, resueltas una vez al importar y probadas en
+# orden: multi-objeto (preset marítimo) y, si falla, el básico
+_TRACKER_FACTORIES = []
+if MULTI_OBJECT_AVAILABLE:
+    _TRACKER_FACTORIES.append((
+        "multi-objeto",
+        lambda ip, port, username, password: create_multi_object_tracker(
+            ip, port, username, password, "maritime_standard")
+    ))
+if BASIC_PTZ_AVAILABLE:
+    _TRACKER_FACTORIES.append(("básico", _create_basic_tracker))
+_TRACKER_FACTORIES = tuple(_TRACKER_FACTORIES)
+
+# Intervalo mínimo entre comandos en nanosegundos (relojes monotonic_ns)
+_MOVE_DURATION_NS = int(PTZ_DEFAULTS["move_duration"] * 1e9)
 
-@dataclass
+# Hilos compartidos para los comandos de seguimiento del tracker básico
+TRACK_WORKERS = 8
+
+# Consultas GetStatus de calentamiento al crear una sesión
+WARMUP_STATUS_CALLS = 3
+
+# Límites de tiempo del diagnóstico: sondeo TCP y conexión ONVIF (segundos)
+DIAG_TCP_TIMEOUT = 1.5
+DIAG_ONVIF_TIMEOUT = 5.0
+
+@dataclass(slots=True)
 class PTZSessionInfo:
     """Información de sesión PTZ"""
     camera_id: str
@@ -73,29 +133,92 @@ class PTZSessionInfo:
     password: str
     tracker: Optional[Any] = None
     active: bool = False
-    start_time: float = 0.0
+    start_time: int = 0  # time.monotonic_ns()
+    warmed_up: bool = False
     detection_count: int = 0
     error_count: int = 0
     last_status: Dict = None
+    last_cmd_center: tuple = (0.5, 0.5)
+    last_cmd_ts: int = 0  # time.monotonic_ns() del último comando
+    # (ancho, alto, 0.5/ancho, 0.5/alto) del último frame_size visto
+    frame_norm: tuple = (0, 0, 0.0, 0.0)
+    # Métodos del tracker resueltos una vez (None si no existen)
+    update_fn: Optional[Callable] = None
+    track_fn: Optional[Callable] = None
+    get_status_fn: Optional[Callable] = None
+    
+    def __post_init__(self):
+        if self.tracker is not None:
+            self.bind_tracker(self.tracker)
+    
+    def bind_tracker(self, tracker):
+        """Asignar el tracker y resolver sus métodos para no sondearlos en cada frame
+        
+        Raises:
+            TypeError: si el tracker no admite detecciones por ningún camino
+        """
+        update_fn = getattr(tracker, 'update_detections', None)
+        track_fn = getattr(tracker, 'track_object_continuous', None)
+        if track_fn is None and BASIC_PTZ_AVAILABLE and isinstance(tracker, PTZCameraONVIF):
+            # PTZCameraONVIF no tiene método propio: seguimiento del módulo ptz_control
+            track_fn = functools.partial(_track_bbox, tracker)
+        if update_fn is None and track_fn is None:
+            raise TypeError(f"Tracker {type(tracker).__name__} sin update_detections "
+                            f"ni seguimiento continuo")
+        
+        self.tracker = tracker
+        self.update_fn = update_fn
+        self.track_fn = track_fn
+        self.get_status_fn = getattr(tracker, 'get_status', None)
 
 class PTZIntegrationBridge:
     """Bridge de integración PTZ para enhanced_ptz_multi_object_dialog.py"""
     
     def __init__(self):
         self.sessions: Dict[str, PTZSessionInfo] = {}
-        self.active_sessions: List[str] = []
-        self.detection_queue = queue.Queue(maxsize=500)
-        self.running = True
+        self.active_sessions: Set[str] = set()
+        self.running = False
+        
+        # Pool para track_object_continuous; los comandos que no caben en
+        # 2 * TRACK_WORKERS pendientes se descartan (llegarían obsoletos)
+        self._exec: Optional[ThreadPoolExecutor] = None
+        self._pending_tracks = 0
+        self._pending_lock = threading.Lock()
+        
+        # Agrupación: se guarda lo último de cada cámara y un único hilo de
+        # larga vida lo entrega, así el llamador nunca ejecuta el tracker
+        self.batching_enabled = True
+        self._chunk_buf: Dict[str, tuple] = {}
+        self._chunk_lock = threading.Lock()
+        self._chunk_event = threading.Event()
+        self._flush_stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._start_workers()
         
         # Callbacks para el diálogo
         self.on_status_update: Optional[Callable] = None
         self.on_error: Optional[Callable] = None
         self.on_detection_processed: Optional[Callable] = None
         
-        print("🔗 PTZ Integration Bridge inicializado")
+        logger.info("🔗 PTZ Integration Bridge inicializado")
+    
+    def _start_workers(self):
+        """Crear el pool de seguimiento y el hilo de entrega (también tras cleanup)"""
+        self._exec = ThreadPoolExecutor(max_workers=TRACK_WORKERS, thread_name_prefix="ptz-track")
+        # Cada hilo de entrega tiene su propio Event: uno anterior que aún no
+        # haya terminado no puede seguir corriendo junto al nuevo
+        self._flush_stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(self._flush_stop,),
+                                         name="ptz-detections", daemon=True)
+        self.running = True
+        self._flusher.start()
     
     def create_ptz_session(self, camera_data: Dict) -> bool:
-        """Crear nueva sesión PTZ"""
+        """Crear nueva sesión PTZ (reactiva el bridge si se limpió con cleanup)"""
+        if not self.running:
+            self._start_workers()
+            logger.info("🔗 PTZ Integration Bridge reactivado")
+        
         try:
             camera_id = camera_data.get('nombre', 'unknown')
             ip = camera_data.get('ip', '')
@@ -112,52 +235,69 @@ class PTZIntegrationBridge:
                 port=port,
                 username=username,
                 password=password,
-                start_time=time.time()
+                start_time=time.monotonic_ns()
             )
             
-            # Intentar crear tracker multi-objeto si está disponible
-            if MULTI_OBJECT_AVAILABLE:
+            # Primer tracker disponible que se pueda crear
+            for kind, factory in _TRACKER_FACTORIES:
                 try:
-                    # Usar configuración predefinida marítima
-                    config = PRESET_CONFIGS.get('maritime_standard', MultiObjectConfig())
-                    tracker = create_multi_object_tracker(ip, port, username, password, config)
-                    session.tracker = tracker
-                    print(f"✅ Tracker multi-objeto creado para {camera_id}")
+                    session.bind_tracker(factory(ip, port, username, password))
+                    logger.info("✅ Tracker %s creado para %s", kind, camera_id)
+                    break
                 except Exception as e:
-                    print(f"⚠️ Error creando tracker multi-objeto: {e}")
-                    session.tracker = None
-            
-            # Si no hay tracker multi-objeto, intentar básico
-            if not session.tracker and BASIC_PTZ_AVAILABLE:
-                try:
-                    tracker = PTZCameraONVIF(ip, port, username, password)
-                    if tracker.test_connection():
-                        session.tracker = tracker
-                        print(f"✅ Tracker básico creado para {camera_id}")
-                    else:
-                        print(f"❌ Conexión PTZ falló para {camera_id}")
-                except Exception as e:
-                    print(f"❌ Error creando tracker básico: {e}")
+                    logger.warning("⚠️ Error creando tracker %s: %s", kind, e)
             
             self.sessions[camera_id] = session
             
             if session.tracker:
-                self.active_sessions.append(camera_id)
+                self.active_sessions.add(camera_id)
                 return True
             else:
-                print(f"❌ No se pudo crear tracker para {camera_id}")
+                logger.error("❌ No se pudo crear tracker para %s", camera_id)
                 return False
                 
         except Exception as e:
-            print(f"❌ Error creando sesión PTZ: {e}")
+            logger.error("❌ Error creando sesión PTZ: %s", e)
             if self.on_error:
                 self.on_error(f"Error creando sesión: {e}")
             return False
     
+    def _schedule_warmup(self, session: PTZSessionInfo):
+        """Programar el calentamiento una vez que el tracker ya está conectado"""
+        if PTZ_DEFAULTS.get("warmup", False) and not session.warmed_up:
+            session.warmed_up = True
+            try:
+                self._exec.submit(self._warmup_session, session)
+            except RuntimeError:
+                # Pool ya cerrado por cleanup()
+                pass
+    
+    def _warmup_session(self, session: PTZSessionInfo):
+        """Pagar en segundo plano el arranque en frío de ONVIF/zeep
+        
+        Unas consultas GetStatus (solo lectura, no interrumpen un movimiento
+        en curso) obligan a zeep a compilar los tipos y a la cámara a abrir
+        la sesión, de modo que la primera detección real no sufre ese retardo.
+        """
+        tracker = session.tracker
+        ptz = getattr(tracker, 'ptz_service', None) or getattr(tracker, 'ptz', None)
+        token = getattr(tracker, 'profile_token', None)
+        if ptz is None or token is None:
+            logger.debug("⚠️ PTZ %s sin servicio conectado: sin calentamiento", session.camera_id)
+            return
+        
+        start = time.monotonic_ns()
+        try:
+            for _ in range(WARMUP_STATUS_CALLS):
+                ptz.GetStatus({'ProfileToken': token})
+            logger.debug("🔥 PTZ %s precalentado en %.2fs", session.camera_id, (time.monotonic_ns() - start) / 1e9)
+        except Exception as e:
+            logger.debug("⚠️ Calentamiento PTZ incompleto para %s: %s", session.camera_id, e)
+    
     def start_tracking(self, camera_id: str) -> bool:
         """Iniciar seguimiento para una cámara"""
         if camera_id not in self.sessions:
-            print(f"❌ Sesión {camera_id} no encontrada")
+            logger.error("❌ Sesión %s no encontrada", camera_id)
             return False
         
         session = self.sessions[camera_id]
@@ -170,19 +310,21 @@ class PTZIntegrationBridge:
                     success = session.tracker.start_tracking()
                     if success:
                         session.active = True
-                        print(f"✅ Seguimiento iniciado para {camera_id}")
+                        logger.info("✅ Seguimiento iniciado para %s", camera_id)
+                        self._schedule_warmup(session)
                         return True
                 else:
                     # Tracker básico - asumir que está listo
                     session.active = True
-                    print(f"✅ Tracker básico activado para {camera_id}")
+                    logger.info("✅ Tracker básico activado para %s", camera_id)
+                    self._schedule_warmup(session)
                     return True
             
-            print(f"❌ No hay tracker disponible para {camera_id}")
+            logger.error("❌ No hay tracker disponible para %s", camera_id)
             return False
             
         except Exception as e:
-            print(f"❌ Error iniciando tracking: {e}")
+            logger.error("❌ Error iniciando tracking: %s", e)
             if self.on_error:
                 self.on_error(f"Error iniciando tracking: {e}")
             return False
@@ -199,62 +341,137 @@ class PTZIntegrationBridge:
                 session.tracker.stop_tracking()
             
             session.active = False
-            if camera_id in self.active_sessions:
-                self.active_sessions.remove(camera_id)
+            self.active_sessions.discard(camera_id)
             
-            print(f"✅ Seguimiento detenido para {camera_id}")
+            logger.info("✅ Seguimiento detenido para %s", camera_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error deteniendo tracking: {e}")
+            logger.error("❌ Error deteniendo tracking: %s", e)
             return False
     
-    def update_detections(self, camera_id: str, detections: List[Dict], frame_size: tuple = (1920, 1080)):
-        """Actualizar detecciones para una cámara"""
+    def update_detections(self, camera_id: str, detections: List[Any], frame_size: tuple = (1920, 1080)):
+        """Actualizar detecciones para una cámara
+        
+        El tracker multi-objeto recibe dicts; el básico acepta también un
+        ndarray (N, 6) [x1, y1, x2, y2, conf, cls].
+        """
         if camera_id not in self.sessions or not self.sessions[camera_id].active:
             return
         
-        session = self.sessions[camera_id]
+        if not self.batching_enabled:
+            self._process_detections(self.sessions[camera_id], detections, frame_size)
+            return
+        
+        with self._chunk_lock:
+            self._chunk_buf[camera_id] = (detections, frame_size)
+            self._chunk_event.set()
+    
+    def _flush_loop(self, stop_event: threading.Event):
+        """Hilo de entrega: procesa lo último de cada cámara en cuanto está libre
+        
+        No espera ventana fija; lo que llega mientras procesa se agrupa y solo
+        se entrega la detección más reciente de cada cámara.
+        """
+        while not stop_event.is_set():
+            if not self._chunk_event.wait(0.5) or stop_event.is_set():
+                continue
+            with self._chunk_lock:
+                chunk, self._chunk_buf = self._chunk_buf, {}
+                self._chunk_event.clear()
+            
+            for camera_id, (detections, frame_size) in chunk.items():
+                session = self.sessions.get(camera_id)
+                if session is None or not session.active:
+                    continue
+                try:
+                    self._process_detections(session, detections, frame_size)
+                except Exception:
+                    # Error de programación: traza completa sin detener el hilo
+                    logger.exception("❌ Error inesperado procesando detecciones de %s", camera_id)
+    
+    def _process_detections(self, session: PTZSessionInfo, detections: List[Any], frame_size: tuple):
+        """Procesar las detecciones de una cámara según su tipo de tracker"""
+        camera_id = session.camera_id
         
         try:
             # Procesar detecciones según el tipo de tracker
             if session.tracker:
-                if hasattr(session.tracker, 'update_detections'):
-                    # Tracker multi-objeto
-                    session.tracker.update_detections(detections, frame_size)
+                if session.update_fn is not None:
+                    # Tracker multi-objeto (el tamaño de frame viaja en cada detección)
+                    session.update_fn(detections)
                     session.detection_count += len(detections)
-                elif hasattr(session.tracker, 'track_object_continuous'):
+                elif session.track_fn is not None:
                     # Tracker básico - usar la primera detección
-                    if detections:
-                        best_detection = max(detections, key=lambda x: x.get('confidence', 0))
-                        # Convertir a formato esperado por tracker básico
-                        x1 = int(best_detection['x1'])
-                        y1 = int(best_detection['y1'])
-                        x2 = int(best_detection['x2'])
-                        y2 = int(best_detection['y2'])
+                    if len(detections):
+                        if isinstance(detections, np.ndarray):
+                            # Matriz (N, 6) [x1, y1, x2, y2, conf, cls]
+                            best = detections[detections[:, 4].argmax()]
+                            x1, y1, x2, y2 = int(best[0]), int(best[1]), int(best[2]), int(best[3])
+                        else:
+                            # Los dicts deben traer 'confidence' y 'bbox' [x1, y1, x2, y2]
+                            best_detection = max(detections, key=itemgetter('confidence'))
+                            x1, y1, x2, y2 = map(int, best_detection['bbox'])
                         
-                        # Ejecutar tracking en hilo separado para no bloquear
-                        def track_async():
-                            try:
-                                session.tracker.track_object_continuous((x1, y1, x2, y2), frame_size)
-                            except Exception as e:
-                                print(f"Error en tracking básico: {e}")
+                        # Solo se envía si el objetivo se movió lo suficiente y el
+                        # movimiento anterior ya ha terminado
+                        frame_norm = session.frame_norm
+                        if frame_norm[0] != frame_size[0] or frame_norm[1] != frame_size[1]:
+                            frame_w, frame_h = frame_size
+                            frame_norm = session.frame_norm = (frame_w, frame_h, 0.5 / frame_w, 0.5 / frame_h)
+                        cx = (x1 + x2) * frame_norm[2]
+                        cy = (y1 + y2) * frame_norm[3]
+                        last_cx, last_cy = session.last_cmd_center
+                        now = time.monotonic_ns()
                         
-                        thread = threading.Thread(target=track_async, daemon=True)
-                        thread.start()
-                        
-                        session.detection_count += 1
+                        # Ejecutar tracking en el pool para no bloquear
+                        if (max(abs(cx - last_cx), abs(cy - last_cy)) >= PTZ_DEFAULTS["position_tolerance"]
+                                and now - session.last_cmd_ts >= _MOVE_DURATION_NS
+                                and self._submit_track(session, (x1, y1, x2, y2), frame_size)):
+                            session.last_cmd_center = (cx, cy)
+                            session.last_cmd_ts = now
+                            session.detection_count += 1
             
             # Notificar al diálogo si hay callback
             if self.on_detection_processed:
                 self.on_detection_processed(camera_id, len(detections))
                 
-        except Exception as e:
+        except ONVIF_ERRORS + (KeyError, TypeError, ValueError) as e:
+            # Fallo de red/ONVIF o detecciones con formato incorrecto
             session.error_count += 1
-            print(f"❌ Error procesando detecciones: {e}")
+            logger.error("❌ Error procesando detecciones: %s", e)
             if self.on_error:
                 self.on_error(f"Error procesando detecciones: {e}")
     
+    def _submit_track(self, session: PTZSessionInfo, bbox: tuple, frame_size: tuple) -> bool:
+        """Encolar un comando de seguimiento salvo que el pool vaya retrasado"""
+        with self._pending_lock:
+            if self._pending_tracks >= 2 * TRACK_WORKERS:
+                logger.debug("⏭️ Comando PTZ descartado para %s (pool saturado)", session.camera_id)
+                return False
+            self._pending_tracks += 1
+        
+        def track_async():
+            try:
+                session.track_fn(bbox, frame_size)
+            except ONVIF_ERRORS as e:
+                logger.error("❌ Error en tracking básico: %s", e)
+            except Exception:
+                # El executor se tragaría la excepción: dejar la traza completa
+                logger.exception("❌ Error inesperado en tracking básico de %s", session.camera_id)
+            finally:
+                with self._pending_lock:
+                    self._pending_tracks -= 1
+        
+        try:
+            self._exec.submit(track_async)
+        except RuntimeError:
+            # Pool ya cerrado por cleanup()
+            with self._pending_lock:
+                self._pending_tracks -= 1
+            return False
+        return True
+    
     def get_session_status(self, camera_id: str) -> Dict:
         """Obtener estado de una sesión"""
         if camera_id not in self.sessions:
@@ -271,7 +488,7 @@ class PTZIntegrationBridge:
             'active': session.active,
             'ip': session.ip,
             'port': session.port,
-            'uptime': time.time() - session.start_time,
+            'uptime': (time.monotonic_ns() - session.start_time) / 1e9,
             'detection_count': session.detection_count,
             'error_count': session.error_count,
             'tracker_type': 'none'
@@ -279,12 +496,12 @@ class PTZIntegrationBridge:
         
         # Determinar tipo de tracker
         if session.tracker:
-            if hasattr(session.tracker, 'get_status'):
+            if session.get_status_fn is not None:
                 status['tracker_type'] = 'multi_object'
                 try:
-                    tracker_status = session.tracker.get_status()
+                    tracker_status = session.get_status_fn()
                     status.update(tracker_status)
-                except:
+                except ONVIF_ERRORS + (TypeError, ValueError):
                     pass
             else:
                 status['tracker_type'] = 'basic'
@@ -297,18 +514,32 @@ class PTZIntegrationBridge:
         return {cam_id: self.get_session_status(cam_id) for cam_id in self.sessions}
     
     def cleanup(self):
-        """Limpiar recursos"""
-        print("🧹 Limpiando PTZ Integration Bridge...")
+        """Limpiar recursos (llamarlo varias veces no tiene efecto)"""
+        if not self.running and not self.sessions:
+            return
+        logger.info("🧹 Limpiando PTZ Integration Bridge...")
+        self.running = False
         
-        # Detener todas las sesiones
-        for camera_id in list(self.sessions.keys()):
-            self.stop_tracking(camera_id)
+        # Detener los trackers en bloque y vaciar las tablas una sola vez
+        for camera_id, session in self.sessions.items():
+            if session.tracker and hasattr(session.tracker, 'stop_tracking'):
+                try:
+                    session.tracker.stop_tracking()
+                except Exception as e:
+                    logger.error("❌ Error deteniendo tracking de %s: %s", camera_id, e)
+            session.active = False
         
         self.sessions.clear()
         self.active_sessions.clear()
-        self.running = False
+        with self._chunk_lock:
+            self._chunk_buf.clear()
+        self._flush_stop.set()
+        self._chunk_event.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=1.0)
+        self._exec.shutdown(wait=False, cancel_futures=True)
         
-        print("✅ PTZ Integration Bridge limpiado")
+        logger.info("✅ PTZ Integration Bridge limpiado")
 
 # === FUNCIONES DE INTEGRACIÓN PARA EL DIÁLOGO ===
 
@@ -340,10 +571,10 @@ def create_multi_object_ptz_system(camera_list: List[Dict], parent=None):
         return dialog, bridge
         
     except ImportError as e:
-        print(f"❌ Error importando diálogo PTZ: {e}")
+        logger.error("❌ Error importando diálogo PTZ: %s", e)
         return None, None
     except Exception as e:
-        print(f"❌ Error creando sistema PTZ: {e}")
+        logger.error("❌ Error creando sistema PTZ: %s", e)
         return None, None
 
 # === FUNCIONES DE DIAGNÓSTICO ===
@@ -375,11 +606,31 @@ def diagnose_ptz_system(camera_data: Dict = None) -> Dict[str, Any]:
         
         # Intentar conexión si está configurada
         if results['camera']['config_complete'] and ONVIF_AVAILABLE:
+            # Sondeo TCP rápido: una cámara inalcanzable no bloquea el diagnóstico
             try:
-                test_camera = ONVIFCamera(ip, port, username, password)
-                results['camera']['connection_test'] = True
-            except:
+                socket.create_connection((ip, int(port)), timeout=DIAG_TCP_TIMEOUT).close()
+                results['camera']['reachable'] = True
+            except OSError:
+                results['camera']['reachable'] = False
+            
+            if results['camera']['reachable']:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptz-diag")
+                future = executor.submit(ONVIFCamera, ip, port, username, password)
+                try:
+                    future.result(timeout=DIAG_ONVIF_TIMEOUT)
+                    results['camera']['connection_test'] = True
+                except FutureTimeoutError:
+                    results['camera']['connection_test'] = False
+                    results['recommendations'].append(
+                        f"La cámara {ip}:{port} no respondió a ONVIF en {DIAG_ONVIF_TIMEOUT:.0f}s"
+                    )
+                except Exception:
+                    results['camera']['connection_test'] = False
+                finally:
+                    executor.shutdown(wait=False)
+            else:
                 results['camera']['connection_test'] = False
+                results['recommendations'].append(f"No hay conexión TCP con {ip}:{port}")
         else:
             results['camera']['connection_test'] = None
     
@@ -6,24 +6,87 @@ Soluciona problemas comunes de seguimiento y calibración
 
 import time
 import json
+import logging
 import threading
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
-from datetime import datetime
+
+logger = logging.getLogger(__name__)
 
 # Importar calibración
 try:
-    from core.ptz_calibration_system import get_calibration_for_camera, track_object_calibrated
+    from core.ptz_calibration_system import (
+        CalibrationData, PTZCalibrationSystem, get_calibration_for_camera
+    )
     CALIBRATION_AVAILABLE = True
 except ImportError:
     CALIBRATION_AVAILABLE = False
 
+# Asignación óptima para asociar objetos entre frames (opcional)
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 # Importar PTZ básico
 try:
-    from core.ptz_control import PTZCameraONVIF
+    from core.ptz_control import VELOCITY_REFRESH_AGE, evict_ptz_camera, get_ptz_camera
     PTZ_BASIC_AVAILABLE = True
 except ImportError:
     PTZ_BASIC_AVAILABLE = False
+    VELOCITY_REFRESH_AGE = 1.0
+
+# Cambio mínimo de velocidad (pan o tilt) para reenviar un ContinuousMove
+VELOCITY_DEADBAND = 0.03
+
+# Sin detecciones durante este tiempo (s) el watchdog detiene la cámara
+WATCHDOG_TIMEOUT = 0.5
+
+# Tiempo (s) sin verse tras el cual un objeto deja de estar activo
+OBJECT_TTL = 3.0
+
+# IoU mínimo para considerar que una detección es el mismo objeto del frame anterior
+IOU_MATCH_THRESHOLD = 0.3
+
+# Duración (s) de la prueba de movimiento de run_movement_test
+MOVEMENT_TEST_DURATION = 1.0
+
+# Intervalo mínimo (s) entre intentos de reconexión tras un fallo de la cámara
+RECONNECT_INTERVAL = 5.0
+
+def _clamp(value: float, low: float, high: float) -> float:
+    """Limitar un escalar a [low, high] sin pasar por NumPy"""
+    return low if value < low else high if value > high else value
+
+def _iou_batch(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU de todas las parejas entre a (K, 4) y b (M, 4) en formato [x1, y1, x2, y2]"""
+    xx1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    yy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    xx2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    yy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+def _match_iou(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Parejas (fila, columna) con IoU >= threshold: asignación óptima con SciPy o voraz"""
+    if SCIPY_AVAILABLE:
+        rows, cols = linear_sum_assignment(-iou)
+        return [(int(r), int(c)) for r, c in zip(rows, cols) if iou[r, c] >= threshold]
+    
+    pairs = []
+    iou = iou.copy()
+    while iou.size:
+        r, c = np.unravel_index(iou.argmax(), iou.shape)
+        if iou[r, c] < threshold:
+            break
+        pairs.append((int(r), int(c)))
+        iou[r, :] = -1.0
+        iou[:, c] = -1.0
+    return pairs
 
 class FixedPTZTracker:
     """Tracker PTZ corregido con mejor manejo de errores"""
@@ -37,7 +100,21 @@ class FixedPTZTracker:
         self.is_connected = False
         self.tracking_active = False
         self.last_movement_time = 0
+        self._last_connect_attempt = 0.0
         self.movement_lock = threading.Lock()
+        self._log_prefix = f"PTZ {ip}: "
+        
+        # Controlador de velocidad persistente: última velocidad ordenada
+        # (pan, tilt) y watchdog que detiene la cámara si dejan de llegar
+        # detecciones
+        self._last_cmd = (0.0, 0.0)
+        self._last_cmd_ts = 0.0
+        self._last_detection_ts = 0.0
+        self._watchdog_stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        
+        # Sistema de calibración reutilizado entre detecciones (ver _calibrated_velocity)
+        self._calib_system = None
         
         # Estadísticas
         self.successful_moves = 0
@@ -57,33 +134,38 @@ class FixedPTZTracker:
     def connect(self) -> bool:
         """Conectar a la cámara PTZ con verificación mejorada"""
         if not PTZ_BASIC_AVAILABLE:
-            self._log("❌ Sistema PTZ básico no disponible")
+            self._log("❌ Sistema PTZ básico no disponible", level=logging.ERROR)
             return False
         
+        self._last_connect_attempt = time.monotonic()
         try:
-            self._log(f"🔗 Conectando a {self.ip}:{self.port}...")
+            self._log("🔗 Conectando a %s:%s...", self.ip, self.port)
             
-            # Crear conexión
-            self.camera = PTZCameraONVIF(self.ip, self.port, self.username, self.password)
+            # Conexión compartida por (ip, puerto, credenciales): el perfil y las
+            # peticiones ONVIF se resuelven una sola vez y se reutilizan en
+            # cada movimiento y en cada reconexión
+            self.camera = get_ptz_camera(self.ip, self.port, self.username, self.password)
             
-            # Verificar conexión con prueba básica
-            profiles = self.camera.media.GetProfiles()
-            if not profiles:
-                self._log("❌ No se encontraron perfiles PTZ")
+            # PTZCameraONVIF ya validó GetProfiles al crearse
+            if not self.camera.profile_token:
+                self._log("❌ No se encontraron perfiles PTZ", level=logging.ERROR)
+                evict_ptz_camera(self.camera)
                 return False
             
             # Verificar servicio PTZ
             ptz_service = self.camera.ptz
             if not ptz_service:
-                self._log("❌ Servicio PTZ no disponible")
+                self._log("❌ Servicio PTZ no disponible", level=logging.ERROR)
                 return False
             
             self.is_connected = True
-            self._log(f"✅ Conectado exitosamente ({len(profiles)} perfiles)")
+            self._log("✅ Conectado exitosamente (perfil %s)", self.camera.profile_token)
             return True
             
         except Exception as e:
-            self._log(f"❌ Error de conexión: {e}")
+            self._log("❌ Error de conexión: %s", e, level=logging.ERROR)
+            # Una conexión compartida que falla no debe quedarse en la caché
+            evict_ptz_camera(self.camera)
             self.camera = None
             self.is_connected = False
             return False
@@ -99,12 +181,27 @@ class FixedPTZTracker:
         self.failed_moves = 0
         self.total_detections = 0
         
+        self._last_detection_ts = time.monotonic()
+        # Cada watchdog tiene su propio Event: uno anterior que aún no ha
+        # terminado no puede confundirse con el nuevo
+        if self._watchdog is None or self._watchdog_stop.is_set():
+            self._watchdog_stop = threading.Event()
+            self._watchdog = threading.Thread(
+                target=self._watchdog_loop, args=(self._watchdog_stop,),
+                name=f"ptz-watchdog-{self.ip}", daemon=True
+            )
+            self._watchdog.start()
+        
         self._log("🎯 Seguimiento iniciado")
         return True
     
     def stop_tracking(self):
         """Detener seguimiento"""
         self.tracking_active = False
+        self._watchdog_stop.set()
+        watchdog = self._watchdog
+        if watchdog is not None and watchdog is not threading.current_thread():
+            watchdog.join(timeout=1.0)
         
         # Detener movimiento actual
         if self.camera:
@@ -113,16 +210,23 @@ class FixedPTZTracker:
                 self._log("⏹️ Movimiento detenido")
             except:
                 pass
+        self._last_cmd = (0.0, 0.0)
         
         self._log("🛑 Seguimiento detenido")
-        self._log(f"📊 Estadísticas: {self.successful_moves} exitosos, {self.failed_moves} fallidos")
+        self._log("📊 Estadísticas: %d exitosos, %d fallidos", self.successful_moves, self.failed_moves)
     
     def track_object(self, detection: Dict, frame_size: Tuple[int, int]) -> bool:
         """Seguir un objeto detectado con mejoras"""
-        if not self.tracking_active or not self.is_connected:
+        if not self.tracking_active:
             return False
         
+        # Tras un fallo de la cámara se reconecta, como mucho cada RECONNECT_INTERVAL
+        if not self.is_connected:
+            if time.monotonic() - self._last_connect_attempt < RECONNECT_INTERVAL or not self.connect():
+                return False
+        
         self.total_detections += 1
+        self._last_detection_ts = time.monotonic()
         
         try:
             # Extraer información de la detección
@@ -131,7 +235,7 @@ class FixedPTZTracker:
             class_name = detection.get('class', 'unknown')
             
             if len(bbox) != 4:
-                self._log(f"❌ Bbox inválido: {bbox}")
+                self._log("❌ Bbox inválido: %s", bbox, level=logging.WARNING)
                 return False
             
             x1, y1, x2, y2 = bbox
@@ -139,11 +243,13 @@ class FixedPTZTracker:
             center_y = (y1 + y2) / 2
             frame_w, frame_h = frame_size
             
-            self._log(f"🎯 Rastreando {class_name} (conf: {confidence:.2f}) en ({center_x:.0f}, {center_y:.0f})")
+            self._log("🎯 Rastreando %s (conf: %.2f) en (%.0f, %.0f)", class_name, confidence, center_x, center_y)
             
             # Verificar si necesita movimiento
             if self._is_centered(center_x, center_y, frame_w, frame_h):
                 self._log("📍 Objeto ya está centrado")
+                with self.movement_lock:
+                    self._halt()
                 return True
             
             # Verificar intervalo mínimo entre movimientos
@@ -163,7 +269,7 @@ class FixedPTZTracker:
             return success
             
         except Exception as e:
-            self._log(f"❌ Error en seguimiento: {e}")
+            self._log("❌ Error en seguimiento: %s", e, level=logging.ERROR)
             self.failed_moves += 1
             return False
     
@@ -171,73 +277,135 @@ class FixedPTZTracker:
                          frame_w: int, frame_h: int) -> bool:
         """Ejecutar movimiento PTZ con diferentes métodos"""
         
-        # Método 1: Usar calibración si está disponible
+        # Método 1: Usar calibración si está disponible. Solo se calcula la
+        # velocidad: el envío pasa por el mismo controlador persistente
         if self.config['use_calibration'] and CALIBRATION_AVAILABLE:
             try:
-                success = track_object_calibrated(
-                    self.ip, self.port, self.username, self.password,
-                    (center_x, center_y), (frame_w, frame_h)
-                )
-                if success:
-                    self._log("✅ Movimiento calibrado exitoso")
-                    return True
-                else:
-                    self._log("⚠️ Movimiento calibrado falló, probando método básico")
+                pan_speed, tilt_speed = self._calibrated_velocity(center_x, center_y, frame_w, frame_h)
+                self._log("🎯 Velocidad calibrada: PAN=%.3f, TILT=%.3f", pan_speed, tilt_speed)
+                return self._apply_velocity(pan_speed, tilt_speed)
             except Exception as e:
-                self._log(f"⚠️ Error en calibración: {e}, usando método básico")
+                self._log("⚠️ Error en calibración: %s, usando método básico", e, level=logging.WARNING)
         
         # Método 2: Cálculo básico mejorado
         return self._basic_movement(center_x, center_y, frame_w, frame_h)
     
+    def _calibrated_velocity(self, center_x: float, center_y: float,
+                             frame_w: int, frame_h: int) -> Tuple[float, float]:
+        """Velocidades (pan, tilt) según la calibración guardada de la cámara"""
+        calibration = get_calibration_for_camera(self.ip) or CalibrationData(camera_ip=self.ip)
+        
+        system = self._calib_system
+        if system is None:
+            system = self._calib_system = PTZCalibrationSystem()
+        # Solo se sustituye (y se recalculan las constantes) si el fichero cambió
+        if system.current_calibration != calibration:
+            system.current_calibration = calibration
+        
+        return system.get_calibrated_movement((center_x, center_y), (frame_w, frame_h))
+    
     def _basic_movement(self, center_x: float, center_y: float, 
                        frame_w: int, frame_h: int) -> bool:
         """Movimiento PTZ básico mejorado"""
         
+        # Calcular centro del frame
+        frame_center_x = frame_w / 2
+        frame_center_y = frame_h / 2
+        
+        # Calcular diferencias
+        dx = center_x - frame_center_x
+        dy = center_y - frame_center_y
+        
+        # Normalizar a rango -1 a 1
+        norm_dx = dx / (frame_w / 2)
+        norm_dy = dy / (frame_h / 2)
+        
+        # Aplicar zona muerta
+        deadzone = 0.1
+        if abs(norm_dx) < deadzone:
+            norm_dx = 0
+        if abs(norm_dy) < deadzone:
+            norm_dy = 0
+        
+        # Negativo para arriba
+        return self._apply_velocity(norm_dx * 0.5, -norm_dy * 0.5)
+    
+    def _apply_velocity(self, pan_speed: float, tilt_speed: float) -> bool:
+        """Ordenar una velocidad a través del controlador persistente
+        (límite de velocidad, banda muerta, parada y watchdog)"""
+        max_speed = self.config['max_speed']
+        pan_speed = _clamp(pan_speed, -max_speed, max_speed)
+        tilt_speed = _clamp(tilt_speed, -max_speed, max_speed)
+        
         with self.movement_lock:
             try:
-                # Calcular centro del frame
-                frame_center_x = frame_w / 2
-                frame_center_y = frame_h / 2
-                
-                # Calcular diferencias
-                dx = center_x - frame_center_x
-                dy = center_y - frame_center_y
-                
-                # Normalizar a rango -1 a 1
-                norm_dx = dx / (frame_w / 2)
-                norm_dy = dy / (frame_h / 2)
-                
-                # Aplicar zona muerta
-                deadzone = 0.1
-                if abs(norm_dx) < deadzone:
-                    norm_dx = 0
-                if abs(norm_dy) < deadzone:
-                    norm_dy = 0
-                
-                # Calcular velocidades
-                max_speed = self.config['max_speed']
-                pan_speed = float(np.clip(norm_dx * 0.5, -max_speed, max_speed))
-                tilt_speed = float(np.clip(-norm_dy * 0.5, -max_speed, max_speed))  # Negativo para arriba
-                
                 if pan_speed == 0 and tilt_speed == 0:
                     self._log("📍 Objeto centrado (zona muerta)")
+                    self._halt()
                     return True
                 
-                self._log(f"🎯 Movimiento: PAN={pan_speed:.3f}, TILT={tilt_speed:.3f}")
+                # La cámara ya se mueve a esta velocidad: no repetir el comando
+                last_pan, last_tilt = self._last_cmd
+                if max(abs(pan_speed - last_pan), abs(tilt_speed - last_tilt)) < VELOCITY_DEADBAND:
+                    return True
                 
-                # Ejecutar movimiento
-                self.camera.continuous_move(pan_speed, tilt_speed, 0)
+                self._log("🎯 Movimiento: PAN=%.3f, TILT=%.3f", pan_speed, tilt_speed)
                 
-                # Movimiento por tiempo corto
-                time.sleep(0.2)
-                self.camera.stop()
+                # Velocidad persistente: sigue activa hasta la siguiente
+                # corrección, el centrado o el watchdog
+                self.camera.continuous_move(pan_speed, tilt_speed, 0.0)
+                self._last_cmd = (pan_speed, tilt_speed)
+                self._last_cmd_ts = time.monotonic()
                 
                 return True
                 
             except Exception as e:
-                self._log(f"❌ Error en movimiento básico: {e}")
+                self._log("❌ Error en movimiento: %s", e, level=logging.ERROR)
+                self._drop_connection()
                 return False
     
+    def _drop_connection(self):
+        """Retirar una conexión que ha fallado; track_object reconectará (requiere movement_lock)"""
+        evict_ptz_camera(self.camera)
+        self.is_connected = False
+        self._last_cmd = (0.0, 0.0)
+    
+    def _halt(self):
+        """Detener la cámara si tiene una velocidad ordenada (requiere movement_lock)"""
+        if self._last_cmd == (0.0, 0.0):
+            return
+        self.camera.stop()
+        self._last_cmd = (0.0, 0.0)
+    
+    def _watchdog_loop(self, stop_event: threading.Event):
+        """Detener la cámara si no llegan detecciones durante WATCHDOG_TIMEOUT
+        y renovar la velocidad ordenada antes de que venza el timeout PTZ"""
+        while not stop_event.wait(WATCHDOG_TIMEOUT / 5):
+            if self._last_cmd == (0.0, 0.0):
+                continue
+            now = time.monotonic()
+            if now - self._last_detection_ts < WATCHDOG_TIMEOUT:
+                if now - self._last_cmd_ts < VELOCITY_REFRESH_AGE:
+                    continue
+                # Objetivo estable: la banda muerta no reenvía, así que se
+                # renueva aquí el ContinuousMove para que la cámara no se pare
+                with self.movement_lock:
+                    if stop_event.is_set() or self._last_cmd == (0.0, 0.0):
+                        continue
+                    try:
+                        self.camera.continuous_move(*self._last_cmd, 0.0)
+                        self._last_cmd_ts = now
+                    except Exception as e:
+                        self._log("❌ Error renovando movimiento: %s", e, level=logging.ERROR)
+                        self._drop_connection()
+                continue
+            with self.movement_lock:
+                try:
+                    self._halt()
+                    self._log("⏱️ Sin detecciones: movimiento detenido")
+                except Exception as e:
+                    self._log("❌ Error deteniendo movimiento: %s", e, level=logging.ERROR)
+    
     def _is_centered(self, obj_x: float, obj_y: float, frame_w: int, frame_h: int) -> bool:
         """Verificar si el objeto está centrado"""
         center_x = frame_w / 2
@@ -250,11 +418,17 @@ class FixedPTZTracker:
         
         return dx < tolerance and dy < tolerance
     
-    def _log(self, message: str):
-        """Log con timestamp"""
-        if self.config['debug_mode']:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"[{timestamp}] PTZ {self.ip}: {message}")
+    def _log(self, message: str, *args, level: int = logging.DEBUG):
+        """Log con identificación; sale sin formatear nada si el nivel está desactivado
+        
+        debug_mode solo filtra los mensajes DEBUG: los fallos (WARNING/ERROR)
+        se registran siempre.
+        """
+        if level <= logging.DEBUG and not self.config['debug_mode']:
+            return
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, self._log_prefix + message, *args)
     
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado del tracker"""
@@ -278,6 +452,7 @@ class FixedMultiObjectTracker:
         self.current_target = None
         self.last_switch_time = 0
         self.switch_interval = 5.0  # Cambiar objetivo cada 5 segundos
+        self._next_obj_id = 0  # IDs estables: se asocian por IoU entre frames
         
         # Configuración
         self.config = {
@@ -291,6 +466,13 @@ class FixedMultiObjectTracker:
                 'center_proximity': 0.1
             }
         }
+        
+        # Pesos y normalizaciones de prioridad precalculados:
+        # (confianza, tamaño, movimiento, distancia al centro). El vector de
+        # pesos se reconstruye si cambia config['priority_weights']
+        self._weight_key: Optional[Tuple[float, ...]] = None
+        self._weight_vec: Optional[np.ndarray] = None
+        self._inv_norm = 1.0 / np.array([1.0, 50000.0, 1.0, 1000.0], dtype=np.float32)
     
     def initialize(self) -> bool:
         """Inicializar tracker multi-objeto"""
@@ -305,14 +487,14 @@ class FixedMultiObjectTracker:
             
             # Conectar
             if self.tracker.connect():
-                self._log("✅ Tracker multi-objeto inicializado")
+                self._log("✅ Tracker multi-objeto inicializado", level=logging.INFO)
                 return True
             else:
-                self._log("❌ Error inicializando tracker")
+                self._log("❌ Error inicializando tracker", level=logging.ERROR)
                 return False
                 
         except Exception as e:
-            self._log(f"❌ Error en inicialización: {e}")
+            self._log("❌ Error en inicialización: %s", e, level=logging.ERROR)
             return False
     
     def start_tracking(self) -> bool:
@@ -326,7 +508,7 @@ class FixedMultiObjectTracker:
             self.active_objects.clear()
             self.current_target = None
             self.last_switch_time = time.time()
-            self._log("🚀 Seguimiento multi-objeto iniciado")
+            self._log("🚀 Seguimiento multi-objeto iniciado", level=logging.INFO)
         
         return success
     
@@ -337,7 +519,7 @@ class FixedMultiObjectTracker:
         
         self.active_objects.clear()
         self.current_target = None
-        self._log("🛑 Seguimiento multi-objeto detenido")
+        self._log("🛑 Seguimiento multi-objeto detenido", level=logging.INFO)
     
     def update_tracking(self, detections: List[Dict], frame_size: Tuple[int, int]) -> bool:
         """Actualizar seguimiento con múltiples detecciones"""
@@ -356,16 +538,19 @@ class FixedMultiObjectTracker:
             self._update_active_objects(valid_detections)
             
             # Seleccionar objetivo actual
-            target_detection = self._select_target()
+            target_detection = self._select_target(frame_size)
             
             if target_detection:
                 # Ejecutar seguimiento
                 success = self.tracker.track_object(target_detection, frame_size)
                 
                 if success:
-                    self._log(f"✅ Siguiendo {target_detection.get('class', 'objeto')} "
-                             f"(conf: {target_detection.get('confidence', 0):.2f})")
+                    self._log("✅ Siguiendo %s (conf: %.2f)",
+                              target_detection.get('class', 'objeto'),
+                              target_detection.get('confidence', 0))
                 else:
+                    # También sin movimiento por el intervalo mínimo: es por
+                    # frame y los fallos reales los registra FixedPTZTracker
                     self._log("❌ Error en seguimiento")
                 
                 return success
@@ -374,63 +559,74 @@ class FixedMultiObjectTracker:
                 return False
                 
         except Exception as e:
-            self._log(f"❌ Error en actualización: {e}")
+            self._log("❌ Error en actualización: %s", e, level=logging.ERROR)
             return False
     
     def _filter_detections(self, detections: List[Dict]) -> List[Dict]:
-        """Filtrar detecciones válidas"""
-        filtered = []
+        """Filtrar detecciones válidas (confianza, bbox y tamaño mínimo en una pasada NumPy)"""
+        candidates = [d for d in detections if len(d.get('bbox', ())) == 4]
+        if not candidates:
+            return []
         
-        for detection in detections:
-            # Verificar confianza mínima
-            confidence = detection.get('confidence', 0)
-            if confidence < self.config['min_confidence']:
-                continue
-            
-            # Verificar bbox válido
-            bbox = detection.get('bbox', [])
-            if len(bbox) != 4:
-                continue
-            
-            x1, y1, x2, y2 = bbox
-            if x2 <= x1 or y2 <= y1:
-                continue
-            
-            # Verificar tamaño mínimo
-            width = x2 - x1
-            height = y2 - y1
-            if width < 10 or height < 10:
-                continue
-            
-            filtered.append(detection)
+        bboxes = np.asarray([d['bbox'] for d in candidates], dtype=np.float32)
+        confs = np.asarray([d.get('confidence', 0) for d in candidates], dtype=np.float32)
+        widths = bboxes[:, 2] - bboxes[:, 0]
+        heights = bboxes[:, 3] - bboxes[:, 1]
         
-        return filtered[:self.config['max_objects']]
+        # El tamaño mínimo (10 px) ya descarta las cajas degeneradas
+        mask = (confs >= self.config['min_confidence']) & (widths >= 10) & (heights >= 10)
+        keep = np.flatnonzero(mask)[:self.config['max_objects']]
+        return [candidates[i] for i in keep]
     
     def _update_active_objects(self, detections: List[Dict]):
         """Actualizar lista de objetos activos"""
         current_time = time.time()
         
-        # Limpiar objetos antiguos
-        self.active_objects = {k: v for k, v in self.active_objects.items() 
-                              if current_time - v.get('last_seen', 0) < 3.0}
-        
-        # Agregar/actualizar objetos actuales
-        for i, detection in enumerate(detections):
-            obj_id = f"obj_{i}"
+        # Limpiar objetos antiguos en sitio (el orden de inserción se mantiene)
+        active = self.active_objects
+        expired = [k for k, v in active.items() if current_time - v['last_seen'] >= OBJECT_TTL]
+        for k in expired:
+            del active[k]
+        
+        if not detections:
+            return
+        
+        # Asociar cada detección con el objeto activo que más se solapa para
+        # que el mismo objeto conserve su ID aunque cambie el orden
+        assigned: List[Optional[str]] = [None] * len(detections)
+        if active:
+            prev_ids = list(active)
+            prev = np.asarray([active[k]['detection']['bbox'] for k in prev_ids], dtype=np.float32)
+            cur = np.asarray([d['bbox'] for d in detections], dtype=np.float32)
+            for r, c in _match_iou(_iou_batch(prev, cur), IOU_MATCH_THRESHOLD):
+                assigned[c] = prev_ids[r]
+        
+        # Agregar/actualizar objetos actuales reutilizando su dict
+        for detection, obj_id in zip(detections, assigned):
+            if obj_id is None:
+                obj_id = f"obj_{self._next_obj_id}"
+                self._next_obj_id += 1
             
             bbox = detection['bbox']
-            center_x = (bbox[0] + bbox[2]) / 2
-            center_y = (bbox[1] + bbox[3]) / 2
+            center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
             
-            self.active_objects[obj_id] = {
-                'detection': detection,
-                'center': (center_x, center_y),
-                'last_seen': current_time,
-                'confidence': detection.get('confidence', 0),
-                'class': detection.get('class', 'unknown')
-            }
+            obj = active.get(obj_id)
+            if obj is None:
+                active[obj_id] = {
+                    'detection': detection,
+                    'center': center,
+                    'last_seen': current_time,
+                    'confidence': detection.get('confidence', 0),
+                    'class': detection.get('class', 'unknown')
+                }
+            else:
+                obj['detection'] = detection
+                obj['center'] = center
+                obj['last_seen'] = current_time
+                obj['confidence'] = detection.get('confidence', 0)
+                obj['class'] = detection.get('class', 'unknown')
     
-    def _select_target(self) -> Optional[Dict]:
+    def _select_target(self, frame_size: Tuple[int, int] = (1920, 1080)) -> Optional[Dict]:
         """Seleccionar objetivo basado en prioridades"""
         if not self.active_objects:
             return None
@@ -445,19 +641,17 @@ class FixedMultiObjectTracker:
         )
         
         if should_switch:
-            # Calcular prioridades
-            priorities = {}
-            for obj_id, obj_data in self.active_objects.items():
-                priority = self._calculate_priority(obj_data)
-                priorities[obj_id] = priority
+            # Calcular prioridades de todos los objetos a la vez
+            obj_ids = list(self.active_objects)
+            priorities = self._calculate_priorities([self.active_objects[k] for k in obj_ids], frame_size)
             
             # Seleccionar el de mayor prioridad
-            if priorities:
-                self.current_target = max(priorities, key=priorities.get)
-                self.last_switch_time = current_time
-                
-                target_class = self.active_objects[self.current_target]['class']
-                self._log(f"🎯 Nuevo objetivo: {target_class} (prioridad: {priorities[self.current_target]:.2f})")
+            best = int(priorities.argmax())
+            self.current_target = obj_ids[best]
+            self.last_switch_time = current_time
+            
+            target_class = self.active_objects[self.current_target]['class']
+            self._log("🎯 Nuevo objetivo: %s (prioridad: %.2f)", target_class, priorities[best])
         
         # Retornar detección del objetivo actual
         if self.current_target and self.current_target in self.active_objects:
@@ -465,41 +659,46 @@ class FixedMultiObjectTracker:
         
         return None
     
-    def _calculate_priority(self, obj_data: Dict) -> float:
-        """Calcular prioridad de un objeto"""
+    def _calculate_priorities(self, objects: List[Dict],
+                              frame_size: Tuple[int, int] = (1920, 1080)) -> np.ndarray:
+        """Calcular la prioridad de varios objetos con un único producto matricial"""
+        confs = np.asarray([o['confidence'] for o in objects], dtype=np.float32)
+        bboxes = np.asarray([o['detection']['bbox'] for o in objects], dtype=np.float32)
+        centers = np.asarray([o['center'] for o in objects], dtype=np.float32)
+        
+        # Tamaño (objetos más grandes tienen mayor prioridad)
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        
+        # Distancia al centro real del frame
+        frame_w, frame_h = frame_size
+        dists = np.hypot(centers[:, 0] - frame_w / 2, centers[:, 1] - frame_h / 2)
+        
+        # Movimiento simplificado: la confianza hace de proxy
+        features = np.stack((confs, areas, confs, dists), axis=1) * self._inv_norm
+        np.minimum(features, 1.0, out=features)
+        # Objetos cerca del centro tienen menor prioridad
+        features[:, 3] = 1.0 - features[:, 3]
+        return features @ self._priority_weight_vec()
+    
+    def _priority_weight_vec(self) -> np.ndarray:
+        """Vector de pesos de prioridad, recalculado solo si los pesos cambiaron"""
         weights = self.config['priority_weights']
-        
-        # Factor confianza
-        confidence_factor = obj_data['confidence']
-        
-        # Factor tamaño (objetos más grandes tienen mayor prioridad)
-        bbox = obj_data['detection']['bbox']
-        area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
-        size_factor = min(area / 50000, 1.0)  # Normalizar
-        
-        # Factor movimiento (simplificado - usar confianza como proxy)
-        movement_factor = confidence_factor
-        
-        # Factor proximidad al centro (objetos cerca del centro tienen menor prioridad)
-        center_x, center_y = obj_data['center']
-        frame_center_dist = ((center_x - 960)**2 + (center_y - 540)**2)**0.5
-        proximity_factor = 1.0 - min(frame_center_dist / 1000, 1.0)
-        
-        # Calcular prioridad total
-        priority = (
-            weights['confidence'] * confidence_factor +
-            weights['size'] * size_factor +
-            weights['movement'] * movement_factor +
-            weights['center_proximity'] * proximity_factor
-        )
-        
-        return priority
-    
-    def _log(self, message: str):
-        """Log con identificación"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        ip = self.camera_data.get('ip', 'unknown')
-        print(f"[{timestamp}] MultiTracker {ip}: {message}")
+        key = (weights['confidence'], weights['size'],
+               weights['movement'], weights['center_proximity'])
+        if key != self._weight_key:
+            self._weight_key = key
+            self._weight_vec = np.array(key, dtype=np.float32)
+        return self._weight_vec
+    
+    def _log(self, message: str, *args, level: int = logging.DEBUG):
+        """Log con identificación; sale sin formatear nada si el nivel está desactivado
+        
+        Los mensajes por frame van a DEBUG; los fallos se pasan con
+        level=WARNING/ERROR para que no queden ocultos.
+        """
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, "MultiTracker " + self.camera_data.get('ip', 'unknown') + ": " + message, *args)
     
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado del sistema"""
@@ -519,8 +718,17 @@ def create_fixed_tracker(camera_data: Dict) -> FixedMultiObjectTracker:
     """Crear tracker multi-objeto corregido"""
     return FixedMultiObjectTracker(camera_data)
 
-def test_ptz_connection(camera_data: Dict) -> Dict[str, Any]:
-    """Probar conexión PTZ básica"""
+def _tracker_for(camera_data: Dict) -> FixedPTZTracker:
+    """Crear un FixedPTZTracker con los datos de conexión de la cámara"""
+    return FixedPTZTracker(
+        camera_data.get('ip'),
+        camera_data.get('puerto', 80),
+        camera_data.get('usuario'),
+        camera_data.get('contrasena')
+    )
+
+def test_ptz_connection(camera_data: Dict, tracker: Optional[FixedPTZTracker] = None) -> Dict[str, Any]:
+    """Probar conexión PTZ básica (reutiliza tracker si se pasa uno)"""
     result = {
         'success': False,
         'message': '',
@@ -528,12 +736,8 @@ def test_ptz_connection(camera_data: Dict) -> Dict[str, Any]:
     }
     
     try:
-        tracker = FixedPTZTracker(
-            camera_data.get('ip'),
-            camera_data.get('puerto', 80),
-            camera_data.get('usuario'),
-            camera_data.get('contrasena')
-        )
+        if tracker is None:
+            tracker = _tracker_for(camera_data)
         
         if tracker.connect():
             result['success'] = True
@@ -549,17 +753,14 @@ def test_ptz_connection(camera_data: Dict) -> Dict[str, Any]:
     
     return result
 
-def run_movement_test(camera_data: Dict) -> bool:
-    """Ejecutar prueba básica de movimiento"""
+def run_movement_test(camera_data: Dict, tracker: Optional[FixedPTZTracker] = None) -> bool:
+    """Ejecutar prueba básica de movimiento (reutiliza tracker si se pasa uno)"""
     try:
-        tracker = FixedPTZTracker(
-            camera_data.get('ip'),
-            camera_data.get('puerto', 80),
-            camera_data.get('usuario'),
-            camera_data.get('contrasena')
-        )
+        if tracker is None:
+            tracker = _tracker_for(camera_data)
         
-        if not tracker.connect():
+        # start_tracking conecta solo si hace falta y habilita track_object
+        if not tracker.start_tracking():
             print("❌ No se pudo conectar para prueba")
             return False
         
@@ -577,6 +778,14 @@ def run_movement_test(camera_data: Dict) -> bool:
         # Probar seguimiento
         success = tracker.track_object(fake_detection, frame_size)
         
+        # Mantener la detección durante la prueba: sin ella el watchdog (o el
+        # stop_tracking inmediato) pararía la cámara antes de que se mueva
+        if success:
+            deadline = time.monotonic() + MOVEMENT_TEST_DURATION
+            while time.monotonic() < deadline:
+                time.sleep(WATCHDOG_TIMEOUT / 5)
+                tracker.track_object(fake_detection, frame_size)
+        
         # Limpiar
         tracker.stop_tracking()
         
@@ -603,9 +812,12 @@ def apply_tracking_fixes(camera_data: Dict) -> Dict[str, Any]:
     
     print("🔧 Aplicando correcciones PTZ...")
     
+    # Un solo tracker (y una sola conexión ONVIF) para todas las pruebas
+    tracker = _tracker_for(camera_data)
+    
     # 1. Probar conexión básica
     print("\n1. Probando conexión PTZ...")
-    connection_result = test_ptz_connection(camera_data)
+    connection_result = test_ptz_connection(camera_data, tracker)
     fixes_applied['connection_test'] = connection_result['success']
     
     if connection_result['success']:
@@ -613,7 +825,7 @@ def apply_tracking_fixes(camera_data: Dict) -> Dict[str, Any]:
         
         # 2. Probar movimiento básico
         print("\n2. Probando movimiento básico...")
-        movement_ok = run_movement_test(camera_data)
+        movement_ok = run_movement_test(camera_data, tracker)
         fixes_applied['movement_test'] = movement_ok
         
         # 3. Verificar calibración
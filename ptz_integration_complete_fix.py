@@ -177,7 +177,7 @@ except ImportError as e:
                     self._ptz_detection_count = 0
                 self._ptz_detection_count += len(detections) if detections else 0
                 if self._ptz_detection_count <= 50:
-                    self.append_debug(f"📡 PTZ: {len(detections)} detecciones → {camera_id}")
+                    self.append_debug(f"📡 PTZ: {len(detections)} detecciones encoladas → {camera_id}")
             return success
         except Exception as e:
             self.append_debug(f"❌ Error enviando detecciones a PTZ: {e}")
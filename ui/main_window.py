@@ -13,6 +13,7 @@ from ui.fps_config_dialog import FPSConfigDialog
 from ui.camera_manager import guardar_camaras, cargar_camaras_guardadas
 from core.rtsp_builder import generar_rtsp
 import os
+import numpy as np
 import cProfile
 import pstats
 import io
@@ -20,10 +21,13 @@ import io
 # IMPORTS PTZ SYSTEM - CORRECCIÓN AUTOMÁTICA
 # ===============================================
 try:
-    from core.ptz_control_enhanced import PTZDetectionBridge, create_multi_object_ptz_system
+    from core.ptz_control_enhanced import (
+        PTZDetectionBridge, create_multi_object_ptz_system, VECTOR_DETECTIONS
+    )
     PTZ_AVAILABLE = True
 except ImportError as e:
     PTZ_AVAILABLE = False
+    VECTOR_DETECTIONS = False
     print(f"⚠️ PTZ no disponible: {e}")
 
 
@@ -424,8 +428,8 @@ class MainGUI(QMainWindow):
             self.append_debug(f"❌ Error activando diálogo PTZ: {e}")
             return False
 
-    def send_detections_to_ptz(self, camera_id: str, detections):
-        """Enviar detecciones al sistema PTZ mejorado"""
+    def send_detections_to_ptz(self, camera_id: str, detections, frame_size=None):
+        """Enviar detecciones al sistema PTZ mejorado (lista de dicts o ndarray N x 6)"""
         try:
             # NUEVO: Asegurar que el diálogo esté activo
             self.ensure_ptz_dialog_active()
@@ -433,15 +437,18 @@ class MainGUI(QMainWindow):
             if not hasattr(self, 'ptz_detection_bridge') or not self.ptz_detection_bridge:
                 return False
 
-            if not detections:
+            if detections is None or len(detections) == 0:
                 return False
 
             # Limpiar camera_id
             if isinstance(camera_id, str) and camera_id.startswith('camera_'):
                 camera_id = camera_id.replace('camera_', '')
 
-            # Enviar detecciones
-            success = self.ptz_detection_bridge.send_detections(camera_id, detections)
+            # Encolar detecciones (el bridge las entrega al diálogo en el hilo de la GUI)
+            if frame_size is not None:
+                success = self.ptz_detection_bridge.send_detections(camera_id, detections, frame_size)
+            else:
+                success = self.ptz_detection_bridge.send_detections(camera_id, detections)
 
             if success:
                 if not hasattr(self, '_ptz_detection_count'):
@@ -450,7 +457,7 @@ class MainGUI(QMainWindow):
 
                 # Log limitado
                 if self._ptz_detection_count <= 50:
-                    self.append_debug(f"📡 PTZ: {len(detections)} detecciones → {camera_id}")
+                    self.append_debug(f"📡 PTZ: {len(detections)} detecciones encoladas → {camera_id}")
 
             return success
 
@@ -519,9 +526,26 @@ class MainGUI(QMainWindow):
             if not results or not hasattr(results, 'boxes'):
                 return 0
 
-            detections_list = []
             boxes = results.boxes
 
+            if VECTOR_DETECTIONS:
+                # Una sola matriz (N, 6) [x1, y1, x2, y2, conf, cls]; el bridge la valida vectorizada
+                if boxes is None or len(boxes) == 0 or not camera_id:
+                    return 0
+                det_array = np.concatenate([
+                    boxes.xyxy.cpu().numpy(),
+                    boxes.conf.cpu().numpy()[:, None],
+                    boxes.cls.cpu().numpy()[:, None]
+                ], axis=1).astype(np.float32)
+                if hasattr(results, 'orig_shape'):
+                    frame_size = (results.orig_shape[1], results.orig_shape[0])
+                else:
+                    frame_size = (1920, 1080)
+                success = self.send_detections_to_ptz(camera_id, det_array, frame_size)
+                return len(det_array) if success else 0
+
+            detections_list = []
+
             if boxes is not None and len(boxes) > 0:
                 for i, box in enumerate(boxes):
                     xyxy = box.xyxy[0].cpu().numpy()
@@ -17,7 +17,7 @@ from typing import Optional, Dict, Tuple
 
 try:
     from core.ptz_calibration_system import (
-        PTZCalibrationSystem, CalibrationData, track_object_calibrated
+        PTZCalibrationSystem, CalibrationData, flush, track_object_calibrated
     )
     CALIBRATION_AVAILABLE = True
 except ImportError:
@@ -40,7 +40,9 @@ class CalibrationTestThread(QThread):
         try:
             if self.test_type == "directions":
                 self.log_message.emit("🧪 Iniciando prueba de direcciones...")
-                results = self.calibration_system.test_movement_directions()
+                results = self.calibration_system.test_movement_directions(
+                    on_result=lambda key, result: self.log_message.emit(f"✅ {key}: {result}")
+                )
                 self.test_completed.emit(results)
             
         except Exception as e:
@@ -50,6 +52,7 @@ class PTZCalibrationDialog(QDialog):
     """Diálogo para calibración PTZ completa"""
     
     calibration_completed = pyqtSignal(str)  # IP de cámara calibrada
+    save_finished = pyqtSignal(bool)  # Resultado de un guardado diferido
     
     def __init__(self, parent=None, camera_data=None):
         super().__init__(parent)
@@ -433,7 +436,19 @@ Para calibrar el centro de imagen:
     
     def _connect_signals(self):
         """Conectar señales"""
-        pass
+        # Emitida desde el hilo escritor: Qt la entrega en cola al hilo de la GUI
+        self.save_finished.connect(self._on_save_finished)
+    
+    def _track_save(self, future):
+        """Informar en el log cuando termine el guardado diferido"""
+        future.add_done_callback(lambda f: self.save_finished.emit(f.result()))
+    
+    def _on_save_finished(self, saved: bool):
+        """Resultado del guardado en el hilo de la GUI"""
+        if saved:
+            self._log("💾 Calibración guardada")
+        else:
+            self._log("❌ Error guardando calibración")
     
     def _load_camera_data(self):
         """Cargar datos de la cámara"""
@@ -633,10 +648,11 @@ Para calibrar el centro de imagen:
         pan_inverted = self.pan_inverted_cb.isChecked()
         tilt_inverted = self.tilt_inverted_cb.isChecked()
         
-        success = self.calibration_system.set_direction_inversion(pan_inverted, tilt_inverted)
+        save = self.calibration_system.set_direction_inversion(pan_inverted, tilt_inverted)
         
-        if success:
+        if save is not None:
             self._log(f"✅ Direcciones configuradas: PAN={'Inv' if pan_inverted else 'Norm'}, TILT={'Inv' if tilt_inverted else 'Norm'}")
+            self._track_save(save)
         else:
             self._log("❌ Error aplicando inversión de direcciones")
     
@@ -664,7 +680,7 @@ Para calibrar el centro de imagen:
     def _clear_calibration_points(self):
         """Limpiar puntos de calibración"""
         if self.calibration_system:
-            self.calibration_system.calibration_points.clear()
+            self.calibration_system.clear_calibration_points()
         
         self.points_count_label.setText("0")
         self.finalize_calibration_btn.setEnabled(False)
@@ -679,14 +695,15 @@ Para calibrar el centro de imagen:
         # Usar tamaño de frame típico si no se especifica
         frame_size = (1920, 1080)  # Se puede actualizar según la cámara
         
-        success = self.calibration_system.finalize_calibration(frame_size)
+        save = self.calibration_system.finalize_calibration(frame_size)
         
-        if success:
+        if save is not None:
             calibration = self.calibration_system.current_calibration
             self.current_offset_label.setText(f"X: {calibration.center_offset_x:.4f}, Y: {calibration.center_offset_y:.4f}")
             self.manual_offset_x.setValue(calibration.center_offset_x)
             self.manual_offset_y.setValue(calibration.center_offset_y)
             self._log("✅ Calibración de centro finalizada exitosamente")
+            self._track_save(save)
         else:
             self._log("❌ Error finalizando calibración de centro")
     
@@ -701,6 +718,7 @@ Para calibrar el centro de imagen:
         
         self.calibration_system.current_calibration.center_offset_x = offset_x
         self.calibration_system.current_calibration.center_offset_y = offset_y
+        self.calibration_system.invalidate_derived()
         
         self.current_offset_label.setText(f"X: {offset_x:.4f}, Y: {offset_y:.4f}")
         self._log(f"✅ Offset manual aplicado: X={offset_x:.4f}, Y={offset_y:.4f}")
@@ -714,10 +732,11 @@ Para calibrar el centro de imagen:
         pan_sens = self.pan_sensitivity.value()
         tilt_sens = self.tilt_sensitivity.value()
         
-        success = self.calibration_system.adjust_sensitivity(pan_sens, tilt_sens)
+        save = self.calibration_system.adjust_sensitivity(pan_sens, tilt_sens)
         
-        if success:
+        if save is not None:
             self._log(f"✅ Sensibilidad aplicada: PAN={pan_sens:.4f}, TILT={tilt_sens:.4f}")
+            self._track_save(save)
         else:
             self._log("❌ Error aplicando sensibilidad")
     
@@ -732,6 +751,7 @@ Para calibrar el centro de imagen:
         
         self.calibration_system.current_calibration.deadzone_x = deadzone_x
         self.calibration_system.current_calibration.deadzone_y = deadzone_y
+        self.calibration_system.invalidate_derived()
         
         self._log(f"✅ Zona muerta aplicada: X={deadzone_x:.3f}, Y={deadzone_y:.3f}")
     
@@ -822,6 +842,12 @@ Para calibrar el centro de imagen:
                 
                 self._log("🔄 Calibración reseteada a valores por defecto")
     
+    def closeEvent(self, event):
+        """Escribir la calibración pendiente antes de cerrar"""
+        if CALIBRATION_AVAILABLE:
+            flush()
+        super().closeEvent(event)
+    
     def _log(self, message: str):
         """Agregar mensaje al log"""
         timestamp = time.strftime("%H:%M:%S")